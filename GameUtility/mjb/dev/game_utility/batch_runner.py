@@ -0,0 +1,221 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import timeit
+import traceback
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.graphics.event_source import EventSource
+from mjb.dev.game_utility.capabilities.touchable import TouchScreen
+from mjb.dev.game_utility.capabilities.clickable import ClickScreen
+from mjb.dev.game_utility.capabilities.collideable import CollisionScreen
+
+class RunResult(object):
+    '''
+    The result of a single run of a batch, with statistics of its frames
+    '''
+
+    def __init__(self, index, run, result, frame_count, step_count, time, statistics, error):
+        self.__index = index
+        self.__run = run
+        self.__result = result
+        self.__frame_count = frame_count
+        self.__step_count = step_count
+        self.__time = time
+        self.__statistics = statistics
+        self.__error = error
+
+    def get_index(self):
+        '''
+        @return: the position of the run in the batch (counting from 0)
+        '''
+        return self.__index
+
+    def get_run(self):
+        '''
+        @return: the run, as given to the batch runner (a seed or an event source)
+        '''
+        return self.__run
+
+    def get_result(self):
+        '''
+        @return: whatever the entry point returned (None if the run failed)
+        '''
+        return self.__result
+
+    def get_frame_count(self):
+        '''
+        @return: the number of frames the game ran for
+        '''
+        return self.__frame_count
+
+    def get_step_count(self):
+        '''
+        @return: the number of steps the game ran for (see Screen.get_step_count)
+        '''
+        return self.__step_count
+
+    def get_time(self):
+        '''
+        @return: the time in seconds the run took (in real time)
+        '''
+        return self.__time
+
+    def get_statistics(self):
+        '''
+        @return: the percentiles of the time of each phase of the game loop (see FrameProfiler.get_statistics),
+        or None if the run failed before the game started
+        '''
+        return self.__statistics
+
+    def get_error(self):
+        '''
+        @return: None if the run succeeded, otherwise the traceback of the error as a string
+        '''
+        return self.__error
+
+class BatchRunner(object):
+    '''
+    The batch runner runs a game many times over in worker processes, so that many short games (e.g. to tune
+    an AI, or to replay recorded games as regression tests) can be played as fast as the machine allows.
+
+    Each run is played in its own world (see world.py) with a headless, deterministic screen, which runs as
+    fast as it can for a fixed number of frames. The screen, the picture handler and the capability screens
+    are initialised for each run, then the entry point of the game is called with the run to set up the game.
+    The entry point may start the game loop itself (like test_bed.run) or leave it to the runner. Whatever
+    it returns is sent back as the result of the run once the game is over, so it can return an object which
+    the game fills in as it plays.
+
+    Each run is either a seed for the random module (an int), or an event source (see event_source.py) to take
+    the input from, e.g. a ScriptedEventSource. The entry point, the runs and the results must all be picklable
+    (the entry point must be a function at the top level of a module).
+
+    results = BatchRunner(my_game.setup, max_frames=1800).run(range(0,1000))
+    for result in results:
+        ...
+    '''
+
+    def __init__(self, entry_point, max_frames=600, processes=None, max_pending=None, max_runs_per_process=None,
+                 profile_frames=600, screen_options=None):
+        '''
+        Construct a new batch runner
+        @param entry_point: the function to set up the game, accepting the run
+        @param max_frames: 600 by default, the number of frames each run lasts (unless the game quits first)
+        @param processes: None by default for one per CPU, otherwise the number of worker processes
+        @param max_pending: None by default for four per worker process, otherwise the most runs which can be
+        started but not yet taken from the results (so the results waiting to be taken are limited)
+        @param max_runs_per_process: None by default, otherwise the number of runs after which each worker
+        process is replaced with a new one
+        @param profile_frames: 600 by default, the number of frames (the last of each run) to take the statistics
+        of the frames over
+        @param screen_options: None by default, otherwise a dictionary of other parameters to initialise
+        each screen with (see Screen.initialise), e.g. the size or fixed_timestep
+        @raise ValueError: if the number of frames or the most pending runs is less than 1
+        '''
+        if max_frames<1:
+            raise ValueError("Each run must last at least one frame")
+        if processes==None:
+            processes = multiprocessing.cpu_count()
+        if max_pending==None:
+            max_pending = processes*4
+        if max_pending<1:
+            raise ValueError("At least one run must be able to be pending")
+        self.__entry_point = entry_point
+        self.__max_frames = max_frames
+        self.__processes = processes
+        self.__max_pending = max_pending
+        self.__max_runs_per_process = max_runs_per_process
+        self.__profile_frames = max(profile_frames,1)
+        self.__screen_options = dict(screen_options or {})
+
+    def run(self, runs):
+        '''
+        Play each of the runs, in the worker processes
+        @param runs: an iterable of the runs (seeds, or event sources), which is only read as runs are started
+        @return: an iterator of the result (a RunResult) of each run, in the order they finish. The workers
+        are stopped once it is finished with, or when it is closed.
+        '''
+        options = dict(self.__screen_options)
+        options.update(headless=True, deterministic=True, max_frames=self.__max_frames,
+                       profile_frames=self.__profile_frames)
+        #Released as each result is taken, so that only so many runs are pending at once
+        pending = threading.Semaphore(self.__max_pending)
+        stopped = threading.Event()
+        def tasks():
+            #(Read by the pool on a thread of its own)
+            for (index,run) in enumerate(runs):
+                pending.acquire()
+                if stopped.is_set():
+                    return
+                yield (self.__entry_point,index,run,options)
+        pool = multiprocessing.Pool(self.__processes, _initialise_worker,
+                                    maxtasksperchild=self.__max_runs_per_process)
+        try:
+            for result in pool.imap_unordered(_play, tasks()):
+                pending.release()
+                yield result
+            pool.close()
+        finally:
+            #Let the pool's thread out of the tasks if it is waiting, then stop the workers
+            stopped.set()
+            pending.release()
+            pool.terminate()
+            pool.join()
+
+def _initialise_worker():
+    '''
+    Prepare a worker process, before pygame is initialised in it
+    '''
+    #Otherwise SDL turns the signal to stop the worker into a quit event, and the worker never stops
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    #(The handler is inherited when pygame was already initialised in the process running the batch)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def _play((entry_point, index, run, options)):
+    '''
+    Play a single run, in a worker process
+    @param entry_point: the function to set up the game
+    @param index: the position of the run in the batch
+    @param run: a seed, or an event source
+    @param options: the parameters to initialise the screen with
+    @return: the result of the run
+    '''
+    frame_count = step_count = 0
+    statistics = None
+    start = timeit.default_timer()
+    #Each run has its own world, so it starts from nothing
+    with World():
+        try:
+            if isinstance(run,EventSource):
+                random.seed(index)
+                Screen.initialise(event_source=run,**options)
+            else:
+                random.seed(run)
+                Screen.initialise(**options)
+            PictureHandler.initialise()
+            TouchScreen.initialise()
+            ClickScreen.initialise()
+            CollisionScreen.initialise()
+            result = entry_point(run)
+            #The entry point may have left the game loop to the runner
+            if Screen.get_frame_count()==0:
+                Screen.start_game_loop()
+            error = None
+        except Exception:
+            result = None
+            error = traceback.format_exc()
+        frame_count = Screen.get_frame_count()
+        step_count = Screen.get_step_count()
+        profiler = Screen.get_profiler()
+        if profiler!=None and profiler.get_frame_count()>0:
+            statistics = profiler.get_statistics()
+    return RunResult(index,run,result,frame_count,step_count,timeit.default_timer()-start,statistics,error)
@@ -5,12 +5,11 @@ Created on 3 Aug 2014
 '''
 
 from mjb.dev.game_utility.capabilities.capability import Capability
+from mjb.dev.game_utility.world import World
 from mjb.dev.game_utility.graphics.screen import Screen
 from mjb.dev.game_utility.collisions.screen_collider import ScreenCollider
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree
-from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
 from mjb.dev.game_utility.input_listeners.mouse_button_listener import MouseButtonListener
-import mjb.dev.game_utility.input_listeners.mouse_motion_listener as mouse_motion_listener
 
 class ClickScreen(object):
     '''
@@ -25,8 +24,10 @@ class ClickScreen(object):
         but before any user input has been processed (so immediately after more or less).
         '''
         if not ClickScreen.__is_initialised:
+            #The keys are (depth,clickable), so the depth is kept in the screen for the topmost search
             ClickScreen.__screen = ScreenCollider(LargeRectangleTree(Screen.get_screen_size()),
-                                                      lambda (a,b,c,d,clickable): clickable._get_inner_shape())
+                                                      lambda (a,b,c,d,(depth,clickable)): clickable._get_inner_shape(),
+                                                      lambda (a,b,c,d,(depth,clickable)): depth)
             ClickScreen.__is_initialised = True
         #Start listening...
         ClickScreen._ClickScreenMouseButtonListener()
@@ -37,30 +38,40 @@ class ClickScreen(object):
     
     #The mouse button listener
     class _ClickScreenMouseButtonListener(MouseButtonListener):
-        def button_down(self,button):
+        def button_down_at(self,button,mouse_position):
+            #Forward to the click screen (at the position in the event, which may have been scripted)
+            ClickScreen._mouse_button_down(button, mouse_position)
+        def button_up_at(self,button,mouse_position):
             #Forward to the click screen
-            ClickScreen._mouse_button_down(button, mouse_motion_listener.get_mouse_position())
-        def button_up(self,button):
-            #Forward to the click screen
-            ClickScreen._mouse_button_up(button, mouse_motion_listener.get_mouse_position())
+            ClickScreen._mouse_button_up(button, mouse_position)
     
     @staticmethod
     def _insert_clickable(clickable):
         '''
         Insert a collideable object into the screen (should not already exist)
         @param collideable: the collideable object to add to the screen handler
+        @return: the handle of its rectangle in the screen
         '''
-        (x_min,y_min,x_max,y_max) = clickable._get_bounding_rectangle()
-        ClickScreen.__screen.insert_rectangle((x_min,y_min,x_max,y_max,clickable))
+        return ClickScreen._move_clickable(clickable, None)
+    
+    @staticmethod
+    def _remove_clickable(handle):
+        '''
+        Remove a clickable object from the screen (must exist)
+        @param handle: the handle returned when the clickable object was inserted
+        '''
+        ClickScreen.__screen.remove_by_handle(handle)
     
     @staticmethod
-    def _remove_clickable(clickable):
+    def _move_clickable(clickable, handle):
         '''
-        Remove a collideable object from the screen (must exist)
-        @param collideable: the collideable object to remove from the screen handler
+        Move a clickable object in the screen to its current bounding rectangle and depth (must exist)
+        @param clickable: the clickable object to move
+        @param handle: the handle returned when the clickable object was inserted (or last moved)
+        @return: the handle of its rectangle in the screen from now on
         '''
         (x_min,y_min,x_max,y_max) = clickable._get_bounding_rectangle()
-        ClickScreen.__screen.remove_rectangle((x_min,y_min,x_max,y_max,clickable))
+        return ClickScreen.__screen.move_rectangle(handle, (x_min,y_min,x_max,y_max,(clickable._get_depth(),clickable)))
     
     @staticmethod
     def _mouse_button_down(button, location):
@@ -74,36 +85,23 @@ class ClickScreen(object):
     def __process_click(button, location, is_down):
         '''
         To remove code duplication, this updates all of the click objects.
+        The top clickable object and those below it which are not top only are found by a single topmost
+        search (which doesn't check the shapes of the top only objects underneath the top).
         @param button: the button in the event
         @param location: the location of the mouse when the event was raised
         @param is_down: true iff the button was released (otherwise pressed)
         '''
-        #Collide the mouse with all objects on the screen...
-        (x_min,y_min) = location
-        clickables = ClickScreen.__screen.collide_rectangle((x_min,y_min,x_min+1,y_min+1), [], None)
-        #Convert the list...
-        temp_list = []
-        for (_,_,_,_,clickable) in clickables:
-            temp_list.append(clickable)
-        clickables = temp_list
-        #Find out which is the minimum...
-        if clickables!=[]:
-            #Some minimum to find
-            min_depth = clickables[0]._get_depth()
-            min_index = 0
-            for index in range(1,len(clickables)):
-                depth = clickables[index]._get_depth()
-                if depth<min_depth:
-                    min_depth = depth
-                    min_index = index
-            min_clickable = clickables[min_index]
-            #Got the minimum! Now update the clickable objects...
-            if is_down:
-                for clickable in clickables:
-                    (clickable._get_button_down_handler())(button, clickable==min_clickable)
-            else:
-                for clickable in clickables:
-                    (clickable._get_button_up_handler())(button, clickable==min_clickable)
+        (x,y) = location
+        found = ClickScreen.__screen.collide_point_topmost(x, y, 1,
+                                                           lambda (a,b,c,d,(depth,clickable)): not clickable.is_top_only())
+        clickables = [clickable for (_,_,_,_,(_,clickable)) in found]
+        #Update the clickable objects (the first is on top)...
+        if is_down:
+            for index in range(0,len(clickables)):
+                (clickables[index]._get_button_down_handler())(button, index==0)
+        else:
+            for index in range(0,len(clickables)):
+                (clickables[index]._get_button_up_handler())(button, index==0)
     
     @staticmethod
     def _mouse_button_up(button, location):
@@ -113,6 +111,9 @@ class ClickScreen(object):
         '''
         ClickScreen.__process_click(button, location, False)
 
+#Each world has its own click screen
+World.register(ClickScreen)
+
 class Clickable(Capability):
     '''
     The clickable capability enables an object to identify if it has been clicked.
@@ -120,7 +121,7 @@ class Clickable(Capability):
     TODO: a lot of the code for the capabilities is the same. Try to factor it out.
     '''
     
-    def __init__(self, shape_handler, precision, button_down_handler, button_up_handler, enabled=True):
+    def __init__(self, shape_handler, precision, button_down_handler, button_up_handler, enabled=True, top_only=False):
         '''
         @param shape_handler: the shape handler this is concerned with
         @param precision: the precision that collisions with this shape should be calculated at.
@@ -129,18 +130,25 @@ class Clickable(Capability):
         @param button_up_handler: a hander with the same parameters as the button_down_handler
         (but called when a mouse button is released)
         @param enabled: true by default, whether or not the object should be clickable immediately
+        @param top_only: false by default, set to true iff the handlers should only be called when this is
+        the top element clicked on (which is much cheaper when lots of clickable elements overlap).
         
         *Awkwardly, if you wanted other elements to block a click event by being on top, you'll need
         to make them clickable too to swallow the event.
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.__world = World.get_active_world()
         self.__precision = precision
         self.__shape_handler = shape_handler
         self.__enabled = enabled
+        self.__top_only = top_only
+        #The handle of our rectangle in the screen (while enabled)
+        self.__handle = None
         self.__button_down_handler = button_down_handler
         self.__button_up_handler = button_up_handler
         #Attach myself to the click screen if I'm enabled.
         if self.__enabled:
-            ClickScreen._insert_clickable(self)
+            self.__handle = ClickScreen._insert_clickable(self)
             self.__shape_handler._enable_capability(self)
         
     def get_shape_handler(self):
@@ -159,6 +167,7 @@ class Clickable(Capability):
         '''
         @param precision: the new precision this capability should use.
         '''
+        World.check_active(self.__world)
         self.__precision = precision
         #Resetting ourselves in the collision screen is unnecessary because it will recalculate at the
         #precision used at any time.
@@ -177,6 +186,12 @@ class Clickable(Capability):
         '''
         return self.__shape_handler.get_depth()
     
+    def is_top_only(self):
+        '''
+        @return: true iff the handlers are only called when this is the top element clicked on
+        '''
+        return self.__top_only
+    
     def _get_button_up_handler(self):
         '''
         @return: the button up handler held by this clickable object
@@ -202,11 +217,9 @@ class Clickable(Capability):
         This is a chance for the capability to deregister the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
-        #Only care about this if enabled
-        if self.__enabled:
-            if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                ClickScreen._remove_clickable(self)
+        World.check_active(self.__world)
+        #Nothing to do - the rectangle is moved after the update using its handle
+        pass
     
     def post_update(self, flag):
         '''
@@ -214,20 +227,20 @@ class Clickable(Capability):
         This is a chance for the capability to register (again) the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
+        World.check_active(self.__world)
         #Only care about this if enabled
         if self.__enabled:
-            #The depth is not important for us
-            if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                ClickScreen._insert_clickable(self)
+            #Move to the new bounding rectangle (or depth, which is kept in the screen too)
+            self.__handle = ClickScreen._move_clickable(self, self.__handle)
     
     def enable(self):
         '''
         Enable this capability
         '''
+        World.check_active(self.__world)
         if not self.__enabled:
             #Attach myself
-            ClickScreen._insert_clickable(self)
+            self.__handle = ClickScreen._insert_clickable(self)
             self.__enabled = True
             self.__shape_handler._enable_capability(self)
         
@@ -235,9 +248,11 @@ class Clickable(Capability):
         '''
         Disable this capability
         '''
+        World.check_active(self.__world)
         if self.__enabled:
             #Detach myself
-            ClickScreen._remove_clickable(self)
+            ClickScreen._remove_clickable(self.__handle)
+            self.__handle = None
             self.__enabled = False
             self.__shape_handler._disable_capability(self)
     
@@ -4,11 +4,15 @@ Created on 3 Aug 2014
 @author: michael
 '''
 
+import collections
 from mjb.dev.game_utility.capabilities.capability import Capability
+from mjb.dev.game_utility.world import World
 from mjb.dev.game_utility.graphics.screen import Screen
 from mjb.dev.game_utility.collisions.screen_collider import ScreenCollider
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree
+from mjb.dev.game_utility.collisions.sweep_and_prune import SweepAndPrune
 from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.input_listeners.frame_listener import FrameListener
 
 class CollisionScreen(object):
     '''
@@ -24,37 +28,176 @@ class CollisionScreen(object):
         '''
         if not CollisionScreen.__is_initialised:
             CollisionScreen.__screen = ScreenCollider(LargeRectangleTree(Screen.get_screen_size()),
-                                                      lambda (a,b,c,d,collideable): collideable._get_inner_shape())
+                                                      lambda (a,b,c,d,collideable): collideable._get_inner_shape(),
+                                                      get_inner_bitmask=lambda (a,b,c,d,collideable): collideable._get_inner_bitmask())
+            CollisionScreen.__sweep_and_prune = SweepAndPrune(Screen.get_screen_size())
             CollisionScreen.__is_initialised = True
+            #Start processing the collision events
+            CollisionScreen._CollisionScreenFrameListener()
         
     #The screen that the collisions are checked on...
     __screen = None
+    #The same rectangles, for finding all the collisions at once
+    __sweep_and_prune = None
     __is_initialised = False
     
+    #The number of (enabled) collideables with collision handlers. Collision events are only
+    #tracked while there are some.
+    __listening_count = 0
+    #The collideables which have changed since the collision events were last processed
+    #(Ordered dictionaries to None are used as sets, so that the events come in the same order each run)
+    __changed_collideables = collections.OrderedDict()
+    #The collideables each collideable is colliding with (for the pairs where at least one is listening)
+    __colliding = {}
+    
+    #The frame listener
+    class _CollisionScreenFrameListener(FrameListener):
+        def frame_passed(self):
+            #Forward to the collision screen
+            CollisionScreen.process_collision_events()
+    
     @staticmethod
     def _insert_collideable(collideable):
         '''
         Insert a collideable object into the screen (should not already exist)
         @param collideable: the collideable object to add to the screen handler
+        @return: the handle of its rectangles in the screen
         '''
         (x_min,y_min,x_max,y_max) = collideable._get_bounding_rectangle()
-        CollisionScreen.__screen.insert_rectangle((x_min,y_min,x_max,y_max,collideable))
+        rect = (x_min,y_min,x_max,y_max,collideable)
+        if collideable._is_listening():
+            CollisionScreen.__listening_count+=1
+        CollisionScreen._collideable_changed(collideable)
+        return (CollisionScreen.__screen.insert_rectangle(rect),
+                CollisionScreen.__sweep_and_prune.insert_rectangle(rect))
     
     @staticmethod
-    def _remove_collideable(collideable):
+    def _remove_collideable(collideable, handle):
         '''
-        Remove a collideable object from the screen (must exist)
+        Remove a collideable object from the screen (must exist). Any collisions it was in
+        are ended.
         @param collideable: the collideable object to remove from the screen handler
+        @param handle: the handle returned when the collideable object was inserted
+        '''
+        (screen_handle,sweep_handle) = handle
+        CollisionScreen.__screen.remove_by_handle(screen_handle)
+        CollisionScreen.__sweep_and_prune.remove_by_handle(sweep_handle)
+        if collideable._is_listening():
+            CollisionScreen.__listening_count-=1
+        CollisionScreen.__changed_collideables.pop(collideable,None)
+        events = []
+        for other in list(CollisionScreen.__colliding.get(collideable,())):
+            CollisionScreen.__set_colliding(collideable, other, False)
+            events.append((collideable,other))
+        for (first,second) in events:
+            CollisionScreen.__fire_collision_event(first, second, False)
+    
+    @staticmethod
+    def _move_collideable(collideable, handle):
+        '''
+        Move a collideable object in the screen to its current bounding rectangle (must exist)
+        @param collideable: the collideable object to move
+        @param handle: the handle returned when the collideable object was inserted (or last moved)
+        @return: the handle of its rectangles in the screen from now on
         '''
         (x_min,y_min,x_max,y_max) = collideable._get_bounding_rectangle()
-        CollisionScreen.__screen.remove_rectangle((x_min,y_min,x_max,y_max,collideable))
+        rect = (x_min,y_min,x_max,y_max,collideable)
+        (screen_handle,sweep_handle) = handle
+        CollisionScreen._collideable_changed(collideable)
+        return (CollisionScreen.__screen.move_rectangle(screen_handle, rect),
+                CollisionScreen.__sweep_and_prune.move_rectangle(sweep_handle, rect))
+    
+    @staticmethod
+    def _collideable_changed(collideable):
+        '''
+        Remember that a collideable object has moved or changed shape, so its collisions need to be
+        checked again when the collision events are next processed.
+        @param collideable: the collideable object which changed
+        '''
+        if CollisionScreen.__listening_count>0:
+            CollisionScreen.__changed_collideables[collideable] = None
+    
+    @staticmethod
+    def process_collision_events():
+        '''
+        Call the collision enter and leave handlers for all the collisions which have started or stopped
+        since this was last called. Only the collideables which have moved or changed shape are checked
+        again, so this costs (almost) nothing when nothing is moving.
+        This is called automatically once per frame. You only need to call it yourself if you need the
+        events straight away.
+        '''
+        changed_collideables = CollisionScreen.__changed_collideables
+        if not changed_collideables:
+            return
+        #(Handlers may move things again, which will be processed next time)
+        CollisionScreen.__changed_collideables = collections.OrderedDict()
+        events = []
+        for collideable in changed_collideables:
+            #Find what it is colliding with now...
+            (rect_list,rect_collider) = collideable._get_inner_shape()
+            res = CollisionScreen.__screen.collide_rectangle(collideable._get_bounding_rectangle(),
+                                                             rect_list, rect_collider,
+                                                             collideable._get_inner_bitmask())
+            is_listening = collideable._is_listening()
+            colliding = collections.OrderedDict()
+            for (_,_,_,_,other) in res:
+                if other is not collideable and (is_listening or other._is_listening()):
+                    colliding[other] = None
+            #...and compare it to what it was colliding with before
+            previous = CollisionScreen.__colliding.get(collideable,{})
+            entered = [other for other in colliding if other not in previous]
+            left = [other for other in previous if other not in colliding]
+            for other in entered:
+                CollisionScreen.__set_colliding(collideable, other, True)
+                events.append((collideable,other,True))
+            for other in left:
+                CollisionScreen.__set_colliding(collideable, other, False)
+                events.append((collideable,other,False))
+        for (first,second,is_enter) in events:
+            CollisionScreen.__fire_collision_event(first, second, is_enter)
+    
+    @staticmethod
+    def __set_colliding(first, second, is_colliding):
+        '''
+        Record whether or not a pair of collideables are colliding
+        @param first: the first collideable
+        @param second: the second collideable
+        @param is_colliding: true iff they are now colliding
+        '''
+        colliding = CollisionScreen.__colliding
+        for (collideable,other) in [(first,second),(second,first)]:
+            if is_colliding:
+                colliding.setdefault(collideable,collections.OrderedDict())[other] = None
+            else:
+                others = colliding.get(collideable)
+                if others is not None:
+                    others.pop(other,None)
+                    if not others:
+                        del colliding[collideable]
+    
+    @staticmethod
+    def __fire_collision_event(first, second, is_enter):
+        '''
+        Call the collision handlers of a pair of collideables
+        @param first: the first collideable
+        @param second: the second collideable
+        @param is_enter: true iff the collision started (otherwise stopped)
+        '''
+        for (collideable,other) in [(first,second),(second,first)]:
+            if is_enter:
+                handler = collideable._get_collision_enter_handler()
+            else:
+                handler = collideable._get_collision_leave_handler()
+            if handler is not None:
+                handler(other.get_shape_handler())
         
     @staticmethod
-    def get_collisions(shape_handler, precision=None):
+    def get_collisions(shape_handler, precision=None, use_bitmask=False):
         '''
         @param shape_handler: the shape handler to check for collisions with
         @param precision: the precision with which to calculate the shape_handler's shape that you are
         passing in. (The precision works in the same was as in the shape's calculation method)
+        @param use_bitmask: false by default, set to true to use the shape's bitmask (see Collideable)
         @return: all of the shape handlers (as a list) whose shape you are colliding with.
         @note: returning all of the rectangles available is roughly as easy as checking for any particular
         one, so that's what this does.
@@ -64,11 +207,43 @@ class CollisionScreen(object):
         '''
         #Get the inner rectangles...
         (rect_list,rect_collider) = shape_handler.get_shape().calculate_shape(precision)
-        res = CollisionScreen.__screen.collide_rectangle(shape_handler.get_bounding_rectangle(), rect_list, rect_collider)
+        bitmask = None
+        if use_bitmask:
+            bitmask = shape_handler.get_shape().calculate_bitmask(precision)
+        res = CollisionScreen.__screen.collide_rectangle(shape_handler.get_bounding_rectangle(), rect_list, rect_collider,
+                                                         bitmask)
         shape_handlers = []
         for (_,_,_,_,collideable) in res:
             shape_handlers.append(collideable.get_shape_handler())
         return shape_handlers
+    
+    @staticmethod
+    def get_all_collisions():
+        '''
+        @return: all of the pairs of shape handlers (as a list of (shape_handler,shape_handler)) whose shapes
+        are colliding, with each pair appearing once. Each shape is calculated at the precision of its
+        collideable capability.
+        @note: this is much faster than calling get_collisions for every shape handler. The bounding
+        rectangles are compared all at once, and only the pairs whose bounding rectangles collide have
+        their shapes checked.
+        '''
+        #Remember the inner shapes, as they may be needed for several pairs
+        inner_shapes = {}
+        shape_handler_pairs = []
+        for (first_rect,second_rect) in CollisionScreen.__sweep_and_prune.collide_pairs():
+            (x_min,y_min,x_max,y_max,collideable) = first_rect
+            inner_shape = inner_shapes.get(collideable)
+            if inner_shape is None:
+                inner_shape = collideable._get_inner_shape() + (collideable._get_inner_bitmask(),)
+                inner_shapes[collideable] = inner_shape
+            (rect_list,rect_collider,bitmask) = inner_shape
+            if CollisionScreen.__screen.confirm_collision((x_min,y_min,x_max,y_max), rect_list, rect_collider,
+                                                          second_rect, bitmask):
+                shape_handler_pairs.append((collideable.get_shape_handler(),second_rect[4].get_shape_handler()))
+        return shape_handler_pairs
+
+#Each world has its own collision screen
+World.register(CollisionScreen)
 
 class Collideable(Capability):
     '''
@@ -78,18 +253,35 @@ class Collideable(Capability):
     TODO: a lot of the code for the capabilities is the same. Try to factor it out.
     '''
     
-    def __init__(self, shape_handler, precision, enabled=True):
+    def __init__(self, shape_handler, precision, enabled=True, collision_enter_handler=None,
+                 collision_leave_handler=None, use_bitmask=False):
         '''
         @param shape_handler: the shape handler this is concerned with
         @param precision: the precision that collisions with this shape should be calculated at.
         @param enabled: true by default, whether or not the object should be collideable immediately
+        @param collision_enter_handler: None by default, otherwise a function to be called whenever this
+        object starts colliding with another collideable object. Accepts the other shape handler.
+        @param collision_leave_handler: None by default, otherwise a function to be called whenever this
+        object stops colliding with another collideable object. Accepts the other shape handler.
+        @param use_bitmask: false by default, set to true to collide the shape as a bitmask (see Shape.calculate_bitmask)
+        when the other shape has one too. This is pixel perfect at precision 1, and much faster than the
+        inner rectangles for detailed shapes.
+        
+        The collision handlers are called once per frame at most (see CollisionScreen.process_collision_events)
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.__world = World.get_active_world()
         self.__precision = precision
         self.__shape_handler = shape_handler
         self.__enabled = enabled
+        self.__collision_enter_handler = collision_enter_handler
+        self.__collision_leave_handler = collision_leave_handler
+        self.__use_bitmask = use_bitmask
+        #The handle of our rectangle in the screen (while enabled)
+        self.__handle = None
         #Attach myself to the collision screen if I'm enabled.
         if self.__enabled:
-            CollisionScreen._insert_collideable(self)
+            self.__handle = CollisionScreen._insert_collideable(self)
             self.__shape_handler._enable_capability(self)
         
     def get_shape_handler(self):
@@ -108,9 +300,30 @@ class Collideable(Capability):
         '''
         @param precision: the new precision this capability should use.
         '''
+        World.check_active(self.__world)
         self.__precision = precision
-        #Resetting ourselves in the collision screen is unnecessary because it will recalculate at the
-        #precision used at any time.
+        #The rectangles stay where they are (the shape is recalculated at the precision used at any time),
+        #but the collisions need checking again
+        if self.__enabled:
+            CollisionScreen._collideable_changed(self)
+    
+    def _get_collision_enter_handler(self):
+        '''
+        @return: the function designed to handle a collision starting (or None)
+        '''
+        return self.__collision_enter_handler
+    
+    def _get_collision_leave_handler(self):
+        '''
+        @return: the function designed to handle a collision stopping (or None)
+        '''
+        return self.__collision_leave_handler
+    
+    def _is_listening(self):
+        '''
+        @return: true iff this has any collision handlers
+        '''
+        return self.__collision_enter_handler is not None or self.__collision_leave_handler is not None
     
     def _get_bounding_rectangle(self):
         '''
@@ -126,17 +339,24 @@ class Collideable(Capability):
         '''
         return self.__shape_handler.get_shape().calculate_shape(self.__precision)
     
+    def _get_inner_bitmask(self):
+        '''
+        A method to calculate the bitmask for the screen collider
+        @return: the bitmask of the shape, or None if this doesn't use one
+        '''
+        if not self.__use_bitmask:
+            return None
+        return self.__shape_handler.get_shape().calculate_bitmask(self.__precision)
+    
     def prior_update(self, flag):
         '''
         Called strictly before the relevant shape handler updates its state.
         This is a chance for the capability to deregister the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
-        #Only care about this if enabled
-        if self.__enabled:
-            if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                CollisionScreen._remove_collideable(self)
+        World.check_active(self.__world)
+        #Nothing to do - the rectangle is moved after the update using its handle
+        pass
     
     def post_update(self, flag):
         '''
@@ -144,20 +364,22 @@ class Collideable(Capability):
         This is a chance for the capability to register (again) the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
+        World.check_active(self.__world)
         #Only care about this if enabled
         if self.__enabled:
             #The depth is not important for us
             if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                CollisionScreen._insert_collideable(self)
+                #Move to the new bounding rectangle
+                self.__handle = CollisionScreen._move_collideable(self, self.__handle)
     
     def enable(self):
         '''
         Enable this capability
         '''
+        World.check_active(self.__world)
         if not self.__enabled:
             #Attach myself
-            CollisionScreen._insert_collideable(self)
+            self.__handle = CollisionScreen._insert_collideable(self)
             self.__enabled = True
             self.__shape_handler._enable_capability(self)
         
@@ -165,9 +387,11 @@ class Collideable(Capability):
         '''
         Disable this capability
         '''
+        World.check_active(self.__world)
         if self.__enabled:
             #Detach myself
-            CollisionScreen._remove_collideable(self)
+            CollisionScreen._remove_collideable(self, self.__handle)
+            self.__handle = None
             self.__enabled = False
             self.__shape_handler._disable_capability(self)
             
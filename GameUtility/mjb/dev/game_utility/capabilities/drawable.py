@@ -5,6 +5,7 @@ Created on 3 Aug 2014
 '''
 
 from mjb.dev.game_utility.capabilities.capability import Capability
+from mjb.dev.game_utility.world import World
 from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
 
 class Drawable(Capability):
@@ -30,6 +31,8 @@ class Drawable(Capability):
             @param drawable: the drawable capability being added
             '''
             self.__drawable = drawable
+            #The time spent drawing belongs to the shape handler (see the cost tracker)
+            self._cost_owner = drawable.get_shape_handler()
     
         def redraw(self, top_left, surface):
             #Redraw yourself!
@@ -53,6 +56,8 @@ class Drawable(Capability):
         and a pygame surface to draw on.
         @param enabled: true by default, whether or not the object should be drawable immediately
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.__world = World.get_active_world()
         self.__precision = precision
         self.__shape_handler = shape_handler
         self.__enabled = enabled
@@ -79,6 +84,7 @@ class Drawable(Capability):
         '''
         @param precision: the new precision this capability should use.
         '''
+        World.check_active(self.__world)
         self.__precision = precision
         #Resetting ourselves in the collision screen is unnecessary because it will recalculate at the
         #precision used at any time.
@@ -130,6 +136,7 @@ class Drawable(Capability):
         This is a chance for the capability to deregister the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
+        World.check_active(self.__world)
         #Only care about this if enabled
         if self.__enabled:
             #We need to reset...
@@ -141,6 +148,7 @@ class Drawable(Capability):
         This is a chance for the capability to register (again) the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
+        World.check_active(self.__world)
         #Only care about this if enabled
         if self.__enabled:
             PictureHandler.register_drawer(self.__inner_drawer)
@@ -149,6 +157,7 @@ class Drawable(Capability):
         '''
         Enable this capability
         '''
+        World.check_active(self.__world)
         if not self.__enabled:
             #Attach myself
             PictureHandler.register_drawer(self.__inner_drawer)
@@ -159,6 +168,7 @@ class Drawable(Capability):
         '''
         Disable this capability
         '''
+        World.check_active(self.__world)
         if self.__enabled:
             #Detach myself
             PictureHandler.deregister_drawer(self.__inner_drawer)
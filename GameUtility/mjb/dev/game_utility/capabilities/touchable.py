@@ -4,11 +4,12 @@ Created on 3 Aug 2014
 @author: michael
 '''
 
+import collections
 from mjb.dev.game_utility.capabilities.capability import Capability
+from mjb.dev.game_utility.world import World
 from mjb.dev.game_utility.graphics.screen import Screen
 from mjb.dev.game_utility.collisions.screen_collider import ScreenCollider
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree
-from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
 from mjb.dev.game_utility.input_listeners.mouse_motion_listener import MouseMotionListener
 
 class TouchScreen(object):
@@ -28,16 +29,19 @@ class TouchScreen(object):
         but before any user input has been processed (so immediately after more or less).
         '''
         if not TouchScreen.__is_initialised:
+            #The keys are (depth,touchable), so the depth is kept in the screen for the topmost search
             TouchScreen.__screen = ScreenCollider(LargeRectangleTree(Screen.get_screen_size()),
-                                                      lambda (a,b,c,d,collideable): collideable._get_inner_shape())
+                                                      lambda (a,b,c,d,(depth,touchable)): touchable._get_inner_shape(),
+                                                      lambda (a,b,c,d,(depth,touchable)): depth)
             TouchScreen.__is_initialised = True
         TouchScreen._TouchScreenMouseMotionListener()
     #The screen that the collisions are checked on...
     __screen = None
     __is_initialised = False
     
-    #Remember the touchables who believe the mouse is inside them...
-    _touchables_entered = set()
+    #Remember the touchables who believe the mouse is inside them (as the keys, in the order they were entered,
+    #so the enter and leave handlers are called in the same order every run)...
+    _touchables_entered = collections.OrderedDict()
     
     #The mouse motion listener
     class _TouchScreenMouseMotionListener(MouseMotionListener):
@@ -50,41 +54,62 @@ class TouchScreen(object):
         '''
         Insert a collideable object into the screen (should not already exist)
         @param collideable: the collideable object to add to the screen handler
+        @return: the handle of its rectangle in the screen
         '''
-        (x_min,y_min,x_max,y_max) = touchable._get_bounding_rectangle()
-        TouchScreen.__screen.insert_rectangle((x_min,y_min,x_max,y_max,touchable))
+        return TouchScreen._move_touchable(touchable, None)
     
     @staticmethod
-    def _remove_touchable(touchable):
+    def _remove_touchable(handle):
+        '''
+        Remove a touchable object from the screen (must exist)
+        @param handle: the handle returned when the touchable object was inserted
         '''
-        Remove a collideable object from the screen (must exist)
-        @param collideable: the collideable object to remove from the screen handler
+        TouchScreen.__screen.remove_by_handle(handle)
+    
+    @staticmethod
+    def _move_touchable(touchable, handle):
+        '''
+        Move a touchable object in the screen to its current bounding rectangle and depth (must exist)
+        @param touchable: the touchable object to move
+        @param handle: the handle returned when the touchable object was inserted (or last moved)
+        @return: the handle of its rectangle in the screen from now on
         '''
         (x_min,y_min,x_max,y_max) = touchable._get_bounding_rectangle()
-        TouchScreen.__screen.remove_rectangle((x_min,y_min,x_max,y_max,touchable))
+        return TouchScreen.__screen.move_rectangle(handle, (x_min,y_min,x_max,y_max,(touchable._get_depth(),touchable)))
         
     @staticmethod
     def _mouse_moved(location):
         #Collide the mouse at this position with the screen...
-        #Collide the mouse with all objects on the screen...
-        (x_min,y_min) = location
-        touchables = TouchScreen.__screen.collide_rectangle((x_min,y_min,x_min+1,y_min+1), [], None)
-        touchable_set = set()
-        #Update the objects which it (just) entered
-        for (_,_,_,_,touchable) in touchables:
-            touchable_set.add(touchable)
-            if not touchable in TouchScreen._touchables_entered:
+        #The top object and those under it which aren't top only (the shapes of the others aren't checked)
+        (x,y) = location
+        touchables = TouchScreen.__screen.collide_point_topmost(x, y, 1,
+                                                                lambda (a,b,c,d,(depth,touchable)): not touchable.is_top_only())
+        touchable_set = collections.OrderedDict()
+        for (_,_,_,_,(_,touchable)) in touchables:
+            touchable_set[touchable] = None
+        #Those still entered keep their place...
+        touchables_entered = collections.OrderedDict()
+        for touchable in TouchScreen._touchables_entered:
+            if touchable in touchable_set:
+                touchables_entered[touchable] = None
+        #...then update the objects which it (just) entered
+        for touchable in touchable_set:
+            if not touchable in touchables_entered:
+                touchables_entered[touchable] = None
                 (touchable._get_mouse_enter_handler())()
         #Update the objects which it left
         for touchable in TouchScreen._touchables_entered:
             if not touchable in touchable_set:
                 (touchable._get_mouse_leave_handler())()
-        TouchScreen._touchables_entered = touchable_set
+        TouchScreen._touchables_entered = touchables_entered
+
+#Each world has its own touch screen
+World.register(TouchScreen)
 
 def get_entered_shape_handlers():
     '''
-    @return: a set of all shape handlers which the mouse is currently considered to have entered.
-    You should not modify this set.
+    @return: an ordered dictionary whose keys are all the touchable objects which the mouse is currently considered
+    to have entered (in the order they were entered). You should not modify this.
     '''
     return TouchScreen._touchables_entered
 
@@ -96,7 +121,7 @@ class Touchable(Capability):
     TODO: a lot of the code for the capabilities is the same. Try to factor it out.
     '''
     
-    def __init__(self, shape_handler, precision, mouse_enter_handler, mouse_leave_handler, enabled=True):
+    def __init__(self, shape_handler, precision, mouse_enter_handler, mouse_leave_handler, enabled=True, top_only=False):
         '''
         @param shape_handler: the shape handler this is concerned with
         @param precision: the precision that collisions with this shape should be calculated at.
@@ -104,21 +129,26 @@ class Touchable(Capability):
         Accepts no arguments.
         @param mouse_leave_handler: a function to be called whenever the mouse leaves this object.
         Accepts no arguments
+        @param enabled: true by default, whether or not the object should be collideable immediately
         @param top_only: false by default, set to true iff you only want the events to be handled when
         it affects the top most element that is touchable.*
-        @param enabled: true by default, whether or not the object should be collideable immediately
         
         *If an element is not touchable, it will never be considered on top. Hence, to block a mouse enter
         or leave event, you would need to cover it with a touchable shape and swallow the events.
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.__world = World.get_active_world()
         self.__precision = precision
         self.__shape_handler = shape_handler
         self.__enabled = enabled
+        self.__top_only = top_only
+        #The handle of our rectangle in the screen (while enabled)
+        self.__handle = None
         self.__mouse_enter_handler = mouse_enter_handler
         self.__mouse_leave_handler = mouse_leave_handler
         #Attach myself to the collision screen if I'm enabled.
         if self.__enabled:
-            TouchScreen._insert_touchable(self)
+            self.__handle = TouchScreen._insert_touchable(self)
             self.__shape_handler._enable_capability(self)
         
     def get_shape_handler(self):
@@ -137,10 +167,17 @@ class Touchable(Capability):
         '''
         @param precision: the new precision this capability should use.
         '''
+        World.check_active(self.__world)
         self.__precision = precision
         #Resetting ourselves in the collision screen is unnecessary because it will recalculate at the
         #precision used at any time.
     
+    def is_top_only(self):
+        '''
+        @return: true iff the events are only handled when this is the top element touched
+        '''
+        return self.__top_only
+    
     def _get_mouse_enter_handler(self):
         '''
         @return: the function designed to handle the mouse entering
@@ -180,11 +217,9 @@ class Touchable(Capability):
         This is a chance for the capability to deregister the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
-        #Only care about this if enabled
-        if self.__enabled:
-            if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                TouchScreen._remove_touchable(self)
+        World.check_active(self.__world)
+        #Nothing to do - the rectangle is moved after the update using its handle
+        pass
     
     def post_update(self, flag):
         '''
@@ -192,20 +227,20 @@ class Touchable(Capability):
         This is a chance for the capability to register (again) the handler where appropriate.
         @param flag: a flag stating what is updating (constants held in the shape handler)
         '''
+        World.check_active(self.__world)
         #Only care about this if enabled
         if self.__enabled:
-            #The depth is not important for us
-            if flag!=ShapeHandler._DEPTH_UPDATE:
-                #We need to reset...
-                TouchScreen._insert_touchable(self)
+            #Move to the new bounding rectangle (or depth, which is kept in the screen too)
+            self.__handle = TouchScreen._move_touchable(self, self.__handle)
     
     def enable(self):
         '''
         Enable this capability
         '''
+        World.check_active(self.__world)
         if not self.__enabled:
             #Attach myself
-            TouchScreen._insert_touchable(self)
+            self.__handle = TouchScreen._insert_touchable(self)
             self.__enabled = True
             self.__shape_handler._enable_capability(self)
         
@@ -213,9 +248,11 @@ class Touchable(Capability):
         '''
         Disable this capability
         '''
+        World.check_active(self.__world)
         if self.__enabled:
             #Detach myself
-            TouchScreen._remove_touchable(self)
+            TouchScreen._remove_touchable(self.__handle)
+            self.__handle = None
             self.__enabled = False
             self.__shape_handler._disable_capability(self)
             
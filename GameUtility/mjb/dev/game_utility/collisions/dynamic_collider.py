@@ -5,73 +5,240 @@ Created on 26 Aug 2014
 '''
 
 import collections
+import math
+from mjb.dev.game_utility.utility.extra_maths import are_rotated_rectangles_colliding
+
+class _DynamicHandle(object):
+    '''
+    The entry stored in the dynamic collider for each rectangle. This is also the handle returned
+    when the rectangle is inserted.
+    '''
+    __slots__ = ["angled_rect", "bounds", "cells"]
+
+    def __init__(self, angled_rect, bounds, cells):
+        '''
+        @param angled_rect: the rectangle as inserted
+        @param bounds: the axis aligned bounding box of the rectangle as (x_min,y_min,x_max,y_max)
+        @param cells: the range of cells the bounding box covers as (i_min,j_min,i_max,j_max) (inclusive)
+        '''
+        self.angled_rect = angled_rect
+        self.bounds = bounds
+        self.cells = cells
 
 class DynamicCollider(object):
     '''
     This class is designed to act as a rectangle collider. It will use the new angled and scaled
     rectangles in its construction, and will grow dynamically.
-    
-    The growth is not entirely memory free. A new index will be added every 120 pixels any object shifts
-    in the outer 4 indices.
-    A set will exist for each level of recursion in these outer 4, specifying the indices that are occupied.
-    Then, during a range search, you will only search among these indices.
-    
-    The "infinite" (as much as memory permits) range will be implemented using a defaultdict (shared between
-    levels). The set will make range traversal feasible, and this ensures the memory consumed
-    is linear in the number of items added.
-    
-    Note: if the default dict is not fast enough, a list will probably work quickly enough
-    in practice.
+
+    By angled rectangle, we mean a tuple of the form:
+    (centre, half_size, angle, key)
+
+    where centre is (x,y), half_size is (half_width,half_height) and the angle is the anti-clockwise rotation
+    about the centre in radians (see extra_maths). The key is arbitrary and for the user only.
+
+    The plane is divided into square cells, with a new index every 120 pixels in each direction. Each rectangle
+    is added to every cell its bounding box covers. Only the occupied cells are kept (in a dictionary from
+    the cell's indices), so the space is "infinite" (as much as memory permits) and the memory consumed
+    is linear in the number of items added. A range search looks in the cells the range covers, or among
+    the occupied cells if there are fewer of those.
+
+    The bounding boxes are checked before the (more expensive) check for whether the angled rectangles
+    really are colliding.
     '''
 
+    '''
+    The width and height of each cell in pixels
+    '''
+    CELL_SIZE = 120
+
     def __init__(self):
         '''
         Construct a new dynamic collider! Note that there are no parameters!
         '''
-        #The base default dict. It is really just one for better performance
-        #NOTE: is this really better? Might slow down individual look ups... It's a dynamic hash table...
-        #shouldn't gget too much worse...
-        self.root = collections.defaultdict(lambda:[])
-    
+        #The occupied cells, from (i,j) to the handles in that cell (an ordered dictionary to None)
+        self.__cells = {}
+
     def insert_rectangle(self, angled_rect):
         '''
         Insert an angled rectangle into the collider.
-        @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
+        Note that if a rectangle is added twice, it will be included twice.
+        @param angled_rect: the rectangle to insert, which should have the form (centre,half_size,angle,key)
         where key is any custom value
+        @return: a handle for the rectangle
         '''
-        pass
-    
+        bounds = DynamicCollider.__get_bounds(angled_rect)
+        handle = _DynamicHandle(angled_rect, bounds, DynamicCollider.__get_cells(bounds))
+        self.__add_handle(handle)
+        return handle
+
     def remove_rectangle(self, angled_rect):
         '''
         Remove an angled rectangle from the collider. Note that the key must also be equal
         to the key of the rectangle you wish to remove.
-        @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
+        @param angled_rect: the rectangle to remove, which should have the form (centre,half_size,angle,key)
         where key is any custom value
-        @return: true iff the rectangle was removed, since it was in the tree
+        @return: true iff the rectangle was removed, since it was in the collider
+        '''
+        (i_min,j_min,_,_) = DynamicCollider.__get_cells(DynamicCollider.__get_bounds(angled_rect))
+        #The rectangle must be in its first cell if it is anywhere
+        for handle in self.__cells.get((i_min,j_min),()):
+            if handle.angled_rect==angled_rect:
+                return self.remove_by_handle(handle)
+        return False
+
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the collider using the handle returned when it was inserted.
+        @param handle: the handle of the rectangle to remove
+        @return: true iff the rectangle was removed, since it was in the collider
+        '''
+        if handle is None or handle.cells is None:
+            return False
+        self.__remove_handle(handle)
+        handle.cells = None
+        return True
+
+    def move_rectangle(self, handle, new_angled_rect):
+        '''
+        Replace a rectangle in the collider with another (usually the same rectangle in a new position).
+        The cells are only updated if the new rectangle covers different cells.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_angled_rect: the new rectangle in the form (centre,half_size,angle,key)
+        @return: the handle to use for the rectangle from now on
         '''
-        pass
-    
+        if handle is None or handle.cells is None:
+            return self.insert_rectangle(new_angled_rect)
+        bounds = DynamicCollider.__get_bounds(new_angled_rect)
+        cells = DynamicCollider.__get_cells(bounds)
+        if cells!=handle.cells:
+            self.__remove_handle(handle)
+            handle.cells = cells
+            self.__add_handle(handle)
+        handle.angled_rect = new_angled_rect
+        handle.bounds = bounds
+        return handle
+
     def collide_rectangle(self, angled_rect, touching=False):
         '''
         Collide an angled rectangle with all rectangles in the collider
-        @param rect: the rectangle to collide against in the form of (x_min,y_min,x_max,y_max)
+        @param angled_rect: the rectangle to collide against in the form of (centre,half_size,angle)
+        (anything after the angle is ignored)
         @param touching: False by default. If True, returns rectangles which are only touching as well.
         @return: a list of all rectangles that collided with the given rectangle.
         '''
-        pass
-    
+        res = []
+        self.__collide_rectangle(angled_rect, touching, res)
+        return res
+
     def is_colliding(self, angled_rect, touching=False):
         '''
         Check if an angled rectangle is colliding with any rectangle inserted into the collider.
         (This is more efficient than using collide_rectangle(..)==[])
-        @param rect: the rectangle to check for collisions with in the form of (x_min,y_min,x_max,y_max)
+        @param angled_rect: the rectangle to check for collisions with in the form of (centre,half_size,angle)
+        (anything after the angle is ignored)
         @param touching: False by default. If True, returns true if a rectangle is only touching as well.
         @return: true iff some rectangle exists in the collider that is colliding
         '''
-        pass
-    
+        return self.__collide_rectangle(angled_rect, touching, None)
+
+    def __collide_rectangle(self, angled_rect, touching, res):
+        '''
+        The search shared by collide_rectangle and is_colliding
+        @param angled_rect: the rectangle to collide against
+        @param touching: whether or not touching rectangles count as colliding
+        @param res: the list to add the colliding rectangles to, or None to stop at the first one
+        @return: true iff some rectangle was found to be colliding
+        '''
+        (x_min,y_min,x_max,y_max) = DynamicCollider.__get_bounds(angled_rect)
+        #Allow for rounding in the narrow phase when checking the bounding boxes
+        error = 0.0000001
+        (i_min,j_min,i_max,j_max) = DynamicCollider.__get_cells((x_min-error,y_min-error,x_max+error,y_max+error))
+        found = False
+        for (i,j) in self.__get_occupied_cells(i_min,j_min,i_max,j_max):
+            for handle in self.__cells[(i,j)]:
+                (cell_i_min,cell_j_min,_,_) = handle.cells
+                #Only look at each rectangle in one cell (the first cell it shares with the range)
+                if i!=max(i_min,cell_i_min) or j!=max(j_min,cell_j_min):
+                    continue
+                (rect_x_min,rect_y_min,rect_x_max,rect_y_max) = handle.bounds
+                if (rect_x_min>x_max+error or rect_x_max<x_min-error or
+                    rect_y_min>y_max+error or rect_y_max<y_min-error):
+                    continue
+                if are_rotated_rectangles_colliding(angled_rect, handle.angled_rect, touching):
+                    if res is None:
+                        return True
+                    res.append(handle.angled_rect)
+                    found = True
+        return found
+
+    def __get_occupied_cells(self, i_min, j_min, i_max, j_max):
+        '''
+        @return: the occupied cells in the given (inclusive) range of cells
+        '''
+        if (i_max-i_min+1)*(j_max-j_min+1)<=len(self.__cells):
+            cells = self.__cells
+            return [(i,j) for i in range(i_min,i_max+1) for j in range(j_min,j_max+1) if (i,j) in cells]
+        #The range is larger than the occupied space, so search that instead
+        return [(i,j) for (i,j) in self.__cells if i>=i_min and i<=i_max and j>=j_min and j<=j_max]
+
+    def __add_handle(self, handle):
+        '''
+        Add a handle to all of its cells
+        @param handle: the handle to add
+        '''
+        (i_min,j_min,i_max,j_max) = handle.cells
+        cells = self.__cells
+        for i in range(i_min,i_max+1):
+            for j in range(j_min,j_max+1):
+                cell = cells.get((i,j))
+                if cell is None:
+                    cell = collections.OrderedDict()
+                    cells[(i,j)] = cell
+                cell[handle] = None
+
+    def __remove_handle(self, handle):
+        '''
+        Remove a handle from all of its cells, forgetting the cells which become empty.
+        @param handle: the handle to remove
+        '''
+        (i_min,j_min,i_max,j_max) = handle.cells
+        cells = self.__cells
+        for i in range(i_min,i_max+1):
+            for j in range(j_min,j_max+1):
+                cell = cells.get((i,j))
+                if cell is not None:
+                    cell.pop(handle,None)
+                    if not cell:
+                        del cells[(i,j)]
+
+    @staticmethod
+    def __get_bounds(angled_rect):
+        '''
+        @param angled_rect: the angled rectangle (centre,half_size,angle,...)
+        @return: the axis aligned bounding box of the rectangle as (x_min,y_min,x_max,y_max)
+        '''
+        ((x,y),(half_width,half_height),angle) = angled_rect[0:3]
+        cos_a = abs(math.cos(angle))
+        sin_a = abs(math.sin(angle))
+        x_extent = half_width*cos_a + half_height*sin_a
+        y_extent = half_width*sin_a + half_height*cos_a
+        return (x-x_extent,y-y_extent,x+x_extent,y+y_extent)
+
+    @staticmethod
+    def __get_cells(bounds):
+        '''
+        @param bounds: a bounding box as (x_min,y_min,x_max,y_max)
+        @return: the (inclusive) range of cells it covers as (i_min,j_min,i_max,j_max)
+        '''
+        (x_min,y_min,x_max,y_max) = bounds
+        size = float(DynamicCollider.CELL_SIZE)
+        return (int(math.floor(x_min/size)),
+                int(math.floor(y_min/size)),
+                int(math.floor(x_max/size)),
+                int(math.floor(y_max/size)))
+
     def clear(self):
         '''
         Remove all rectangles from the collider
         '''
-        pass
+        self.__cells = {}
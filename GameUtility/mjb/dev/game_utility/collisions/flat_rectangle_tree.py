@@ -0,0 +1,618 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import array
+import mjb.dev.game_utility.collisions.rectangle_collider as collider
+
+class FlatRectangleTree(collider.RectangleCollider):
+    '''
+    This is the same rectangle tree as the small and large rectangle trees, but with a different storage
+    engine. Rather than nested lists, the nodes live in flat integer arrays indexed by a node id, and the
+    rectangles in the leaves live in parallel coordinate columns (also indexed by an id) with a key table
+    holding the rectangles exactly as they were inserted.
+
+    By rectangle, we actually mean a tuple of the form:
+    (x_min, y_min, x_max, y_max, key)
+
+    where the key is arbitrary and for the user only.
+
+    The number of levels decides how finely the screen is divided. With one level, the screen is
+    divided into 4 * 4 pieces like the small rectangle tree. With two levels, it is divided into 16 * 16 pieces
+    like the large rectangle tree.
+
+    The storage:
+    - Node n owns the 4 entries from 4*n in the children array, one for each quadrant. An entry of 0 is empty
+    (the root is node 0, which is never anybody's child). Otherwise it is the id of the child node, or for
+    the last dimension, 1 + the id of the first rectangle in the leaf.
+    - The counts array holds the number of non-empty children of each node.
+    - The rectangles in a leaf form a doubly linked list through the next and prev arrays (1 + the id, or 0
+    for none). The leaf array remembers which children entry holds the head of the list.
+    - Unused nodes and rectangles are chained into free lists (through the children and next arrays), so
+    inserting and removing rectangles reuses the same storage rather than allocating.
+
+    The arrays only ever grow. Clearing the tree just forgets where the tops of the arrays are, and
+    entries are reinitialised when they are handed out again.
+
+    A handle is (id,stamp), where the stamp is given out afresh each time a rectangle is stored in a slot,
+    so that handles to a slot which has since been reused (after removing or clearing) are not used.
+    '''
+
+    '''
+    The number of ways each level divides the screen along each axis
+    '''
+    DIVISIONS = 4
+
+    def __init__(self, size, levels=2):
+        '''
+        Construct a new rectangle tree, designed to cover coordinates ranging from (0,0) to (x,y) for
+        (x,y) = size.
+        @param size: the size of the space spanned by the rectangle tree
+        @param levels: how many levels of 4 * 4 divisions to use (default 2, like the large rectangle tree)
+        @raise ValueError: if the screen size is not at least 4**levels pixels wide and tall.
+        '''
+        (width,height) = size
+        self.__width = width
+        self.__height = height
+        self.__levels = levels
+        self.__dims = 4 * levels
+        min_size = FlatRectangleTree.DIVISIONS ** levels
+        if levels<1 or self.__width<min_size or self.__height<min_size:
+            raise ValueError("Flat rectangle tree with " + str(levels) + " levels cannot be applied to a screen less than " +
+                             str(min_size) + " pixels tall or " + str(min_size) + " pixels wide.")
+        #Work out the coordinates of each pixel at every level
+        (self.__x_cells,self.__x_coordinates) = FlatRectangleTree.__divide_axis(self.__width, levels)
+        (self.__y_cells,self.__y_coordinates) = FlatRectangleTree.__divide_axis(self.__height, levels)
+        #The node storage (the root only to begin with)
+        self.__children = array.array('i', [0] * 4)
+        self.__counts = array.array('i', [0])
+        self.__node_top = 1
+        self.__free_node = 0
+        #The rectangle storage (empty to begin with)
+        self.__x_min = array.array('i')
+        self.__y_min = array.array('i')
+        self.__x_max = array.array('i')
+        self.__y_max = array.array('i')
+        self.__next = array.array('i')
+        self.__prev = array.array('i')
+        self.__leaf = array.array('i')
+        self.__keys = []
+        #The stamp of the rectangle in each slot, and the next stamp to give out
+        self.__stamps = []
+        self.__next_stamp = 0
+        self.__rect_top = 0
+        self.__free_rect = 0
+
+    @staticmethod
+    def __divide_axis(length, levels):
+        '''
+        Divide an axis up into 4**levels pieces in the same way as the large rectangle tree.
+        @param length: the length of the axis
+        @param levels: the number of levels
+        @return: a pair (cells,coordinates). Cells is a list of the piece every pixel from 0 to length is in.
+        Coordinates is a list with an entry for each level, each being a list of the coordinate (0 to 3) of every
+        pixel at that level.
+        '''
+        pieces = FlatRectangleTree.DIVISIONS ** levels
+        division = length / pieces
+        dividers = []
+        for i in range(0,pieces):
+            dividers.append(i * division)
+        for i in range(0,length % pieces): #the remainder
+            dividers[pieces-1-i] = dividers[pieces-1-i] + (length % pieces) - i
+        dividers.append(length+1) #plus one because we consider being >= to be in the sector
+        #Find the piece of each pixel...
+        cells = []
+        current_cell = 0
+        for i in range(0,length+1):
+            if i>=dividers[current_cell+1]:
+                current_cell+=1
+            cells.append(current_cell)
+        #...and split it up by level
+        coordinates = []
+        for level in range(0,levels):
+            shift = 2 * (levels - 1 - level)
+            coordinates.append([(cell >> shift) & 3 for cell in cells])
+        return (cells,coordinates)
+
+    def __get_coordinate(self, rect, dim):
+        '''
+        @param rect: the rectangle (x_min,y_min,x_max,y_max,...) whose coordinates you would like
+        @param dim: the dimension (0 being the first)
+        @return: the relevant coordinate (0 to 3)
+        '''
+        level = dim / 4
+        dim = dim % 4
+        if dim==0:
+            return self.__x_coordinates[level][rect[0]]
+        if dim==1:
+            return self.__x_coordinates[level][rect[2]]
+        if dim==2:
+            return self.__y_coordinates[level][rect[1]]
+        return self.__y_coordinates[level][rect[3]]
+
+    def __allocate_node(self):
+        '''
+        @return: the id of a fresh empty node
+        '''
+        node = self.__free_node
+        if node!=0:
+            #Reuse a freed node (the free list is chained through the first child entry)
+            self.__free_node = self.__children[node*4]
+        else:
+            node = self.__node_top
+            self.__node_top+=1
+            if node==len(self.__counts):
+                #Grow the arrays (doubling them)
+                self.__children.extend(array.array('i', [0]) * len(self.__children))
+                self.__counts.extend(array.array('i', [0]) * len(self.__counts))
+        #Reinitialise it (it may be stale after a clear)
+        base = node*4
+        self.__children[base] = 0
+        self.__children[base+1] = 0
+        self.__children[base+2] = 0
+        self.__children[base+3] = 0
+        self.__counts[node] = 0
+        return node
+
+    def __free_node_id(self, node):
+        '''
+        Put a node back on the free list
+        @param node: the node to free
+        '''
+        self.__children[node*4] = self.__free_node
+        self.__free_node = node
+
+    def __allocate_rect(self, rect, clipped_rect):
+        '''
+        @param rect: the rectangle as inserted
+        @param clipped_rect: the rectangle clipped to the screen as (x_min,y_min,x_max,y_max)
+        @return: the id of a slot holding the rectangle (not yet in a leaf)
+        '''
+        slot = self.__free_rect
+        if slot!=0:
+            #Reuse a freed slot (1 + the id, chained through the next array)
+            slot-=1
+            self.__free_rect = self.__next[slot]
+        else:
+            slot = self.__rect_top
+            self.__rect_top+=1
+            if slot==len(self.__x_min):
+                #Grow the columns (doubling them)
+                extra = array.array('i', [0]) * max(len(self.__x_min),16)
+                self.__x_min.extend(extra)
+                self.__y_min.extend(extra)
+                self.__x_max.extend(extra)
+                self.__y_max.extend(extra)
+                self.__next.extend(extra)
+                self.__prev.extend(extra)
+                self.__leaf.extend(extra)
+        (x_min,y_min,x_max,y_max) = clipped_rect
+        self.__x_min[slot] = x_min
+        self.__y_min[slot] = y_min
+        self.__x_max[slot] = x_max
+        self.__y_max[slot] = y_max
+        if slot<len(self.__keys):
+            self.__keys[slot] = rect
+        else:
+            self.__keys.append(rect)
+        if slot<len(self.__stamps):
+            self.__stamps[slot] = self.__next_stamp
+        else:
+            self.__stamps.append(self.__next_stamp)
+        self.__next_stamp+=1
+        return slot
+
+    def __free_rect_id(self, slot):
+        '''
+        Put a rectangle slot back on the free list
+        @param slot: the slot to free
+        '''
+        self.__keys[slot] = None
+        self.__next[slot] = self.__free_rect
+        self.__free_rect = slot+1
+
+    def insert_rectangle(self, rect):
+        '''
+        This adds a rectangle to the tree. Note that if the rectangle falls outside
+        the size of the grid, it will effectively be clipped. The call will then have no effect
+        if the whole of the rectangle lies outside the grid.
+        Note that if a rectangle is added twice, it will be included twice (and must be removed twice
+        if you understand what I mean)
+        @param rect: the rectangle to add to the rectangle tree
+        @return: a handle for the rectangle (its id and stamp), or None if the rectangle was ignored (for being off
+        the screen)
+        '''
+        #Check if it is inside the screen
+        if not self.__is_inside_screen(rect):
+            return None
+        slot = self.__allocate_rect(rect, self.__convert_rect(rect))
+        self.__link_rect(slot)
+        return (slot,self.__stamps[slot])
+    
+    def __link_rect(self, slot):
+        '''
+        Add a rectangle to the leaf it belongs in, constructing nodes as necessary.
+        @param slot: the id of the rectangle (with its clipped coordinates set)
+        '''
+        clipped_rect = (self.__x_min[slot],self.__y_min[slot],self.__x_max[slot],self.__y_max[slot])
+        #Walk down, constructing nodes as necessary
+        children = self.__children
+        node = 0
+        for dim in range(0,self.__dims-1):
+            entry = node*4 + self.__get_coordinate(clipped_rect, dim)
+            child = children[entry]
+            if child==0:
+                child = self.__allocate_node()
+                #(The arrays may have been replaced while growing)
+                children = self.__children
+                children[entry] = child
+                self.__counts[node]+=1
+            node = child
+        #Final one... push the rectangle onto the front of the leaf
+        entry = node*4 + self.__get_coordinate(clipped_rect, self.__dims-1)
+        head = self.__children[entry]
+        if head==0:
+            self.__counts[node]+=1
+        else:
+            self.__prev[head-1] = slot+1
+        self.__next[slot] = head
+        self.__prev[slot] = 0
+        self.__leaf[slot] = entry
+        self.__children[entry] = slot+1
+
+    def remove_rectangle(self, rect):
+        '''
+        Remove a rectangle from the tree. This has no effect if the exact rectangle given does not exist in the
+        tree.
+        @param rect: the rectangle to remove from the tree.
+        @return: true iff the rectangle was removed, since it was in the tree
+        '''
+        #Check if it is inside the screen
+        if not self.__is_inside_screen(rect):
+            return False
+        clipped_rect = self.__convert_rect(rect)
+        #Find the leaf the rectangle should be in
+        children = self.__children
+        node = 0
+        for dim in range(0,self.__dims-1):
+            node = children[node*4 + self.__get_coordinate(clipped_rect, dim)]
+            if node==0:
+                return False #does not exist
+        entry = node*4 + self.__get_coordinate(clipped_rect, self.__dims-1)
+        #Search the leaf
+        keys = self.__keys
+        next_slot = self.__next
+        slot = children[entry]-1
+        while slot>=0:
+            if keys[slot]==rect:
+                self.__unlink_rect(slot)
+                self.__free_rect_id(slot)
+                return True
+            slot = next_slot[slot]-1
+        return False
+
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the tree using the handle returned when it was inserted. The rectangle
+        is unlinked from its leaf directly, so this does not search the leaf.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the tree
+        '''
+        if not self.__is_current(handle):
+            return False
+        slot = handle[0]
+        self.__unlink_rect(slot)
+        self.__free_rect_id(slot)
+        return True
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the tree with another (usually the same rectangle in a new position).
+        If the new rectangle belongs in the same leaf as the old one, it is updated in place. Otherwise
+        it is moved to its new leaf.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        if not self.__is_current(handle):
+            return self.insert_rectangle(new_rect)
+        if not self.__is_inside_screen(new_rect):
+            self.remove_by_handle(handle)
+            return None
+        (x_min,y_min,x_max,y_max) = self.__convert_rect(new_rect)
+        slot = handle[0]
+        x_cells = self.__x_cells
+        y_cells = self.__y_cells
+        same_leaf = (x_cells[x_min]==x_cells[self.__x_min[slot]] and
+                     x_cells[x_max]==x_cells[self.__x_max[slot]] and
+                     y_cells[y_min]==y_cells[self.__y_min[slot]] and
+                     y_cells[y_max]==y_cells[self.__y_max[slot]])
+        if not same_leaf:
+            self.__unlink_rect(slot)
+        self.__x_min[slot] = x_min
+        self.__y_min[slot] = y_min
+        self.__x_max[slot] = x_max
+        self.__y_max[slot] = y_max
+        self.__keys[slot] = new_rect
+        if not same_leaf:
+            self.__link_rect(slot)
+        return handle
+    
+    def __is_current(self, handle):
+        '''
+        @param handle: a handle returned by insert_rectangle (or None)
+        @return: true iff the handle's rectangle is still in the tree
+        '''
+        if handle is None:
+            return False
+        (slot,stamp) = handle
+        return slot<len(self.__keys) and self.__keys[slot] is not None and self.__stamps[slot]==stamp
+
+    def __unlink_rect(self, slot):
+        '''
+        Remove a rectangle from its leaf, removing any nodes that become empty as a result.
+        @param slot: the id of the rectangle to remove
+        '''
+        prev_slot = self.__prev[slot]
+        next_slot = self.__next[slot]
+        if next_slot!=0:
+            self.__prev[next_slot-1] = prev_slot
+        if prev_slot!=0:
+            self.__next[prev_slot-1] = next_slot
+            return
+        #This was the head of the leaf
+        entry = self.__leaf[slot]
+        self.__children[entry] = next_slot
+        if next_slot!=0:
+            return
+        #The leaf is empty, so we need to correct for the removal all the way up...
+        clipped_rect = (self.__x_min[slot],self.__y_min[slot],self.__x_max[slot],self.__y_max[slot])
+        node_stack = [0]
+        for dim in range(0,self.__dims-1):
+            node_stack.append(self.__children[node_stack[-1]*4 + self.__get_coordinate(clipped_rect, dim)])
+        dim = self.__dims-1
+        while dim>=0:
+            node = node_stack[dim]
+            self.__counts[node]-=1
+            if self.__counts[node]!=0 or node==0:
+                #The root is allowed to be empty
+                return
+            self.__free_node_id(node)
+            #Remove it from its parent too
+            dim-=1
+            self.__children[node_stack[dim]*4 + self.__get_coordinate(clipped_rect, dim)] = 0
+
+    def collide_rectangle(self, rect):
+        '''
+        @param rect: the rectangle to check for collisions against.
+        @return: all of the rectangles strictly colliding (overlapping by at least one pixel) with the given rect.
+        '''
+        (x_min,y_min,x_max,y_max) = rect
+        #Check if it is inside the screen
+        if not self.__is_inside_screen((x_min,y_min,x_max,y_max,None)):
+            return []
+        #Convert the rectangle, reversed for rectangle hunting
+        (x_min,y_min,x_max,y_max) = self.__convert_rect((x_min,y_min,x_max,y_max,None))
+        res = []
+        self.__collide_rectangle((x_max,y_max,x_min,y_min), 0, 0, res, False)
+        return res
+
+    def is_colliding(self, rect):
+        '''
+        @param rect: the rectangle to check for collisions against.
+        @return: true iff there is some rectangle in the tree that the given rectangle is colliding against.
+        (Will stop when it finds one)
+        '''
+        (x_min,y_min,x_max,y_max) = rect
+        #Check if it is inside the screen
+        if not self.__is_inside_screen((x_min,y_min,x_max,y_max,None)):
+            return False
+        #Convert the rectangle, reversed for rectangle hunting
+        (x_min,y_min,x_max,y_max) = self.__convert_rect((x_min,y_min,x_max,y_max,None))
+        return self.__collide_rectangle((x_max,y_max,x_min,y_min), 0, 0, None, True)
+
+    def collide_point(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: all of the rectangles containing the point, so colliding with the rectangle (x,y,x+1,y+1).
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return []
+        res = []
+        x_cell = self.__x_cells[x]
+        y_cell = self.__y_cells[y]
+        self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), 0, 0, res)
+        return res
+    
+    def is_point_colliding(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff some rectangle in the tree contains the point (Will stop when it finds one)
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return False
+        x_cell = self.__x_cells[x]
+        y_cell = self.__y_cells[y]
+        return self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), 0, 0, None)
+    
+    def __collide_point(self, x, y, cells, node, dim, res):
+        '''
+        The point version of __collide_rectangle (see the large rectangle tree).
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @param cells: the cells (x_min,x_max,y_min,y_max) to look in
+        @param node: the node to search
+        @param dim: the dimension of the node
+        @param res: the list to add the rectangles containing the point to, or None to stop at the first one
+        @return: true iff some rectangle (within this part of the tree) contains the point
+        '''
+        children = self.__children
+        base = node*4
+        coordinate = dim%4
+        coord = (cells[coordinate] >> (2 * (self.__levels - 1 - dim/4))) & 3
+        if dim % 2 == 0:
+            #This is a min coordinate, so we also look in all the quadrants less than it
+            quadrants = range(0,coord+1)
+            free_cell = FlatRectangleTree.DIVISIONS ** self.__levels - 1
+        else:
+            #This is a max coordinate, so we also look in all the quadrants greater than it
+            quadrants = range(coord,4)
+            free_cell = 0
+        if dim==self.__dims-1:
+            #These are leaves!
+            found = False
+            rect_x_min = self.__x_min
+            rect_y_min = self.__y_min
+            rect_x_max = self.__x_max
+            rect_y_max = self.__y_max
+            next_slot = self.__next
+            for quadrant in quadrants:
+                slot = children[base+quadrant]-1
+                while slot>=0:
+                    if rect_x_min[slot]<=x and rect_x_max[slot]>x and rect_y_min[slot]<=y and rect_y_max[slot]>y:
+                        if res is None:
+                            return True
+                        res.append(self.__keys[slot])
+                        found = True
+                    slot = next_slot[slot]-1
+            return found
+        found = False
+        new_cells = None
+        for quadrant in quadrants:
+            child = children[base+quadrant]
+            if child==0:
+                continue
+            if quadrant==coord:
+                child_cells = cells
+            else:
+                #Once in another quadrant, this coordinate is no longer a restriction
+                if new_cells is None:
+                    new_cells = list(cells)
+                    new_cells[coordinate] = free_cell
+                child_cells = new_cells
+            if self.__collide_point(x, y, child_cells, child, dim+1, res):
+                found = True
+                if res is None:
+                    return True
+        return found
+
+    def __collide_rectangle(self, coord_rect, node, dim, res, first_only):
+        '''
+        The search shared by collide_rectangle and is_colliding (see the large rectangle tree)
+        @param coord_rect: the rectangle with its coordinate representation (x_max,y_max,x_min,y_min)
+        @param node: the node to search
+        @param dim: the dimension of the node
+        @param res: the list to add the colliding rectangles to (unused if first_only)
+        @param first_only: true iff the search should stop at the first colliding rectangle
+        @return: true iff some rectangle was found to be colliding
+        '''
+        (x_max, y_max, x_min, y_min) = coord_rect
+        children = self.__children
+        base = node*4
+        coord = self.__get_coordinate(coord_rect, dim)
+        if dim==self.__dims-1:
+            #These are leaves! Quadrants are visited just as in the other dimensions.
+            if dim % 2 == 0:
+                quadrants = range(0,coord+1)
+            else:
+                quadrants = range(coord,4)
+            found = False
+            rect_x_min = self.__x_min
+            rect_y_min = self.__y_min
+            rect_x_max = self.__x_max
+            rect_y_max = self.__y_max
+            next_slot = self.__next
+            keys = self.__keys
+            for quadrant in quadrants:
+                slot = children[base+quadrant]-1
+                while slot>=0:
+                    if (rect_x_min[slot]<x_max and rect_x_max[slot]>x_min and
+                        rect_y_min[slot]<y_max and rect_y_max[slot]>y_min):
+                        if first_only:
+                            return True
+                        res.append(keys[slot])
+                        found = True
+                    slot = next_slot[slot]-1
+            return found
+        found = False
+        if dim % 2 == 0:
+            #This is a min coordinate. We look in our quadrant, and unconditionally in quadrants less than it
+            child = children[base+coord]
+            if child!=0:
+                found = self.__collide_rectangle(coord_rect, child, dim+1, res, first_only)
+                if found and first_only:
+                    return True
+            if coord>0:
+                #We change the coordinates so that we intersect against all the other rectangles
+                if dim%4==0:
+                    new_rect = (self.__width, y_max, x_min, y_min)
+                else:
+                    new_rect = (x_max, self.__height, x_min, y_min)
+                for quadrant in range(0,coord):
+                    child = children[base+quadrant]
+                    if child!=0 and self.__collide_rectangle(new_rect, child, dim+1, res, first_only):
+                        found = True
+                        if first_only:
+                            return True
+        else:
+            #This is a max coordinate, so we need rectangles whose max coordinate is any greater than our min.
+            child = children[base+coord]
+            if child!=0:
+                found = self.__collide_rectangle(coord_rect, child, dim+1, res, first_only)
+                if found and first_only:
+                    return True
+            if coord<3:
+                if dim%4==1:
+                    new_rect = (x_max, y_max, 0, y_min)
+                else:
+                    new_rect = (x_max, y_max, x_min, 0)
+                for quadrant in range(coord+1,4):
+                    child = children[base+quadrant]
+                    if child!=0 and self.__collide_rectangle(new_rect, child, dim+1, res, first_only):
+                        found = True
+                        if first_only:
+                            return True
+        return found
+
+    def __is_inside_screen(self, rect):
+        '''
+        @param rect: the rectangle to check
+        @return: true iff the rectangle is actually inside the screen (at least in part)
+        Also catches zero width or zero height
+        '''
+        (x_min, y_min, x_max, y_max, _) = rect
+        return x_max>0 and y_max>0 and x_min<self.__width and y_min<self.__height and x_max!=x_min and y_max!=y_min
+
+    def __convert_rect(self, rect):
+        '''
+        Convert the rectangle to one whose coordinates fit properly on the screen.
+        (Assumes the rectangle is well defined)
+        @param rect: the rectangle to convert
+        @return: the effective rectangle clipped to the screen as (x_min,y_min,x_max,y_max)
+        '''
+        (x_min, y_min, x_max, y_max, _) = rect
+        return (max(x_min,0),
+                max(y_min,0),
+                min(x_max,self.__width),
+                min(y_max,self.__height))
+
+    def clear(self):
+        '''
+        Remove all items from this rectangle tree. This takes constant time - the storage is kept
+        for the rectangles inserted afterwards. Handles from before this are no longer used (see the stamps).
+        '''
+        self.__children[0] = 0
+        self.__children[1] = 0
+        self.__children[2] = 0
+        self.__children[3] = 0
+        self.__counts[0] = 0
+        self.__node_top = 1
+        self.__free_node = 0
+        self.__keys = []
+        self.__rect_top = 0
+        self.__free_rect = 0
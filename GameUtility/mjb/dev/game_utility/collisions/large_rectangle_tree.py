@@ -5,6 +5,11 @@ Created on 5 Jul 2014
 '''
 
 import mjb.dev.game_utility.collisions.rectangle_collider as collider
+try:
+    import numpy
+except ImportError:
+    #The batched queries fall back to one query at a time without numpy
+    numpy = None
 
 class LargeRectangleTree(collider.RectangleCollider):
     '''
@@ -54,6 +59,8 @@ class LargeRectangleTree(collider.RectangleCollider):
         self.__initialise_coordinate_map()
         #Initialise the tree!
         self.__root = [0,[],[],[],[]]
+        #Bumped by each clear, so that handles from before it are no longer used
+        self.__generation = 0
         
     def insert_rectangle(self, rect):
         '''
@@ -63,27 +70,39 @@ class LargeRectangleTree(collider.RectangleCollider):
         Note that if a rectangle is added twice, it will be included twice (and must be removed twice
         if you understand what I mean)
         @param rect: the rectangle to add to the rectangle tree
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
         '''
         #Check if it is inside the screen
         if not self.__is_inside_screen(rect):
-            return
+            return None
         #Convert the rectangle
-        rect = self.__convert_rect(rect)
+        handle = self.__convert_rect(rect)
+        self.__insert_entry(handle)
+        return handle
+    
+    def __insert_entry(self, entry):
+        '''
+        Add a converted rectangle to the leaf it belongs in, remembering the leaf and its place
+        there in the entry.
+        @param entry: the converted rectangle (see __convert_rect)
+        '''
         #Recur to insert the rectangle
         current_node = self.__root
         for dim in range(0,7):
-            coord = self.__get_coordinate(rect, dim)+1
+            coord = self.__get_coordinate(entry, dim)+1
             #Construct the node if necessary
             if current_node[coord]==[]:
                 current_node[0]+=1
                 current_node[coord] = [0,[],[],[],[]]
             current_node = current_node[coord]
         #Final one...
-        coord = self.__get_coordinate(rect, 7)+1
+        coord = self.__get_coordinate(entry, 7)+1
         if current_node[coord]==[]:
             current_node[0]+=1
         #This final list should just have the rectangle added to it, I think...
-        current_node[coord].append(rect)
+        entry[5] = current_node[coord]
+        entry[6] = len(current_node[coord])
+        current_node[coord].append(entry)
         
     def remove_rectangle(self, rect):
         '''
@@ -96,27 +115,54 @@ class LargeRectangleTree(collider.RectangleCollider):
         if not self.__is_inside_screen(rect):
             return False
         #Convert the rectangle
-        rect = self.__convert_rect(rect)
+        entry = self.__convert_rect(rect)
         #Now we search for where the rectangle should exist...
-        #We need to hold the node stack too...
         current_node = self.__root
-        node_stack = [current_node]
         for dim in range(0,7):
-            coord = self.__get_coordinate(rect, dim)+1
-            #Construct the node if necessary
+            coord = self.__get_coordinate(entry, dim)+1
             if current_node[coord]==[]:
                 return False #does not exist
             current_node = current_node[coord]
+        coord = self.__get_coordinate(entry, 7)+1
+        #Find the rectangle in the leaf...
+        for handle in current_node[coord]:
+            if handle[4]==rect:
+                return self.remove_by_handle(handle)
+        return False #does not exist
+    
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the tree using the handle returned when it was inserted. The last rectangle
+        in the leaf is swapped into its place, so this does not search the leaf.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the tree
+        '''
+        if handle is None or handle[5] is None or handle[7]!=self.__generation:
+            return False
+        leaf = handle[5]
+        last = leaf.pop()
+        if last is not handle:
+            leaf[handle[6]] = last
+            last[6] = handle[6]
+        handle[5] = None
+        if leaf==[]:
+            self.__remove_empty_leaf(handle)
+        return True
+    
+    def __remove_empty_leaf(self, entry):
+        '''
+        Correct the tree after the leaf a rectangle was in has become empty, removing any nodes
+        left empty as a result.
+        @param entry: the converted rectangle (see __convert_rect) which was in the leaf
+        '''
+        #We need to hold the node stack...
+        current_node = self.__root
+        node_stack = [current_node]
+        for dim in range(0,7):
+            current_node = current_node[self.__get_coordinate(entry, dim)+1]
             node_stack.append(current_node)
-        coord = self.__get_coordinate(rect, 7)+1
-        if current_node[coord]==[]:
-            return False #does not exist
-        #Remove the rectangle...
-        was_removed = rect in current_node[coord]
-        if was_removed:
-            current_node[coord].remove(rect)
         #Now we need to correct for the removal...
-        removing = current_node[coord]==[]
+        removing = True
         dim = 6 #where we are in the node stack
         while removing and dim>=0:
             #Remove from the current node...
@@ -124,14 +170,46 @@ class LargeRectangleTree(collider.RectangleCollider):
             if (current_node[0]==0):
                 #We need to remove this too...
                 current_node = node_stack[dim]
-                current_node[self.__get_coordinate(rect, dim)+1] = []
+                current_node[self.__get_coordinate(entry, dim)+1] = []
                 dim-=1
             else:
                 removing = False
         #Correct for the root... (which is allowed to be empty)
         if dim==-1:
             self.__root[0]-=1
-        return was_removed
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the tree with another (usually the same rectangle in a new position).
+        If the new rectangle belongs in the same leaf as the old one, it is updated in place. Otherwise
+        it is moved to its new leaf.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        if handle is None or handle[5] is None or handle[7]!=self.__generation:
+            return self.insert_rectangle(new_rect)
+        if not self.__is_inside_screen(new_rect):
+            self.remove_by_handle(handle)
+            return None
+        entry = self.__convert_rect(new_rect)
+        if self.__get_cells(entry)==self.__get_cells(handle):
+            #Same leaf, so just update it
+            handle[0:5] = entry[0:5]
+            return handle
+        self.remove_by_handle(handle)
+        handle[0:5] = entry[0:5]
+        self.__insert_entry(handle)
+        return handle
+    
+    def __get_cells(self, rect):
+        '''
+        @param rect: a converted rectangle
+        @return: the cells of the grid containing the corners of the rectangle as
+        (x_min cell,x_max cell,y_min cell,y_max cell). Rectangles with the same cells share a leaf.
+        '''
+        return (self.__width_coordinate[rect[0]], self.__width_coordinate[rect[2]],
+                self.__height_coordinate[rect[1]], self.__height_coordinate[rect[3]])
     
     def collide_rectangle(self, rect):
         '''
@@ -145,7 +223,7 @@ class LargeRectangleTree(collider.RectangleCollider):
         #Convert the rectangle
         rect = self.__convert_rect((x_min,y_min,x_max,y_max,None))
         #We need to return all rectangles on all sides in a recursive manner. We will do this recursively...
-        (x_min, y_min, x_max, y_max, _) = rect
+        (x_min, y_min, x_max, y_max) = rect[0:4]
         coord_rect = (x_max, y_max, x_min, y_min)
         return self.__collide_rectangle(coord_rect, self.__root, 0)
     
@@ -162,10 +240,9 @@ class LargeRectangleTree(collider.RectangleCollider):
         #Special case if this is the last dim...
         if dim==8:
             #This is a list of rectangles!
-            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max,
-                 (rect_org_x_min,rect_org_y_min,rect_org_x_max,rect_org_y_max,key)) in current_node:
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, org_rect, _, _, _) in current_node:
                 if rect_x_min<x_max and rect_x_max>x_min and rect_y_min<y_max and rect_y_max>y_min:
-                    res.append((rect_org_x_min, rect_org_y_min, rect_org_x_max, rect_org_y_max, key))
+                    res.append(org_rect)
             return res
         #Now for the other cases...
         coord = self.__get_coordinate(coord_rect, dim)+1
@@ -196,6 +273,229 @@ class LargeRectangleTree(collider.RectangleCollider):
                 res.extend(self.__collide_rectangle(new_rect, current_node[max_coord], dim+1))
             return res
     
+    def collide_many(self, rects):
+        '''
+        Collide a whole batch of rectangles with the tree. With numpy available, the tree is descended
+        once per node for the whole batch rather than once per rectangle.
+        @param rects: a sequence (or an (N,4) array) of rectangles in the form of (x_min,y_min,x_max,y_max)
+        @return: a pair (offsets,collided). The rectangles colliding with the i-th query are
+        collided[offsets[i]:offsets[i+1]].
+        '''
+        if numpy is None:
+            return collider.RectangleCollider.collide_many(self, rects)
+        (query_count,hit_queries,hit_rects) = self.__collide_batch(rects, False)
+        if hit_rects==[]:
+            return ([0]*(query_count+1),[])
+        #Group the hits by query (stable, so each query's hits keep the order they were found in)
+        hit_queries = numpy.concatenate(hit_queries)
+        order = numpy.argsort(hit_queries, kind="mergesort")
+        collided = [hit_rects[index] for index in order.tolist()]
+        offsets = [0]
+        offsets.extend(numpy.cumsum(numpy.bincount(hit_queries, minlength=query_count)).tolist())
+        return (offsets,collided)
+    
+    def is_colliding_many(self, rects):
+        '''
+        Check a whole batch of rectangles for collisions with the tree. With numpy available,
+        a query stops being carried down the tree as soon as a collision is found for it.
+        @param rects: a sequence (or an (N,4) array) of rectangles in the form of (x_min,y_min,x_max,y_max)
+        @return: a list of booleans, the i-th being true iff the i-th rectangle is colliding with something
+        '''
+        if numpy is None:
+            return collider.RectangleCollider.is_colliding_many(self, rects)
+        (query_count,hit_queries,_) = self.__collide_batch(rects, True)
+        found = numpy.zeros(query_count, dtype=bool)
+        for queries in hit_queries:
+            found[queries] = True
+        return found.tolist()
+    
+    def __collide_batch(self, rects, first_only):
+        '''
+        Run the batched search shared by collide_many and is_colliding_many.
+        @param rects: the query rectangles as (x_min,y_min,x_max,y_max)
+        @param first_only: true iff the search for a query can stop once it has collided with something
+        @return: (query_count,hit_queries,hit_rects) where hit_queries is a list of arrays of query indices
+        and hit_rects holds the collided rectangle for every individual hit (in the same order)
+        '''
+        queries = numpy.asarray(rects, dtype=numpy.int64).reshape(-1,4)
+        query_count = len(queries)
+        #Discard anything not inside the screen (as in __is_inside_screen)...
+        inside = ((queries[:,2]>0) & (queries[:,3]>0) &
+                  (queries[:,0]<self.__width) & (queries[:,1]<self.__height) &
+                  (queries[:,2]!=queries[:,0]) & (queries[:,3]!=queries[:,1]))
+        indices = numpy.nonzero(inside)[0]
+        queries = queries[indices]
+        #...and convert the rest as in __convert_rect. Reversed for rectangle hunting as before.
+        coord_rects = numpy.column_stack((numpy.minimum(queries[:,2],self.__width),
+                                          numpy.minimum(queries[:,3],self.__height),
+                                          numpy.maximum(queries[:,0],0),
+                                          numpy.maximum(queries[:,1],0)))
+        hit_queries = []
+        hit_rects = []
+        found = numpy.zeros(query_count, dtype=bool) if first_only else None
+        if len(indices)>0:
+            self.__collide_batch_node(coord_rects, indices, self.__root, 0, found, hit_queries, hit_rects)
+        return (query_count,hit_queries,hit_rects)
+    
+    def __collide_batch_node(self, coord_rects, indices, current_node, dim, found, hit_queries, hit_rects):
+        '''
+        The batched version of __collide_rectangle, carrying every query that reaches this node at once.
+        @param coord_rects: an (M,4) array of the queries in their coordinate representation
+        @param indices: the original index of each of the M queries
+        @param current_node: the node being searched
+        @param dim: the dimension in the list
+        @param found: None, or an array marking the queries which have already collided (these are dropped)
+        @param hit_queries: the list to add arrays of colliding query indices to
+        @param hit_rects: the list to add the collided rectangles to
+        '''
+        if current_node==[]:
+            return
+        if found is not None:
+            remaining = ~found[indices]
+            if not remaining.all():
+                coord_rects = coord_rects[remaining]
+                indices = indices[remaining]
+                if len(indices)==0:
+                    return
+        #Special case if this is the last dim...
+        if dim==8:
+            #This is a list of rectangles! Test each against all the queries at once
+            x_max = coord_rects[:,0]
+            y_max = coord_rects[:,1]
+            x_min = coord_rects[:,2]
+            y_min = coord_rects[:,3]
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, org_rect, _, _, _) in current_node:
+                hits = indices[(rect_x_min<x_max) & (rect_x_max>x_min) & (rect_y_min<y_max) & (rect_y_max>y_min)]
+                if len(hits)>0:
+                    hit_queries.append(hits)
+                    hit_rects.extend([org_rect]*len(hits))
+                    if found is not None:
+                        found[hits] = True
+            return
+        #Now for the other cases...
+        coords = self.__get_coordinates(coord_rects, dim)+1
+        if dim % 2 == 0:
+            #This is a min coordinate. The queries go into their own quadrant, and unconditionally into
+            #quadrants less than it (with the coordinate changed, as in __collide_rectangle)
+            changed_column = 0 if dim%4==0 else 1
+            changed_value = self.__width if dim%4==0 else self.__height
+            for coord in range(1,5):
+                self.__collide_batch_quadrant(coord_rects, indices, coords==coord, coords>coord,
+                                              changed_column, changed_value,
+                                              current_node[coord], dim, found, hit_queries, hit_rects)
+        else:
+            #This is a max coordinate, so the queries also go into every quadrant greater than their own
+            changed_column = 2 if dim%4==1 else 3
+            for coord in range(1,5):
+                self.__collide_batch_quadrant(coord_rects, indices, coords==coord, coords<coord,
+                                              changed_column, 0,
+                                              current_node[coord], dim, found, hit_queries, hit_rects)
+    
+    def __collide_batch_quadrant(self, coord_rects, indices, same, other, changed_column, changed_value,
+                                 child_node, dim, found, hit_queries, hit_rects):
+        '''
+        Carry the relevant queries into one quadrant of a node.
+        @param same: a mask of the queries whose own coordinate is this quadrant
+        @param other: a mask of the queries which reach this quadrant unconditionally
+        @param changed_column: the column of the coordinate representation to change for the "other" queries
+        @param changed_value: the value the changed column should take
+        (The remaining parameters are as in __collide_batch_node)
+        '''
+        if child_node==[]:
+            return
+        has_other = other.any()
+        if not has_other:
+            if same.any():
+                self.__collide_batch_node(coord_rects[same], indices[same], child_node, dim+1,
+                                          found, hit_queries, hit_rects)
+            return
+        selected = same | other
+        child_rects = coord_rects[selected]
+        child_rects[other[selected],changed_column] = changed_value
+        self.__collide_batch_node(child_rects, indices[selected], child_node, dim+1,
+                                  found, hit_queries, hit_rects)
+    
+    def collide_point(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: all of the rectangles containing the point, so colliding with the rectangle (x,y,x+1,y+1).
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return []
+        res = []
+        x_cell = self.__width_coordinate[x]
+        y_cell = self.__height_coordinate[y]
+        self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), self.__root, 0, res)
+        return res
+    
+    def is_point_colliding(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff some rectangle in the tree contains the point (Will stop when it finds one)
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return False
+        x_cell = self.__width_coordinate[x]
+        y_cell = self.__height_coordinate[y]
+        return self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), self.__root, 0, None)
+    
+    def __collide_point(self, x, y, cells, current_node, dim, res):
+        '''
+        The point version of __collide_rectangle. A point lies in a single cell of the grid, so rather
+        than coordinates, we carry the cell for each of the 4 coordinates (x_min,x_max,y_min,y_max).
+        Once we have moved into a lower (or higher) quadrant, the coordinate is no longer a restriction,
+        so its cell is changed to the last (or first) one.
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @param cells: the cells (x_min,x_max,y_min,y_max) to look in
+        @param current_node: the node to search
+        @param dim: the dimension in the list
+        @param res: the list to add the rectangles containing the point to, or None to stop at the first one
+        @return: true iff some rectangle (within this part of the tree) contains the point
+        '''
+        if current_node==[]:
+            return False
+        #Special case if this is the last dim...
+        if dim==8:
+            #This is a list of rectangles!
+            found = False
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, org_rect, _, _, _) in current_node:
+                if rect_x_min<=x and rect_x_max>x and rect_y_min<=y and rect_y_max>y:
+                    if res is None:
+                        return True
+                    res.append(org_rect)
+                    found = True
+            return found
+        #Now for the other cases...
+        coordinate = dim%4
+        if dim<4:
+            coord = cells[coordinate]/4+1
+        else:
+            coord = cells[coordinate]%4+1
+        #Our own quadrant first
+        found = self.__collide_point(x, y, cells, current_node[coord], dim+1, res)
+        if found and res is None:
+            return True
+        if dim % 2 == 0:
+            #This is a min coordinate, so we also look in all the quadrants less than it
+            other_coords = range(1,coord)
+            free_cell = 15
+        else:
+            #This is a max coordinate, so we also look in all the quadrants greater than it
+            other_coords = range(coord+1,5)
+            free_cell = 0
+        if other_coords!=[]:
+            new_cells = list(cells)
+            new_cells[coordinate] = free_cell
+            for other_coord in other_coords:
+                if self.__collide_point(x, y, new_cells, current_node[other_coord], dim+1, res):
+                    found = True
+                    if res is None:
+                        return True
+        return found
+    
     #SO MUCH CODE DUPLICATION!! SORRY!!
     
     def is_colliding(self, rect):
@@ -211,7 +511,7 @@ class LargeRectangleTree(collider.RectangleCollider):
         #Convert the rectangle
         rect = self.__convert_rect((x_min,y_min,x_max,y_max,None))
         #We need to return all rectangles on all sides in a recursive manner. We will do this recursively...
-        (x_min, y_min, x_max, y_max, _) = rect
+        (x_min, y_min, x_max, y_max) = rect[0:4]
         coord_rect = (x_max, y_max, x_min, y_min)
         return self.__is_colliding(coord_rect, self.__root, 0)
         
@@ -227,7 +527,7 @@ class LargeRectangleTree(collider.RectangleCollider):
         #Special case if this is the last dim...
         if dim==8:
             #This is a list of rectangles!
-            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max,_) in current_node:
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, _, _, _, _) in current_node:
                 if rect_x_min<x_max and rect_x_max>x_min and rect_y_min<y_max and rect_y_max>y_min:
                     return True #Found one!
             return False
@@ -313,6 +613,10 @@ class LargeRectangleTree(collider.RectangleCollider):
                 #Coordinate changes
                 current_coord+=1
             self.__height_coordinate.append(current_coord)
+        #Keep array copies for the batched queries
+        if numpy is not None:
+            self.__width_coordinate_array = numpy.array(self.__width_coordinate, dtype=numpy.int64)
+            self.__height_coordinate_array = numpy.array(self.__height_coordinate, dtype=numpy.int64)
             
     
     def __initialise_coordinate_map(self):
@@ -329,6 +633,21 @@ class LargeRectangleTree(collider.RectangleCollider):
         self.__coordinate_map.append(lambda rect: self.__height_coordinate[rect[1]]%4)
         self.__coordinate_map.append(lambda rect: self.__height_coordinate[rect[3]]%4)
     
+    def __get_coordinates(self, coord_rects, dim):
+        '''
+        The batched version of __get_coordinate (numpy only)
+        @param coord_rects: an (M,4) array of rectangles
+        @param dim: the level of recursion in the array for the index you would like (0 being the first)
+        @return: an array of the relevant coordinates
+        '''
+        if dim%4<2:
+            cells = self.__width_coordinate_array[coord_rects[:,0 if dim%2==0 else 2]]
+        else:
+            cells = self.__height_coordinate_array[coord_rects[:,1 if dim%2==0 else 3]]
+        if dim<4:
+            return cells//4
+        return cells%4
+    
     def __get_coordinate(self, rect, dim):
         '''
         @param rect: the rectangle whose coordinates in the 8 dimensional array you would like
@@ -342,18 +661,25 @@ class LargeRectangleTree(collider.RectangleCollider):
         Convert the rectangle to one whose coordinates fit properly on the screen.
         (Assumes the rectangle is well defined)
         @param rect: the rectangle to convert
-        @return: the effective rectangle clipped to the screen
+        @return: the effective rectangle clipped to the screen, as a list
+        [x_min,y_min,x_max,y_max,rect,leaf,index,generation]. This is the form the rectangle is stored in,
+        where the leaf (None until inserted) and index record where it is in the tree, and the generation
+        is the number of times the tree had been cleared.
         '''
-        (x_min, y_min, x_max, y_max, key) = rect
-        return (max(x_min,0),
+        (x_min, y_min, x_max, y_max, _) = rect
+        return [max(x_min,0),
                 max(y_min,0),
                 min(x_max,self.__width),
                 min(y_max,self.__height),
-                (x_min, y_min, x_max, y_max, key))
+                rect,
+                None,
+                0,
+                self.__generation]
         
     def clear(self):
         '''
-        Remove all items from this rectangle tree
+        Remove all items from this rectangle tree. Handles from before this are no longer used.
         '''
         self.__root = [0,[],[],[],[]]
+        self.__generation+=1
         
\ No newline at end of file
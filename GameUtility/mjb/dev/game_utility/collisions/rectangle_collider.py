@@ -15,11 +15,18 @@ class RectangleCollider(object):
     # simply isn't needed at the moment anyway...
     #
     
+    #
+    # Handles: insert_rectangle returns a handle for the rectangle, which can be used to remove or move
+    # the rectangle without searching for it. A handle is only valid until its rectangle is removed or
+    # the collider is cleared. By default the handle is just the rectangle itself.
+    #
+    
     def insert_rectangle(self, rect):
         '''
         Insert a rectangle into the collider.
         @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
         where key is any custom value
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
         '''
         pass
     
@@ -33,6 +40,26 @@ class RectangleCollider(object):
         '''
         pass
     
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the collider using the handle returned when it was inserted.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the collider
+        '''
+        if handle is None:
+            return False
+        return self.remove_rectangle(handle)
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the collider with another (usually the same rectangle in a new position).
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        self.remove_by_handle(handle)
+        return self.insert_rectangle(new_rect)
+    
     def collide_rectangle(self, rect):
         '''
         Collide a rectangle tree with the collider
@@ -50,6 +77,53 @@ class RectangleCollider(object):
         '''
         pass
     
+    def collide_point(self, x, y):
+        '''
+        Collide a single point with the collider. By default this collides the rectangle (x,y,x+1,y+1),
+        but colliders may override it to search for the point more efficiently.
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: a list of all rectangles containing the point.
+        '''
+        return self.collide_rectangle((x,y,x+1,y+1))
+    
+    def is_point_colliding(self, x, y):
+        '''
+        Check if a point is inside any rectangle inserted into the collider.
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff some rectangle exists in the collider containing the point
+        '''
+        return self.is_colliding((x,y,x+1,y+1))
+    
+    def collide_many(self, rects):
+        '''
+        Collide a whole batch of rectangles with the collider in one call. By default this just
+        calls collide_rectangle for each rectangle, but colliders may override it to answer the
+        batch more efficiently.
+        @param rects: a sequence (or an (N,4) array) of rectangles in the form of (x_min,y_min,x_max,y_max)
+        @return: a pair (offsets,collided) in a compressed form. The rectangles colliding with the i-th
+        query are collided[offsets[i]:offsets[i+1]], so offsets always has one more element than rects.
+        '''
+        offsets = [0]
+        collided = []
+        for (x_min,y_min,x_max,y_max) in rects:
+            collided.extend(self.collide_rectangle((x_min,y_min,x_max,y_max)))
+            offsets.append(len(collided))
+        return (offsets,collided)
+    
+    def is_colliding_many(self, rects):
+        '''
+        Check a whole batch of rectangles for collisions in one call.
+        @param rects: a sequence (or an (N,4) array) of rectangles in the form of (x_min,y_min,x_max,y_max)
+        @return: a list of booleans, the i-th being true iff the i-th rectangle is colliding with
+        some rectangle in the collider
+        '''
+        res = []
+        for (x_min,y_min,x_max,y_max) in rects:
+            res.append(self.is_colliding((x_min,y_min,x_max,y_max)))
+        return res
+    
     def clear(self):
         '''
         Remove all rectangles from the collider
@@ -4,6 +4,8 @@ Created on 27 Jul 2014
 @author: michael
 '''
 
+import heapq
+
 class ScreenCollider(object):
     '''
     The screen collider is designed to provide "screen" sized (it is still a parameter)
@@ -11,6 +13,10 @@ class ScreenCollider(object):
     which means that a single rectangle is attached to the screen collider first,
     and then inside this rectangle is a list of further rectangles. This enables faster
     addition and deletion.
+    
+    Optionally, the shapes can also be given as bitmasks (see utility.bitmask). When both shapes in a
+    collision have bitmasks, they are compared by shifting and and-ing the rows where they intersect,
+    rather than colliding each inner rectangle of one with the inner collider of the other.
     '''
     
     '''
@@ -22,16 +28,22 @@ class ScreenCollider(object):
     '''
     MIN_HEIGHT = 16
     
-    def __init__(self,rectangle_collider,get_inner_shape):
+    def __init__(self,rectangle_collider,get_inner_shape,get_depth=None,get_inner_bitmask=None):
         '''
         Create a new screen collider!
         @param rectangle_collider: the rectangle collider to be used for the outer rectangles
         @param get_inner_shape: return a list of all the inner rectangles as a list of (x_min,y_min,x_max,y_max). Should return [] if there are none, and accept a rectangle with the key as a parameter.
         Should also return a collider containing the inner rectangles. The returned value is then a pair (rect_list,collider)
+        @param get_depth: None by default. Return the depth of a rectangle (with the key), where smaller depths are
+        on top. Only needed for collide_point_topmost.
+        @param get_inner_bitmask: None by default. Return the bitmask of a rectangle (with the key), or None if
+        it has no bitmask (and its inner rectangles should be used).
         @raise ValueError: if the width and height are not at least 16 pixels
         '''
         #Remember the values
         self.__get_inner_shape = get_inner_shape
+        self.__get_depth = get_depth
+        self.__get_inner_bitmask = get_inner_bitmask
         self.__rectangle_collider = rectangle_collider
         
     def insert_rectangle(self, rect):
@@ -39,8 +51,9 @@ class ScreenCollider(object):
         Insert a rectangle into the collider.
         @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
         where key is any custom value
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
         '''
-        self.__rectangle_collider.insert_rectangle(rect)
+        return self.__rectangle_collider.insert_rectangle(rect)
     
     def remove_rectangle(self, rect):
         '''
@@ -52,121 +65,232 @@ class ScreenCollider(object):
         '''
         return self.__rectangle_collider.remove_rectangle(rect)
     
-    def collide_rectangle(self, outer_rectangle, inner_rectangles=[], inner_collider=None):
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the collider using the handle returned when it was inserted.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the collider
+        '''
+        return self.__rectangle_collider.remove_by_handle(handle)
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the collider with another (usually the same rectangle in a new position).
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        return self.__rectangle_collider.move_rectangle(handle, new_rect)
+    
+    def collide_rectangle(self, outer_rectangle, inner_rectangles=[], inner_collider=None, inner_bitmask=None):
         '''
         Collide a rectangle tree with the collider
         @param outer_rectangle: the rectangle to collide against in the form of (x_min,y_min,x_max,y_max)
         @param inner_rectangles: the inner rectangles associated to the outer rectangle as a list of (x_min,y_min,x_max,y_max)
         @param inner_collider: the inner collider associated to the inner rectangle
+        @param inner_bitmask: None by default, otherwise the bitmask of the same shape as the inner rectangles
         @return: a list of all rectangles that collided with the given rectangle.
         '''
         outer_rectangles = self.__rectangle_collider.collide_rectangle(outer_rectangle)
-        first_x_offset = outer_rectangle[0]
-        first_y_offset = outer_rectangle[1]
         #We now check whether or not each outer rectangle collided against really was colliding.
-        first_has_inner_rects = inner_rectangles!=[]
         res = []
         for second_outer_rectangle in outer_rectangles:
-            (second_inner_rects,second_inner_collider) = self.__get_inner_shape(second_outer_rectangle)
-            second_has_inner_rects = second_inner_rects!=[]
-            second_x_offset = second_outer_rectangle[0]
-            second_y_offset = second_outer_rectangle[1]
-            if not (first_has_inner_rects or second_has_inner_rects):
+            if self.confirm_collision(outer_rectangle, inner_rectangles, inner_collider, second_outer_rectangle,
+                                      inner_bitmask):
                 res.append(second_outer_rectangle)
-                continue
-            #Loop over the small list
-            if len(inner_rectangles)>len(second_inner_rects):
-                if not second_has_inner_rects:
-                    (x_min,y_min,x_max,y_max,_) = second_outer_rectangle
-                    if inner_collider.is_colliding((x_min-first_x_offset,
-                                                    y_min-first_y_offset,
-                                                    x_max-first_x_offset,
-                                                    y_max-first_y_offset)):
-                        res.append(second_outer_rectangle)
-                    continue
-                for (x_min,y_min,x_max,y_max) in second_inner_rects:
-                    if inner_collider.is_colliding((x_min+second_x_offset-first_x_offset,
-                                                    y_min+second_y_offset-first_y_offset,
-                                                    x_max+second_x_offset-first_x_offset,
-                                                    y_max+second_y_offset-first_y_offset)):
-                        res.append(second_outer_rectangle)
-                        break
-                continue
-            else:
-                if not first_has_inner_rects:
-                    (x_min,y_min,x_max,y_max) = outer_rectangle
-                    if second_inner_collider.is_colliding((x_min-second_x_offset,
-                                                           y_min-second_y_offset,
-                                                           x_max-second_x_offset,
-                                                           y_max-second_y_offset)):
-                        res.append(second_outer_rectangle)
-                    continue
-                for (x_min,y_min,x_max,y_max) in inner_rectangles:
-                    if second_inner_collider.is_colliding((x_min+first_x_offset-second_x_offset,
-                                                           y_min+first_y_offset-second_y_offset,
-                                                           x_max+first_x_offset-second_x_offset,
-                                                           y_max+first_y_offset-second_y_offset)):
-                        res.append(second_outer_rectangle)
-                        break
-                continue
         #Done! Res has all of the rectangles that are definitely colliding
         return res
     
-    def is_colliding(self, outer_rectangle, inner_rectangles=[], inner_collider=None):
+    def collide_many(self, outer_rectangles, inner_shapes=None):
+        '''
+        Collide a whole batch of rectangles with the collider. The outer rectangles are collided
+        in one batch by the rectangle collider (see RectangleCollider.collide_many).
+        @param outer_rectangles: a sequence of rectangles to collide in the form of (x_min,y_min,x_max,y_max)
+        @param inner_shapes: None if no rectangle has an inner shape, or otherwise a list holding
+        an (inner_rectangles,inner_collider) pair for each outer rectangle (([],None) if there are none)
+        @return: a pair (offsets,collided). The rectangles colliding with the i-th outer rectangle
+        are collided[offsets[i]:offsets[i+1]].
+        '''
+        (candidate_offsets,candidates) = self.__rectangle_collider.collide_many(outer_rectangles)
+        offsets = [0]
+        collided = []
+        for index in range(0,len(candidate_offsets)-1):
+            outer_rectangle = tuple(outer_rectangles[index])
+            if inner_shapes==None:
+                (inner_rectangles,inner_collider) = ([],None)
+            else:
+                (inner_rectangles,inner_collider) = inner_shapes[index]
+            for second_outer_rectangle in candidates[candidate_offsets[index]:candidate_offsets[index+1]]:
+                if self.confirm_collision(outer_rectangle, inner_rectangles, inner_collider, second_outer_rectangle):
+                    collided.append(second_outer_rectangle)
+            offsets.append(len(collided))
+        return (offsets,collided)
+    
+    def is_colliding(self, outer_rectangle, inner_rectangles=[], inner_collider=None, inner_bitmask=None):
         '''
         Collide a rectangle tree with the collider
         @param outer_rectangle: the rectangle to collide against in the form of (x_min,y_min,x_max,y_max)
         @param inner_rectangles: the inner rectangles associated to the outer rectangle as a list of (x_min,y_min,x_max,y_max)
         @param inner_collider: the inner collider associated to the inner rectangle
+        @param inner_bitmask: None by default, otherwise the bitmask of the same shape as the inner rectangles
         @return: true iff the outer rectangle is colliding with something in the collider
         '''
         outer_rectangles = self.__rectangle_collider.collide_rectangle(outer_rectangle)
-        first_x_offset = outer_rectangle[0]
-        first_y_offset = outer_rectangle[1]
         #We now check whether or not each outer rectangle collided against really was colliding.
-        first_has_inner_rects = inner_rectangles!=[]
         for second_outer_rectangle in outer_rectangles:
-            (second_inner_rects,second_inner_collider) = self.__get_inner_shape(second_outer_rectangle)
-            second_has_inner_rects = second_inner_rects!=[]
-            second_x_offset = second_outer_rectangle[0]
-            second_y_offset = second_outer_rectangle[1]
-            if not (first_has_inner_rects or second_has_inner_rects):
+            if self.confirm_collision(outer_rectangle, inner_rectangles, inner_collider, second_outer_rectangle,
+                                      inner_bitmask):
                 return True
-            #Loop over the small list
-            if len(inner_rectangles)>len(second_inner_rects):
-                if not second_has_inner_rects:
-                    (x_min,y_min,x_max,y_max,_) = second_outer_rectangle
-                    if inner_collider.is_colliding((x_min-first_x_offset,
+        return False
+    
+    def collide_point(self, x, y):
+        '''
+        Collide a single point with the collider. This is the same as colliding the rectangle
+        (x,y,x+1,y+1) with no inner rectangles, but faster.
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: a list of all rectangles whose shape contains the point.
+        '''
+        res = []
+        for outer_rectangle in self.__rectangle_collider.collide_point(x, y):
+            if self.__confirm_point(x, y, outer_rectangle):
+                res.append(outer_rectangle)
+        return res
+    
+    def is_point_colliding(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff the shape of something in the collider contains the point
+        '''
+        for outer_rectangle in self.__rectangle_collider.collide_point(x, y):
+            if self.__confirm_point(x, y, outer_rectangle):
+                return True
+        return False
+    
+    def collide_point_topmost(self, x, y, k=1, also_below=None):
+        '''
+        Find the k topmost (smallest depth) rectangles whose shape contains a point. Every rectangle whose
+        outer rectangle contains the point is still found by the rectangle collider, but they are then taken
+        in order of the depth held with them, and the inner shapes (which are the expensive part) are only
+        checked until k have been confirmed. The depths should be kept up to date by moving the rectangles
+        when they change.
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @param k: 1 by default, the maximum number of rectangles to find
+        @param also_below: None by default, otherwise a function accepting a rectangle (with the key) which returns
+        true iff it should be found even when it is below the k topmost. Only those rectangles have their inner
+        shapes checked after the k topmost are found.
+        @return: a list of at most k rectangles whose shape contains the point, topmost first, followed by those
+        below them (for also_below) in order of depth
+        @raise ValueError: if the collider was constructed without get_depth
+        '''
+        if self.__get_depth is None:
+            raise ValueError("The collider needs get_depth for topmost queries")
+        get_depth = self.__get_depth
+        #The index breaks ties in depth (and stops the rectangles themselves being compared)
+        heap = [(get_depth(outer_rectangle),index,outer_rectangle)
+                for (index,outer_rectangle) in enumerate(self.__rectangle_collider.collide_point(x, y))]
+        heapq.heapify(heap)
+        res = []
+        while heap and len(res)<k:
+            (_,_,outer_rectangle) = heapq.heappop(heap)
+            if self.__confirm_point(x, y, outer_rectangle):
+                res.append(outer_rectangle)
+        if also_below is not None:
+            while heap:
+                (_,_,outer_rectangle) = heapq.heappop(heap)
+                if also_below(outer_rectangle) and self.__confirm_point(x, y, outer_rectangle):
+                    res.append(outer_rectangle)
+        return res
+    
+    def __confirm_point(self, x, y, outer_rectangle):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @param outer_rectangle: a rectangle from the collider containing the point, as (x_min,y_min,x_max,y_max,key)
+        @return: true iff its inner rectangles contain the point too (or it has none)
+        '''
+        if self.__get_inner_bitmask is not None:
+            inner_bitmask = self.__get_inner_bitmask(outer_rectangle)
+            if inner_bitmask is not None:
+                return inner_bitmask.get_bit(x-outer_rectangle[0], y-outer_rectangle[1])
+        (inner_rects,inner_collider) = self.__get_inner_shape(outer_rectangle)
+        if inner_rects==[]:
+            return True
+        return inner_collider.is_point_colliding(x-outer_rectangle[0], y-outer_rectangle[1])
+    
+    def confirm_collision(self, outer_rectangle, inner_rectangles, inner_collider, second_outer_rectangle,
+                          inner_bitmask=None):
+        '''
+        Check whether an outer rectangle really is colliding with an outer rectangle in the collider,
+        given that their outer rectangles overlap, by looking at their inner rectangles (or bitmasks).
+        @param outer_rectangle: the rectangle being collided in the form of (x_min,y_min,x_max,y_max)
+        @param inner_rectangles: the inner rectangles associated to the outer rectangle as a list of (x_min,y_min,x_max,y_max)
+        @param inner_collider: the inner collider associated to the inner rectangle
+        @param second_outer_rectangle: the rectangle from the collider, as (x_min,y_min,x_max,y_max,key)
+        @param inner_bitmask: None by default, otherwise the bitmask of the same shape as the inner rectangles
+        @return: true iff the two are genuinely colliding
+        '''
+        first_x_offset = outer_rectangle[0]
+        first_y_offset = outer_rectangle[1]
+        second_x_offset = second_outer_rectangle[0]
+        second_y_offset = second_outer_rectangle[1]
+        second_inner_bitmask = None
+        if self.__get_inner_bitmask is not None:
+            second_inner_bitmask = self.__get_inner_bitmask(second_outer_rectangle)
+            if inner_bitmask is not None and second_inner_bitmask is not None:
+                #Pixel perfect - and the rows where they intersect
+                return inner_bitmask.overlaps(second_inner_bitmask,
+                                              second_x_offset-first_x_offset,
+                                              second_y_offset-first_y_offset)
+        first_has_inner_rects = inner_rectangles!=[]
+        (second_inner_rects,second_inner_collider) = self.__get_inner_shape(second_outer_rectangle)
+        second_has_inner_rects = second_inner_rects!=[]
+        if not (first_has_inner_rects or second_has_inner_rects):
+            return True
+        #A bitmask against a plain rectangle
+        if inner_bitmask is not None and not second_has_inner_rects:
+            (x_min,y_min,x_max,y_max,_) = second_outer_rectangle
+            return inner_bitmask.overlaps_rectangle((x_min-first_x_offset,
+                                                     y_min-first_y_offset,
+                                                     x_max-first_x_offset,
+                                                     y_max-first_y_offset))
+        if second_inner_bitmask is not None and not first_has_inner_rects:
+            (x_min,y_min,x_max,y_max) = outer_rectangle
+            return second_inner_bitmask.overlaps_rectangle((x_min-second_x_offset,
+                                                            y_min-second_y_offset,
+                                                            x_max-second_x_offset,
+                                                            y_max-second_y_offset))
+        #Loop over the small list
+        if len(inner_rectangles)>len(second_inner_rects):
+            if not second_has_inner_rects:
+                (x_min,y_min,x_max,y_max,_) = second_outer_rectangle
+                return inner_collider.is_colliding((x_min-first_x_offset,
                                                     y_min-first_y_offset,
                                                     x_max-first_x_offset,
-                                                    y_max-first_y_offset)):
-                        return True
-                    continue
-                for (x_min,y_min,x_max,y_max) in second_inner_rects:
-                    if inner_collider.is_colliding((x_min+second_x_offset-first_x_offset,
-                                                    y_min+second_y_offset-first_y_offset,
-                                                    x_max+second_x_offset-first_x_offset,
-                                                    y_max+second_y_offset-first_y_offset)):
-                        return True
-                continue
-            else:
-                if not first_has_inner_rects:
-                    (x_min,y_min,x_max,y_max) = outer_rectangle
-                    if second_inner_collider.is_colliding((x_min-second_x_offset,
+                                                    y_max-first_y_offset))
+            for (x_min,y_min,x_max,y_max) in second_inner_rects:
+                if inner_collider.is_colliding((x_min+second_x_offset-first_x_offset,
+                                                y_min+second_y_offset-first_y_offset,
+                                                x_max+second_x_offset-first_x_offset,
+                                                y_max+second_y_offset-first_y_offset)):
+                    return True
+            return False
+        else:
+            if not first_has_inner_rects:
+                (x_min,y_min,x_max,y_max) = outer_rectangle
+                return second_inner_collider.is_colliding((x_min-second_x_offset,
                                                            y_min-second_y_offset,
                                                            x_max-second_x_offset,
-                                                           y_max-second_y_offset)):
-                        return True
-                    continue
-                for (x_min,y_min,x_max,y_max) in inner_rectangles:
-                    if second_inner_collider.is_colliding((x_min+first_x_offset-second_x_offset,
-                                                           y_min+first_y_offset-second_y_offset,
-                                                           x_max+first_x_offset-second_x_offset,
-                                                           y_max+first_y_offset-second_y_offset)):
-                        return True
-                continue
-        #Done! Res has all of the rectangles that are definitely colliding
-        return False
+                                                           y_max-second_y_offset))
+            for (x_min,y_min,x_max,y_max) in inner_rectangles:
+                if second_inner_collider.is_colliding((x_min+first_x_offset-second_x_offset,
+                                                       y_min+first_y_offset-second_y_offset,
+                                                       x_max+first_x_offset-second_x_offset,
+                                                       y_max+first_y_offset-second_y_offset)):
+                    return True
+            return False
     
     def clear(self):
         '''
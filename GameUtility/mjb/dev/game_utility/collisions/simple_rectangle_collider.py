@@ -22,17 +22,23 @@ class SimpleRectangleCollider(collider.RectangleCollider):
         self.__height = height
         #The rectangle list
         self.__list = []
+        #The handle of each rectangle in the list, being [rect,index]
+        self.__handles = []
         
     def insert_rectangle(self, rect):
         '''
         Insert a rectangle into the collider.
         @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
         where key is any custom value
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
         '''
         if not self.__is_inside_screen(rect):
-            return
+            return None
         #Add to the list
+        handle = [rect,len(self.__list)]
         self.__list.append(rect)
+        self.__handles.append(handle)
+        return handle
     
     def remove_rectangle(self, rect):
         '''
@@ -47,11 +53,46 @@ class SimpleRectangleCollider(collider.RectangleCollider):
             return
         #Remove from the list
         if rect in self.__list:
-            self.__list.remove(rect)
-            return True
+            return self.remove_by_handle(self.__handles[self.__list.index(rect)])
         else:
             return False
     
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the collider using the handle returned when it was inserted.
+        This swaps the last rectangle in the list into its place, so takes constant time.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the collider
+        '''
+        if not self.__is_current(handle):
+            return False
+        index = handle[1]
+        last_rect = self.__list.pop()
+        last_handle = self.__handles.pop()
+        if last_handle is not handle:
+            self.__list[index] = last_rect
+            self.__handles[index] = last_handle
+            last_handle[1] = index
+        handle[1] = -1
+        return True
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the collider with another (usually the same rectangle in a new position).
+        The rectangle is replaced where it is in the list, so this takes constant time.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        if not self.__is_current(handle):
+            return self.insert_rectangle(new_rect)
+        if not self.__is_inside_screen(new_rect):
+            self.remove_by_handle(handle)
+            return None
+        handle[0] = new_rect
+        self.__list[handle[1]] = new_rect
+        return handle
+    
     def collide_rectangle(self, rect):
         '''
         Collide a rectangle tree with the collider
@@ -84,11 +125,50 @@ class SimpleRectangleCollider(collider.RectangleCollider):
                 return True
         return False
         
+    def collide_point(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: all of the rectangles containing the point, so colliding with the rectangle (x,y,x+1,y+1).
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return []
+        res = []
+        for rect in self.__list:
+            (rect_x_min, rect_y_min, rect_x_max, rect_y_max, _) = rect
+            if rect_x_min<=x and rect_x_max>x and rect_y_min<=y and rect_y_max>y:
+                res.append(rect)
+        return res
+    
+    def is_point_colliding(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff some rectangle in the collider contains the point
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return False
+        for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, _) in self.__list:
+            if rect_x_min<=x and rect_x_max>x and rect_y_min<=y and rect_y_max>y:
+                return True
+        return False
+        
     def clear(self):
         '''
         Remove all rectangles from the collider
         '''
         self.__list = []
+        self.__handles = []
+    
+    def __is_current(self, handle):
+        '''
+        @param handle: a handle returned by insert_rectangle (or None)
+        @return: true iff the handle's rectangle is still in the collider
+        '''
+        if handle is None:
+            return False
+        index = handle[1]
+        return index>=0 and index<len(self.__handles) and self.__handles[index] is handle
     
     def __is_inside_screen(self, rect):
         '''
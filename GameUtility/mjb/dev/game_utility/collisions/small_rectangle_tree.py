@@ -57,6 +57,8 @@ class SmallRectangleTree(collider.RectangleCollider):
         self.__height_divider = self.__height / 4
         #Initialise the tree!
         self.__root = [0,[],[],[],[]]
+        #Bumped by each clear, so that handles from before it are no longer used
+        self.__generation = 0
         
     def insert_rectangle(self, rect):
         '''
@@ -66,27 +68,39 @@ class SmallRectangleTree(collider.RectangleCollider):
         Note that if a rectangle is added twice, it will be included twice (and must be removed twice
         if you understand what I mean)
         @param rect: the rectangle to add to the rectangle tree
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
         '''
         #Check if it is inside the screen
         if not self.__is_inside_screen(rect):
-            return
+            return None
         #Convert the rectangle
-        rect = self.__convert_rect(rect)
+        handle = self.__convert_rect(rect)
+        self.__insert_entry(handle)
+        return handle
+    
+    def __insert_entry(self, entry):
+        '''
+        Add a converted rectangle to the leaf it belongs in, remembering the leaf and its place
+        there in the entry.
+        @param entry: the converted rectangle (see __convert_rect)
+        '''
         #Recur to insert the rectangle
         current_node = self.__root
         for dim in range(0,3):
-            coord = self.__get_coordinate(rect, dim)+1
+            coord = self.__get_coordinate(entry, dim)+1
             #Construct the node if necessary
             if current_node[coord]==[]:
                 current_node[0]+=1
                 current_node[coord] = [0,[],[],[],[]]
             current_node = current_node[coord]
         #Final one...
-        coord = self.__get_coordinate(rect, 3)+1
+        coord = self.__get_coordinate(entry, 3)+1
         if current_node[coord]==[]:
             current_node[0]+=1
         #This final list should just have the rectangle added to it, I think...
-        current_node[coord].append(rect)
+        entry[5] = current_node[coord]
+        entry[6] = len(current_node[coord])
+        current_node[coord].append(entry)
         
     def remove_rectangle(self, rect):
         '''
@@ -99,27 +113,54 @@ class SmallRectangleTree(collider.RectangleCollider):
         if not self.__is_inside_screen(rect):
             return False
         #Convert the rectangle
-        rect = self.__convert_rect(rect)
+        entry = self.__convert_rect(rect)
         #Now we search for where the rectangle should exist...
-        #We need to hold the node stack too...
         current_node = self.__root
-        node_stack = [current_node]
         for dim in range(0,3):
-            coord = self.__get_coordinate(rect, dim)+1
-            #Construct the node if necessary
+            coord = self.__get_coordinate(entry, dim)+1
             if current_node[coord]==[]:
                 return False #does not exist
             current_node = current_node[coord]
+        coord = self.__get_coordinate(entry, 3)+1
+        #Find the rectangle in the leaf...
+        for handle in current_node[coord]:
+            if handle[4]==rect:
+                return self.remove_by_handle(handle)
+        return False #does not exist
+    
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the tree using the handle returned when it was inserted. The last rectangle
+        in the leaf is swapped into its place, so this does not search the leaf.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the tree
+        '''
+        if handle is None or handle[5] is None or handle[7]!=self.__generation:
+            return False
+        leaf = handle[5]
+        last = leaf.pop()
+        if last is not handle:
+            leaf[handle[6]] = last
+            last[6] = handle[6]
+        handle[5] = None
+        if leaf==[]:
+            self.__remove_empty_leaf(handle)
+        return True
+    
+    def __remove_empty_leaf(self, entry):
+        '''
+        Correct the tree after the leaf a rectangle was in has become empty, removing any nodes
+        left empty as a result.
+        @param entry: the converted rectangle (see __convert_rect) which was in the leaf
+        '''
+        #We need to hold the node stack...
+        current_node = self.__root
+        node_stack = [current_node]
+        for dim in range(0,3):
+            current_node = current_node[self.__get_coordinate(entry, dim)+1]
             node_stack.append(current_node)
-        coord = self.__get_coordinate(rect, 3)+1
-        if current_node[coord]==[]:
-            return False #does not exist
-        #Remove the rectangle...
-        was_removed = rect in current_node[coord]
-        if was_removed:
-            current_node[coord].remove(rect)
         #Now we need to correct for the removal...
-        removing = current_node[coord]==[]
+        removing = True
         dim = 2 #where we are in the node stack
         while removing and dim>=0:
             #Remove from the current node...
@@ -127,14 +168,46 @@ class SmallRectangleTree(collider.RectangleCollider):
             if (current_node[0]==0):
                 #We need to remove this too...
                 current_node = node_stack[dim]
-                current_node[self.__get_coordinate(rect, dim)+1] = []
+                current_node[self.__get_coordinate(entry, dim)+1] = []
                 dim-=1
             else:
                 removing = False
         #Correct for the root... (which is allowed to be empty)
         if dim==-1:
             self.__root[0]-=1
-        return was_removed
+    
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the tree with another (usually the same rectangle in a new position).
+        If the new rectangle belongs in the same leaf as the old one, it is updated in place. Otherwise
+        it is moved to its new leaf.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        if handle is None or handle[5] is None or handle[7]!=self.__generation:
+            return self.insert_rectangle(new_rect)
+        if not self.__is_inside_screen(new_rect):
+            self.remove_by_handle(handle)
+            return None
+        entry = self.__convert_rect(new_rect)
+        if self.__get_cells(entry)==self.__get_cells(handle):
+            #Same leaf, so just update it
+            handle[0:5] = entry[0:5]
+            return handle
+        self.remove_by_handle(handle)
+        handle[0:5] = entry[0:5]
+        self.__insert_entry(handle)
+        return handle
+    
+    def __get_cells(self, rect):
+        '''
+        @param rect: a converted rectangle
+        @return: the cells of the grid containing the corners of the rectangle as
+        (x_min cell,x_max cell,y_min cell,y_max cell). Rectangles with the same cells share a leaf.
+        '''
+        return (min(3,rect[0] / self.__width_divider), min(3,rect[2] / self.__width_divider),
+                min(3,rect[1] / self.__height_divider), min(3,rect[3] / self.__height_divider))
     
     def collide_rectangle(self, rect):
         '''
@@ -148,7 +221,7 @@ class SmallRectangleTree(collider.RectangleCollider):
         #Convert the rectangle
         rect = self.__convert_rect((x_min,y_min,x_max,y_max,None))
         #We need to return all rectangles on all sides in a recursive manner. We will do this recursively...
-        (x_min, y_min, x_max, y_max, _) = rect
+        (x_min, y_min, x_max, y_max) = rect[0:4]
         coord_rect = (x_max, y_max, x_min, y_min)
         return self.__collide_rectangle(coord_rect, self.__root, 0)
     
@@ -165,10 +238,9 @@ class SmallRectangleTree(collider.RectangleCollider):
         #Special case if this is the last dim...
         if dim==4:
             #This is a list of rectangles!
-            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max,
-                 (rect_org_x_min,rect_org_y_min,rect_org_x_max,rect_org_y_max,key)) in current_node:
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, org_rect, _, _, _) in current_node:
                 if rect_x_min<x_max and rect_x_max>x_min and rect_y_min<y_max and rect_y_max>y_min:
-                    res.append((rect_org_x_min, rect_org_y_min, rect_org_x_max, rect_org_y_max, key))
+                    res.append(org_rect)
             return res
         #Now for the other cases...
         coord = self.__get_coordinate(coord_rect, dim)+1
@@ -190,6 +262,75 @@ class SmallRectangleTree(collider.RectangleCollider):
                 res.extend(self.__collide_rectangle(coord_rect, current_node[max_coord], dim+1))
             return res
     
+    def collide_point(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: all of the rectangles containing the point, so colliding with the rectangle (x,y,x+1,y+1).
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return []
+        res = []
+        x_cell = min(3,x / self.__width_divider)
+        y_cell = min(3,y / self.__height_divider)
+        self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), self.__root, 0, res)
+        return res
+    
+    def is_point_colliding(self, x, y):
+        '''
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @return: true iff some rectangle in the tree contains the point (Will stop when it finds one)
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return False
+        x_cell = min(3,x / self.__width_divider)
+        y_cell = min(3,y / self.__height_divider)
+        return self.__collide_point(x, y, (x_cell,x_cell,y_cell,y_cell), self.__root, 0, None)
+    
+    def __collide_point(self, x, y, cells, current_node, dim, res):
+        '''
+        The point version of __collide_rectangle (see the large rectangle tree).
+        @param x: the x coordinate of the point
+        @param y: the y coordinate of the point
+        @param cells: the cells (x_min,x_max,y_min,y_max) to look in
+        @param current_node: the node to search
+        @param dim: the dimension in the list
+        @param res: the list to add the rectangles containing the point to, or None to stop at the first one
+        @return: true iff some rectangle (within this part of the tree) contains the point
+        '''
+        if current_node==[]:
+            return False
+        #Special case if this is the last dim...
+        if dim==4:
+            #This is a list of rectangles!
+            found = False
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, org_rect, _, _, _) in current_node:
+                if rect_x_min<=x and rect_x_max>x and rect_y_min<=y and rect_y_max>y:
+                    if res is None:
+                        return True
+                    res.append(org_rect)
+                    found = True
+            return found
+        #Now for the other cases...
+        coord = cells[dim]+1
+        #Our own quadrant first
+        found = self.__collide_point(x, y, cells, current_node[coord], dim+1, res)
+        if found and res is None:
+            return True
+        if dim % 2 == 0:
+            #This is a min coordinate, so we also look in all the quadrants less than it
+            other_coords = range(1,coord)
+        else:
+            #This is a max coordinate, so we also look in all the quadrants greater than it
+            other_coords = range(coord+1,5)
+        for other_coord in other_coords:
+            if self.__collide_point(x, y, cells, current_node[other_coord], dim+1, res):
+                found = True
+                if res is None:
+                    return True
+        return found
+    
     def is_colliding(self, rect):
         '''
         @param rect: the rectangle to check for collisions against.
@@ -203,7 +344,7 @@ class SmallRectangleTree(collider.RectangleCollider):
         #Convert the rectangle
         rect = self.__convert_rect((x_min,y_min,x_max,y_max,None))
         #We need to return all rectangles on all sides in a recursive manner. We will do this recursively...
-        (x_min, y_min, x_max, y_max, _) = rect
+        (x_min, y_min, x_max, y_max) = rect[0:4]
         coord_rect = (x_max, y_max, x_min, y_min)
         return self.__is_colliding(coord_rect, self.__root, 0)
         
@@ -219,7 +360,7 @@ class SmallRectangleTree(collider.RectangleCollider):
         #Special case if this is the last dim...
         if dim==4:
             #This is a list of rectangles!
-            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max,_) in current_node:
+            for (rect_x_min, rect_y_min, rect_x_max, rect_y_max, _, _, _, _) in current_node:
                 if rect_x_min<x_max and rect_x_max>x_min and rect_y_min<y_max and rect_y_max>y_min:
                     return True #Found one!
             return False
@@ -287,18 +428,25 @@ class SmallRectangleTree(collider.RectangleCollider):
         Convert the rectangle to one whose coordinates fit properly on the screen.
         (Assumes the rectangle is well defined)
         @param rect: the rectangle to convert
-        @return: the effective rectangle clipped to the screen
+        @return: the effective rectangle clipped to the screen, as a list
+        [x_min,y_min,x_max,y_max,rect,leaf,index,generation]. This is the form the rectangle is stored in,
+        where the leaf (None until inserted) and index record where it is in the tree, and the generation
+        is the number of times the tree had been cleared.
         '''
-        (x_min, y_min, x_max, y_max, key) = rect
-        return (max(x_min,0),
+        (x_min, y_min, x_max, y_max, _) = rect
+        return [max(x_min,0),
                 max(y_min,0),
                 min(x_max,self.__width),
                 min(y_max,self.__height),
-                (x_min, y_min, x_max, y_max, key))
+                rect,
+                None,
+                0,
+                self.__generation]
         
     def clear(self):
         '''
-        Remove all items from this rectangle tree
+        Remove all items from this rectangle tree. Handles from before this are no longer used.
         '''
         self.__root = [0,[],[],[],[]]
+        self.__generation+=1
         
\ No newline at end of file
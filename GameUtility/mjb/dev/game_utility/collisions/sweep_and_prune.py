@@ -0,0 +1,156 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import operator
+
+class _SweepEntry(object):
+    '''
+    The entry kept by the sweep and prune for each rectangle. This is also the handle returned
+    when the rectangle is inserted.
+    '''
+    __slots__ = ["x_min", "y_min", "x_max", "y_max", "rect"]
+
+class SweepAndPrune(object):
+    '''
+    The sweep and prune finds all of the pairs of colliding rectangles in one go, rather than
+    colliding each rectangle with all the others.
+
+    By rectangle, we mean a tuple of the form:
+    (x_min, y_min, x_max, y_max, key)
+
+    where the key is arbitrary and for the user only. As with the rectangle colliders, rectangles
+    are clipped to the screen (and ignored if they lie outside it).
+
+    The rectangles are kept in a list sorted by x_min. The list is kept between calls, so when the
+    rectangles have hardly moved it is already almost sorted, and re-sorting it (Python's sort is adaptive)
+    takes close to linear time. The sweep then moves along the x axis, keeping a list of the rectangles
+    whose x range has not yet ended, and checks the y ranges against those only.
+    '''
+
+    def __init__(self, size):
+        '''
+        Construct a new sweep and prune for the screen with the given size
+        @param size: the size of the screen as (width,height)
+        '''
+        (width,height) = size
+        self.__width = width
+        self.__height = height
+        #All the entries, sorted by x_min as of the last sweep
+        self.__entries = []
+        #The number of entries removed since the last sweep (they are dropped from the list lazily)
+        self.__removed = 0
+
+    def insert_rectangle(self, rect):
+        '''
+        Insert a rectangle into the sweep and prune.
+        @param rect: the rectangle to insert, which should have the form (x_min,y_min,x_max,y_max,key)
+        where key is any custom value
+        @return: a handle for the rectangle, or None if the rectangle was ignored (for being off the screen)
+        '''
+        if not self.__is_inside_screen(rect):
+            return None
+        entry = _SweepEntry()
+        self.__set_rect(entry, rect)
+        self.__entries.append(entry)
+        return entry
+
+    def remove_rectangle(self, rect):
+        '''
+        Remove a rectangle from the sweep and prune. Note that the key must also be equal
+        to the key of the rectangle you wish to remove.
+        @param rect: the rectangle to remove, which should have the form (x_min,y_min,x_max,y_max,key)
+        @return: true iff the rectangle was removed, since it was in the sweep and prune
+        '''
+        for entry in self.__entries:
+            if entry.rect is not None and entry.rect==rect:
+                return self.remove_by_handle(entry)
+        return False
+
+    def remove_by_handle(self, handle):
+        '''
+        Remove a rectangle from the sweep and prune using the handle returned when it was inserted.
+        @param handle: the handle of the rectangle to remove (None is allowed and ignored)
+        @return: true iff the rectangle was removed, since it was in the sweep and prune
+        '''
+        if handle is None or handle.rect is None:
+            return False
+        handle.rect = None
+        self.__removed+=1
+        return True
+
+    def move_rectangle(self, handle, new_rect):
+        '''
+        Replace a rectangle in the sweep and prune with another (usually the same rectangle in a new position).
+        This only updates the entry - it is moved to its place in the sorted list by the next sweep.
+        @param handle: the handle of the rectangle to replace. If None, this just inserts the new rectangle.
+        @param new_rect: the new rectangle in the form (x_min,y_min,x_max,y_max,key)
+        @return: the handle to use for the rectangle from now on (None if it was ignored)
+        '''
+        if handle is None or handle.rect is None:
+            return self.insert_rectangle(new_rect)
+        if not self.__is_inside_screen(new_rect):
+            self.remove_by_handle(handle)
+            return None
+        self.__set_rect(handle, new_rect)
+        return handle
+
+    def collide_pairs(self):
+        '''
+        @return: a list of all of the pairs of rectangles strictly colliding (overlapping by at least one
+        pixel) with each other as (rect,rect). Each pair appears once.
+        '''
+        entries = self.__entries
+        if self.__removed>0:
+            entries = [entry for entry in entries if entry.rect is not None]
+            self.__entries = entries
+            self.__removed = 0
+        #Restore the order (cheap if little has moved)
+        entries.sort(key=operator.attrgetter("x_min"))
+        #Sweep!
+        pairs = []
+        active = []
+        for entry in entries:
+            x_min = entry.x_min
+            y_min = entry.y_min
+            y_max = entry.y_max
+            still_active = []
+            for other in active:
+                if other.x_max>x_min:
+                    still_active.append(other)
+                    if other.y_min<y_max and other.y_max>y_min:
+                        pairs.append((other.rect,entry.rect))
+            still_active.append(entry)
+            active = still_active
+        return pairs
+
+    def __set_rect(self, entry, rect):
+        '''
+        Set the (clipped) coordinates of an entry
+        @param entry: the entry to update
+        @param rect: the rectangle it now holds
+        '''
+        (x_min, y_min, x_max, y_max, _) = rect
+        entry.x_min = max(x_min,0)
+        entry.y_min = max(y_min,0)
+        entry.x_max = min(x_max,self.__width)
+        entry.y_max = min(y_max,self.__height)
+        entry.rect = rect
+
+    def __is_inside_screen(self, rect):
+        '''
+        @param rect: the rectangle to check
+        @return: true iff the rectangle is actually inside the screen (at least in part)
+        Also catches zero width or zero height
+        '''
+        (x_min, y_min, x_max, y_max, _) = rect
+        return x_max>0 and y_max>0 and x_min<self.__width and y_min<self.__height and x_max!=x_min and y_max!=y_min
+
+    def clear(self):
+        '''
+        Remove all rectangles from the sweep and prune
+        '''
+        self.__entries = []
+        self.__removed = 0
@@ -0,0 +1,208 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import atexit
+import sys
+import thread
+import threading
+import timeit
+import traceback
+
+class CostTracker(object):
+    '''
+    The cost tracker times the callbacks made by the game loop (listeners and drawers), and puts
+    the time down to the object called, so that it is easy to see which objects are expensive.
+    The costs can be reported for each object, or added up for each class of object.
+
+    The tracker can also watch for callbacks which run for longer than a budget. A watchdog thread
+    then takes a sample of the stack of the game loop while the callback is still running (so that it is
+    clear where the time is going) and logs it.
+
+    Objects which only pass calls on (like the drawers of drawable capabilities) can set _cost_owner
+    to the object the cost should be put down to instead.
+    '''
+
+    def __init__(self, budget=None, log_handler=None):
+        '''
+        Construct a new cost tracker
+        @param budget: None by default, otherwise the time in seconds that a single callback may take
+        before a sample of the stack is logged
+        @param log_handler: None by default to print to standard error, otherwise a function accepting
+        each message to log
+        '''
+        self.__budget = budget
+        self.__log_handler = log_handler
+        #From (kind,id(owner)) to [kind,name,class_name,calls,total,max]
+        self.__costs = {}
+        #From the id of each thread to its callback in progress as (kind,owner,start,thread_id)
+        self.__current = {}
+        #The callback in progress which has already been logged
+        self.__logged = None
+        self.__stopped = threading.Event()
+        self.__watchdog = None
+        if budget!=None:
+            self.__watchdog = threading.Thread(target=self.__watch)
+            self.__watchdog.daemon = True
+            self.__watchdog.start()
+            #Stop it cleanly rather than as the interpreter shuts down
+            atexit.register(self.dispose)
+
+    def call(self, kind, owner, function, *args):
+        '''
+        Call a function, putting the time it takes down to an owner
+        @param kind: the kind of callback (e.g. "frame_listener")
+        @param owner: the object the cost should be put down to
+        @param function: the function to call
+        @param args: the arguments to call the function with
+        @return: whatever the function returns
+        '''
+        owner = getattr(owner, "_cost_owner", owner)
+        start = timeit.default_timer()
+        thread_id = thread.get_ident()
+        current = (kind,owner,start,thread_id)
+        self.__current[thread_id] = current
+        try:
+            return function(*args)
+        finally:
+            elapsed = timeit.default_timer()-start
+            self.__current.pop(thread_id,None)
+            self.__record(kind,owner,elapsed)
+            if self.__budget!=None and elapsed>self.__budget and not self.__logged is current:
+                #Too quick for the watchdog to catch it
+                self.__log(CostTracker.__describe(kind,owner) + " took " + CostTracker.__format_time(elapsed))
+
+    def __record(self, kind, owner, elapsed):
+        '''
+        Add the time of a callback to the costs of its owner
+        @param kind: the kind of callback
+        @param owner: the object the cost is put down to
+        @param elapsed: the time the callback took
+        '''
+        key = (kind,id(owner))
+        cost = self.__costs.get(key)
+        if cost==None:
+            cost = [kind,CostTracker.__get_name(owner),CostTracker.__get_class_name(owner),0,0.0,0.0]
+            self.__costs[key] = cost
+        cost[3]+=1
+        cost[4]+=elapsed
+        if elapsed>cost[5]:
+            cost[5] = elapsed
+
+    def get_costs(self, by_class=False):
+        '''
+        @param by_class: false by default, set to true to add the costs up for each class
+        @return: a list of (kind,name,calls,total_time,max_time), most expensive (in total) first.
+        The name is of the object, or of the class if adding up by class.
+        '''
+        costs = self.__costs.values()
+        if by_class:
+            classes = {}
+            for (kind,_,class_name,calls,total,maximum) in costs:
+                key = (kind,class_name)
+                if key in classes:
+                    (_,_,class_calls,class_total,class_maximum) = classes[key]
+                    classes[key] = (kind,class_name,class_calls+calls,class_total+total,max(class_maximum,maximum))
+                else:
+                    classes[key] = (kind,class_name,calls,total,maximum)
+            result = classes.values()
+        else:
+            result = [(kind,name,calls,total,maximum) for (kind,name,_,calls,total,maximum) in costs]
+        result.sort(key=lambda cost: cost[3], reverse=True)
+        return result
+
+    def get_top_offenders(self, count=10, by_class=False):
+        '''
+        @param count: 10 by default, the number of offenders to return
+        @param by_class: false by default, set to true to add the costs up for each class
+        @return: the most expensive (in total) of get_costs
+        '''
+        return self.get_costs(by_class)[0:count]
+
+    def format_report(self, count=10, by_class=False):
+        '''
+        @param count: 10 by default, the number of offenders to report
+        @param by_class: false by default, set to true to add the costs up for each class
+        @return: a report of the top offenders as a string, one per line
+        '''
+        lines = ["%-16s %-40s %8s %10s %10s %10s" % ("kind","name","calls","total ms","mean ms","max ms")]
+        for (kind,name,calls,total,maximum) in self.get_top_offenders(count,by_class):
+            lines.append("%-16s %-40s %8d %10.2f %10.3f %10.3f" %
+                         (kind,name,calls,total*1000,total*1000/calls,maximum*1000))
+        return "\n".join(lines)
+
+    def reset(self):
+        '''
+        Forget all of the costs so far
+        '''
+        self.__costs = {}
+
+    def dispose(self):
+        '''
+        Stop the watchdog (if there is one). The tracker should not be used again.
+        '''
+        self.__stopped.set()
+        if self.__watchdog!=None and self.__watchdog.is_alive() and threading.current_thread()!=self.__watchdog:
+            self.__watchdog.join()
+
+    def __watch(self):
+        '''
+        Run by the watchdog thread: log a sample of the stack of any callback over budget
+        '''
+        interval = max(self.__budget/4.0,0.001)
+        while not self.__stopped.wait(interval):
+            for current in self.__current.values():
+                if self.__logged is current:
+                    continue
+                (kind,owner,start,thread_id) = current
+                elapsed = timeit.default_timer()-start
+                if elapsed<=self.__budget:
+                    continue
+                frame = sys._current_frames().get(thread_id)
+                #Make sure it is still the same callback
+                if frame==None or not self.__current.get(thread_id) is current:
+                    continue
+                self.__logged = current
+                self.__log(CostTracker.__describe(kind,owner) + " has been running for " +
+                           CostTracker.__format_time(elapsed) + ":\n" + "".join(traceback.format_stack(frame)))
+
+    def __log(self, message):
+        '''
+        @param message: the message to log
+        '''
+        if self.__log_handler==None:
+            print >> sys.stderr, message
+        else:
+            self.__log_handler(message)
+
+    @staticmethod
+    def __describe(kind, owner):
+        '''
+        @return: a description of a callback for the log
+        '''
+        return kind + " " + CostTracker.__get_name(owner)
+
+    @staticmethod
+    def __format_time(elapsed):
+        '''
+        @return: the time formatted in milliseconds
+        '''
+        return "%.1f ms" % (elapsed*1000)
+
+    @staticmethod
+    def __get_class_name(owner):
+        '''
+        @return: the name of the class of the owner (or of the function, for functions)
+        '''
+        if hasattr(owner, "__call__") and hasattr(owner, "__name__") and not isinstance(owner, type):
+            return getattr(owner, "__name__")
+        return owner.__class__.__name__
+
+    @staticmethod
+    def __get_name(owner):
+        '''
+        @return: a name for the owner, unique while it is alive
+        '''
+        return "%s@%x" % (CostTracker.__get_class_name(owner),id(owner))
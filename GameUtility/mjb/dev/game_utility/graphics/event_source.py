@@ -0,0 +1,102 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import pickle
+import pygame
+import pygame.locals
+
+class EventSource(object):
+    '''
+    An event source gives the screen the input events for each frame. By default, these are
+    the real events from pygame.
+    '''
+
+    def get_events(self, frame):
+        '''
+        @param frame: the number of the frame (counting from 0)
+        @return: the list of events to handle in the frame
+        '''
+        return pygame.event.get()
+
+class ScriptedEventSource(EventSource):
+    '''
+    Gives the events from a script, so that a game can be played (or replayed) the same way each time.
+    '''
+
+    def __init__(self, script):
+        '''
+        Construct a new scripted event source
+        @param script: a list of (frame,event_type,attributes), where the attributes are a dictionary
+        for the event (as for pygame.event.Event). The events in each frame are given in the order of the script.
+        '''
+        self.__script = list(script)
+        self.__frames = {}
+        for (frame,event_type,attributes) in self.__script:
+            self.__frames.setdefault(frame,[]).append((event_type,attributes))
+
+    def get_events(self, frame):
+        return [pygame.event.Event(event_type,attributes) for (event_type,attributes) in self.__frames.get(frame,[])]
+
+    def get_script(self):
+        '''
+        @return: the script, as given
+        '''
+        return self.__script
+
+    @staticmethod
+    def load(file_name):
+        '''
+        @param file_name: the name of a file saved by an event recorder
+        @return: a scripted event source replaying the recording
+        '''
+        with open(file_name,"rb") as script_file:
+            return ScriptedEventSource(pickle.load(script_file))
+
+class EventRecorder(EventSource):
+    '''
+    Passes on the events from another source, recording those the screen handles as a script
+    (see ScriptedEventSource).
+    '''
+
+    #The types of event the screen handles
+    __RECORDED_TYPES = frozenset([pygame.locals.QUIT,pygame.locals.KEYDOWN,pygame.locals.KEYUP,
+                                  pygame.locals.MOUSEMOTION,pygame.locals.MOUSEBUTTONDOWN,
+                                  pygame.locals.MOUSEBUTTONUP])
+    #The types of attribute which are recorded (others, like windows, are not kept)
+    __RECORDED_ATTRIBUTE_TYPES = (int,long,float,bool,str,unicode,tuple,type(None))
+
+    def __init__(self, source=None):
+        '''
+        Construct a new event recorder
+        @param source: None by default for the real events, otherwise the event source to record
+        '''
+        if source==None:
+            source = EventSource()
+        self.__source = source
+        self.__script = []
+
+    def get_events(self, frame):
+        events = self.__source.get_events(frame)
+        for event in events:
+            if event.type in EventRecorder.__RECORDED_TYPES:
+                attributes = dict((name,value) for (name,value) in event.dict.items()
+                                  if isinstance(value,EventRecorder.__RECORDED_ATTRIBUTE_TYPES))
+                self.__script.append((frame,event.type,attributes))
+        return events
+
+    def get_script(self):
+        '''
+        @return: the script recorded so far (see ScriptedEventSource)
+        '''
+        return self.__script
+
+    def save(self, file_name):
+        '''
+        Save the script recorded so far, to load with ScriptedEventSource.load
+        @param file_name: the name of the file to save to
+        '''
+        with open(file_name,"wb") as script_file:
+            pickle.dump(self.__script,script_file,pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,150 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import array
+import math
+import thread
+import timeit
+
+class FrameProfiler(object):
+    '''
+    The frame profiler times each phase of the game loop, and keeps the times for the last
+    few frames so that percentiles can be taken over them.
+
+    The game loop starts each frame, then marks the end of each phase as it goes. The time since
+    the last mark (or the start of the frame) is added to the phase marked, so a phase can be marked
+    many times in a frame (e.g. once per event). Any time not marked otherwise is put down to "other".
+
+    The times are kept in a ring buffer allocated up front, so profiling does not allocate as frames pass.
+    All times are in seconds. Only the thread which started the frame can mark it (marks from other threads,
+    like a render worker, are ignored). When pipelined, the time the game loop spends waiting for the render
+    worker to finish the last picture is put down to "render_wait".
+    '''
+
+    #The phases of the game loop, in order
+    PHASES = ("event_wait",
+              "keyboard_events",
+              "mouse_motion_events",
+              "mouse_button_events",
+              "frame_listeners",
+              "render_wait",
+              "dirty_computation",
+              "composition",
+              "blit",
+              "display_update",
+              "clock_wait",
+              "other")
+    #The name used for the time of the whole frame
+    FRAME = "frame"
+
+    def __init__(self, frames=600):
+        '''
+        Construct a new frame profiler
+        @param frames: 600 by default, the number of frames to keep the times of
+        @raise ValueError: if the number of frames is less than 1
+        '''
+        if frames<1:
+            raise ValueError("The profiler must keep at least one frame")
+        self.__frames = frames
+        #Each frame takes a row of the whole frame time followed by each phase
+        self.__row_length = len(FrameProfiler.PHASES)+1
+        self.__columns = {FrameProfiler.FRAME : 0}
+        for index in range(0,len(FrameProfiler.PHASES)):
+            self.__columns[FrameProfiler.PHASES[index]] = index+1
+        self.__samples = array.array('d',[0.0])*(frames*self.__row_length)
+        #The row the next frame is written to, and the number of frames recorded
+        self.__next_row = 0
+        self.__count = 0
+        #The times for the frame in progress (indexed like the rows)
+        self.__current = [0.0]*self.__row_length
+        self.__zeros = [0.0]*self.__row_length
+        self.__frame_start = None
+        self.__last_mark = None
+        self.__thread_id = None
+
+    def start_frame(self):
+        '''
+        Start timing a new frame (any frame in progress is forgotten)
+        '''
+        self.__current[:] = self.__zeros
+        self.__thread_id = thread.get_ident()
+        self.__frame_start = self.__last_mark = timeit.default_timer()
+
+    def mark(self, phase):
+        '''
+        Put the time since the last mark down to a phase. Has no effect outside a frame.
+        @param phase: the phase, one of PHASES
+        '''
+        if self.__last_mark is None or thread.get_ident()!=self.__thread_id:
+            return
+        now = timeit.default_timer()
+        self.__current[self.__columns[phase]] += now-self.__last_mark
+        self.__last_mark = now
+
+    def end_frame(self):
+        '''
+        Finish timing the frame in progress, and record it (overwriting the oldest if the buffer is full).
+        Has no effect outside a frame.
+        '''
+        if self.__last_mark is None:
+            return
+        self.mark("other")
+        current = self.__current
+        current[0] = self.__last_mark-self.__frame_start
+        start = self.__next_row*self.__row_length
+        self.__samples[start:start+self.__row_length] = array.array('d',current)
+        self.__next_row = (self.__next_row+1)%self.__frames
+        self.__count = min(self.__count+1,self.__frames)
+        self.__frame_start = self.__last_mark = None
+
+    def get_frame_count(self):
+        '''
+        @return: the number of frames recorded (at most the number of frames kept)
+        '''
+        return self.__count
+
+    def get_samples(self, phase=FRAME):
+        '''
+        @param phase: FRAME by default for the time of the whole frame, otherwise one of PHASES
+        @return: the list of times recorded for the phase, oldest first
+        '''
+        column = self.__columns[phase]
+        row_length = self.__row_length
+        first = (self.__next_row-self.__count)%self.__frames
+        samples = self.__samples
+        return [samples[((first+index)%self.__frames)*row_length+column] for index in range(0,self.__count)]
+
+    def get_percentile(self, percentile, phase=FRAME):
+        '''
+        @param percentile: the percentile (between 0 and 100)
+        @param phase: FRAME by default for the time of the whole frame, otherwise one of PHASES
+        @return: the time at that percentile (nearest rank), or None if no frames have been recorded
+        '''
+        return FrameProfiler.__get_percentiles(sorted(self.get_samples(phase)), (percentile,))[0]
+
+    def get_statistics(self, percentiles=(50,95,99)):
+        '''
+        @param percentiles: (50,95,99) by default, the percentiles to take
+        @return: a dictionary from FRAME and each of the PHASES to a tuple of the times at each percentile
+        (None if no frames have been recorded)
+        '''
+        statistics = {}
+        for phase in (FrameProfiler.FRAME,)+FrameProfiler.PHASES:
+            statistics[phase] = FrameProfiler.__get_percentiles(sorted(self.get_samples(phase)), percentiles)
+        return statistics
+
+    @staticmethod
+    def __get_percentiles(sorted_samples, percentiles):
+        '''
+        @param sorted_samples: a sorted list of times
+        @param percentiles: the percentiles to take
+        @return: a tuple of the times at each percentile (nearest rank)
+        '''
+        count = len(sorted_samples)
+        if count==0:
+            return tuple(None for _ in percentiles)
+        return tuple(sorted_samples[min(max(int(math.ceil(percentile*count/100.0))-1,0),count-1)]
+                     for percentile in percentiles)
@@ -8,14 +8,17 @@ Created on 5 Jul 2014
 Here's how it is going to work:
 
 We will divide the screen into 32 * 16 pieces (where the 32 divides the width, and the 16 divides the height).
-We will have one rectangle tree to be initialised with all of these rectangles. Call this rectangle tree
-the "Screen Tree"
+Which pieces (cells) need updating is kept in a grid which is a 32 * 16 boolean array (a bytearray).
 
-(Note that the exact number of ways we divide the screen may be adjusted according to stress tests...)
+(The number of ways we divide the screen can be given when initialising. It can also be adapted while running:
+each grid is measured by the pixels it redraws plus a fixed overhead per update rectangle, over a window of
+frames, and we move to a neighbouring grid - doubling or halving the divisions - whenever it is cheaper.
+Once no neighbour is cheaper we stay put, only trying them again when the cost drifts or after a back-off.
+Changing the grid is only done between frames, when no cells are waiting to be updated.)
 
-When a rectangle for updating is registered, we find all the rectangles colliding with it in the Screen Tree.
-As these rectangles are found, we also remove them from the tree, and remember them in a grid
-which is a 32 * 16 boolean array.
+When a rectangle for updating is registered, we look up the range of cells it covers directly (with
+tables from pixel coordinates to cells), and mark them in the grid. Only the cells on the edge of the range,
+which the rectangle may only partly cover, are checked against the inner rectangles.
 
 Once all of the updates are registered (with the above process repeated), we will compute the largest rectangles
 filling the grid formed effectively by the 32 * 16 boolean array (the items being true must be filled).
@@ -35,7 +38,7 @@ When items want to register their interest in parts of the screen, they are adde
 
 Efficiency note:
 
-The use of lots of rectangles dividing the screen in the Screen Tree is an easier way to compute the largest
+The use of lots of cells dividing the screen is an easier way to compute the largest
 rectangles. However, it would be better if we could directly merge the rectangles somehow so that we don't create
 lots of small rectangles inside a large rectangle. Unfortunately, this seems to be hard in practice...
 
@@ -50,9 +53,9 @@ from mjb.dev.game_utility.graphics.screen import _PictureHandler, Screen
 import pygame
 import threading
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree
-from mjb.dev.game_utility.collisions.small_rectangle_tree import SmallRectangleTree
 from mjb.dev.game_utility.utility.rectangle_filler import RectangleFiller
 from mjb.dev.game_utility.collisions.screen_collider import ScreenCollider
+from mjb.dev.game_utility.world import World
 
 class Drawer(object):
     '''
@@ -70,7 +73,8 @@ class Drawer(object):
         on the surface provided. No interaction with the picture handler is allowed
         if you are drawing - this will cause deadlock (no registrations or deregistrations)
         @param top_left: the top left coordinate of the surface as it will be blitted to the screen
-        (Surface begins at 0,0)
+        (Surface begins at 0,0). This is (0,0) if the picture is composed in place, in which case the
+        surface is the picture itself.
         @param surface: the surface to drawn on. Other than drawing itself, the surface should
         not be tampered with. Get the clip area to see the rectangle in which the drawing is
         actually occurring if you can exploit that for efficiency.
@@ -109,6 +113,12 @@ class _DummyPictureHandler(_PictureHandler):
     def get_picture(self):
         return PictureHandler._get_picture()
     
+    def has_updates(self):
+        return PictureHandler._has_updates()
+    
+    def lock_picture(self):
+        PictureHandler._lock_picture()
+    
     def picture_drawn(self):
         PictureHandler._picture_drawn()
 
@@ -130,38 +140,89 @@ class PictureHandler(object):
     __picture = None
     #A lock for the picture while it is being modified.
     __picture_lock = threading.Semaphore()
+    #Whether the lock was taken (by lock_picture) before the picture was asked for
+    __picture_locked = False
+    #Whether the drawers draw straight onto the picture (clipped), rather than onto slabs
+    __compose_in_place = False
+    #The slabs to draw on, kept between frames. From the (width,height) rounded up to powers of two
+    #to a surface of that size
+    __slab_pool = {}
     
     #The number of width divisions along the screen
-    __WIDTH_DIVISION = 32;
+    __width_division = 32
     #The number of height divisions along the screen
-    __HEIGHT_DIVISION = 16;
+    __height_division = 16
     
-    #The list of rectangles to fill the screen rectangle tree
-    __SCREEN_RECTANGLES = []
+    #Whether or not the grid is adapted to what is being drawn
+    __adaptive = False
+    #The number of frames (with updates) each grid is measured over when adapting
+    __ADAPTIVE_WINDOW = 60
+    #The cost of each update rectangle (for the blit, the update and collecting the drawers) as a number
+    #of pixels composed
+    __RECT_OVERHEAD = 4096
+    #The smallest width or height of a cell the adaptive grid will use
+    __MIN_CELL_SIZE = 8
+    #The cost and number of frames measured with the current grid
+    __adaptive_cost = 0
+    __adaptive_frames = 0
+    #The grid being compared against as ((width_division,height_division),average cost), or None if the
+    #current grid is being measured as the one to compare against
+    __adaptive_best = None
+    #The grids next to the best one which have not been tried yet
+    __adaptive_untried = []
+    #Whether the best grid has beaten all of its neighbours, so the grid is left as it is
+    __adaptive_settled = False
+    #The number of windows measured since settling, and the number to wait before trying the neighbours
+    #again (doubled each time none of them is better)
+    __adaptive_settled_windows = 0
+    __adaptive_backoff = 8
+    __MIN_ADAPTIVE_BACKOFF = 8
+    __MAX_ADAPTIVE_BACKOFF = 256
+    #How far (as a fraction) the cost of the settled grid can drift from its average before the
+    #neighbours are tried again straight away
+    __ADAPTIVE_DRIFT = 0.25
     
     #Storing the conversion back to the screen coordinates
     __MIN_X_COORD_SCREEN_CONVERSION = []
     __MAX_X_COORD_SCREEN_CONVERSION = []
     __MIN_Y_COORD_SCREEN_CONVERSION = []
     __MAX_Y_COORD_SCREEN_CONVERSION = []
+    #And from the screen coordinates to the grid (indexed by pixel)
+    __X_CELL_CONVERSION = []
+    __Y_CELL_CONVERSION = []
     
-    #The screen rectangle tree (divides the screen up into a grid)
-    __screen_rectangle_tree = None
+    #The cells of the grid needing an update, in column major order (the cell (x,y) is at x*height+y)
+    __dirty_cells = None
     #The picture rectangle tree
     __picture_rectangle_tree = None
-    #The rectangles that need to be added to the tree...
-    __screen_rectangles_to_add = []
     
     @staticmethod
-    def initialise():
+    def initialise(compose_in_place=False, width_division=32, height_division=16, adaptive=False):
         '''
         Initialise the picture handler. This should be done strictly after the screen has been
         initialised, and strictly before any requests are made to the picture handler.
         This should only be called once.
         Note that the screen should be at least 32 * 32 pixels.
+        @param compose_in_place: false by default, in which case each area to update is drawn on a slab
+        (a surface of its own, at (0,0)) which is then blitted to the picture. The slabs are kept between
+        frames, so no surfaces are made once they have all been made. Set to true to have the drawers draw
+        straight onto the picture instead, clipped to the area being updated (with a top left of (0,0)).
+        This saves the blit, but every drawer must draw relative to the top left it is given.
+        @param width_division: 32 by default, the number of cells the width of the screen is divided into
+        for working out which areas need updating. Smaller cells mean less is redrawn, but there are more
+        (smaller) areas to update.
+        @param height_division: 16 by default, the same for the height of the screen
+        @param adaptive: false by default, set to true to adapt the number of divisions while running.
+        Each grid is measured by the pixels composed plus an overhead for each area updated, averaged over
+        a window of frames, and the grid moves to whichever neighbouring grid (doubling or halving the
+        divisions) costs less.
+        @raise ValueError: if the divisions are not between 1 and the width or height of the screen
         '''
         if PictureHandler.__initialised:
             raise ValueError("Cannot initialise the picture handler more than once")
+        (screen_width,screen_height) = Screen.get_screen_size()
+        if width_division<1 or height_division<1 or width_division>screen_width or height_division>screen_height:
+            raise ValueError("The divisions must be between 1 and the size of the screen")
         #Remember some stats about the screen
         PictureHandler.__background_colour = Screen.get_background_colour()
         PictureHandler.__size = Screen.get_screen_size()
@@ -169,23 +230,42 @@ class PictureHandler(object):
         PictureHandler.__picture = pygame.Surface(PictureHandler.__size)
         PictureHandler.__picture = PictureHandler.__picture.convert()
         PictureHandler.__picture.fill(PictureHandler.__background_colour)
+        PictureHandler.__compose_in_place = compose_in_place
+        PictureHandler.__adaptive = adaptive
         #Assign self as the picture handler
         Screen.set_picture_handler(PictureHandler.__handler)
         #Initialise the grid mechanism
-        PictureHandler.__initialise_grid()
+        PictureHandler.__initialise_grid(width_division, height_division)
+        #Finally set up the picture rectangle tree...
+        PictureHandler.__picture_rectangle_tree = ScreenCollider(
+            #Use a large rectangle tree to hold the picture
+            LargeRectangleTree(PictureHandler.__size),
+            #Extract the inner rectangles from the drawer
+            lambda (a,b,c,d,drawer): drawer.get_inner_shape()
+            )
         #Remember we did this!
         PictureHandler.__initialised = True
         
     @staticmethod
-    def __initialise_grid():
+    def get_grid_division():
+        '''
+        @return: the number of cells the screen is currently divided into for updates, as
+        (width_division,height_division)
+        '''
+        return (PictureHandler.__width_division,PictureHandler.__height_division)
+        
+    @staticmethod
+    def __initialise_grid(width_div, height_div):
         '''
-        Populates the grid rectangle tree and sets the "arrays" (default dictionaries)
+        Sets up the grid of cells and the "arrays" converting to and from it. No cells may be waiting
+        to be updated (they are forgotten).
+        @param width_div: the number of width divisions along the screen
+        @param height_div: the number of height divisions along the screen
         '''
         #Firstly, figure out the width and height dividers again...
         (screen_width,screen_height) = PictureHandler.__size
-        #For convenience
-        width_div = PictureHandler.__WIDTH_DIVISION
-        height_div = PictureHandler.__HEIGHT_DIVISION
+        PictureHandler.__width_division = width_div
+        PictureHandler.__height_division = height_div
         #Now fill the arrays...
         #Divide by the width
         width_dividers = []
@@ -204,74 +284,168 @@ class PictureHandler(object):
         #For convenience:
         width_dividers.append(screen_width) #plus one because we consider being >= to be in the sector
         height_dividers.append(screen_height)
-        #Now calculate the rectangles...
-        for x in range(0,width_div):
-            for y in range(0,height_div):
-                #Figure out the rectangle in its (x_min,y_min,x_max,y_max) form
-                x_min = width_dividers[x]
-                x_max = width_dividers[x+1]
-                y_min = height_dividers[y]
-                y_max = height_dividers[y+1]
-                #Use the key to remember the coordinates
-                rect = (x_min,y_min,x_max,y_max,(x,y))
-                PictureHandler.__SCREEN_RECTANGLES.append(rect)
-        
         #We will receive the rectangle coordinates, and would like to know where they fit
         #in the grid. We store this for speed
+        PictureHandler.__MIN_X_COORD_SCREEN_CONVERSION = []
+        PictureHandler.__MAX_X_COORD_SCREEN_CONVERSION = []
+        PictureHandler.__MIN_Y_COORD_SCREEN_CONVERSION = []
+        PictureHandler.__MAX_Y_COORD_SCREEN_CONVERSION = []
+        PictureHandler.__X_CELL_CONVERSION = []
+        PictureHandler.__Y_CELL_CONVERSION = []
         for x in range(0,width_div):
             PictureHandler.__MIN_X_COORD_SCREEN_CONVERSION.append(width_dividers[x])
             PictureHandler.__MAX_X_COORD_SCREEN_CONVERSION.append(width_dividers[x+1])
         for y in range(0,height_div):
             PictureHandler.__MIN_Y_COORD_SCREEN_CONVERSION.append(height_dividers[y])
             PictureHandler.__MAX_Y_COORD_SCREEN_CONVERSION.append(height_dividers[y+1])
-        #Fill the tree
-        PictureHandler.__screen_rectangles_to_add = PictureHandler.__SCREEN_RECTANGLES
-        PictureHandler.__screen_rectangle_tree = ScreenCollider(
-            #Use a small rectangle tree for the screen itself
-            SmallRectangleTree(PictureHandler.__size),
-            #These rectangles are plain old big rectangles.
-            lambda _: ([],None)
-            )
-        #Fill it
-        PictureHandler.__fill_screen_tree()
-        PictureHandler.__screen_rectangles_to_add = [] #don't update on this...
-        #Finally set up the picture rectangle tree...
-        PictureHandler.__picture_rectangle_tree = ScreenCollider(
-            #Use a large rectangle tree to hold the picture
-            LargeRectangleTree(PictureHandler.__size),
-            #Extract the inner rectangles from the drawer
-            lambda (a,b,c,d,drawer): drawer.get_inner_shape()
-            )
-        
+        #...and the other way
+        for x in range(0,width_div):
+            PictureHandler.__X_CELL_CONVERSION.extend([x]*(width_dividers[x+1]-width_dividers[x]))
+        for y in range(0,height_div):
+            PictureHandler.__Y_CELL_CONVERSION.extend([y]*(height_dividers[y+1]-height_dividers[y]))
+        #Nothing needs updating yet
+        PictureHandler.__dirty_cells = bytearray(width_div*height_div)
+    
+    @staticmethod
+    def __adapt_grid(cost):
+        '''
+        Measure the cost of a frame for the adaptive grid, and move to another grid when it is
+        time to (hill climbing). This must be called when no cells are waiting to be updated.
+        Once no neighbour beats the best grid, the grid settles on it. The neighbours are only tried again
+        when the cost of the best grid drifts from its average, or after a wait which doubles each time
+        they all lose again.
+        @param cost: the cost of the frame (see initialise)
+        '''
+        PictureHandler.__adaptive_cost+=cost
+        PictureHandler.__adaptive_frames+=1
+        if PictureHandler.__adaptive_frames<PictureHandler.__ADAPTIVE_WINDOW:
+            return
+        division = PictureHandler.get_grid_division()
+        average = PictureHandler.__adaptive_cost/float(PictureHandler.__adaptive_frames)
+        PictureHandler.__adaptive_cost = 0
+        PictureHandler.__adaptive_frames = 0
+        best = PictureHandler.__adaptive_best
+        if PictureHandler.__adaptive_settled:
+            PictureHandler.__adaptive_settled_windows+=1
+            if abs(average-best[1])>best[1]*PictureHandler.__ADAPTIVE_DRIFT:
+                #What is drawn has changed - start again from here
+                PictureHandler.__adaptive_backoff = PictureHandler.__MIN_ADAPTIVE_BACKOFF
+            elif PictureHandler.__adaptive_settled_windows<PictureHandler.__adaptive_backoff:
+                return
+            else:
+                #(Reset if a better grid is found)
+                PictureHandler.__adaptive_backoff = min(PictureHandler.__adaptive_backoff*2,
+                                                        PictureHandler.__MAX_ADAPTIVE_BACKOFF)
+            PictureHandler.__adaptive_settled = False
+            best = None
+        if best==None or average<best[1]:
+            if best!=None:
+                #A better grid was found, so things are worth trying again sooner
+                PictureHandler.__adaptive_backoff = PictureHandler.__MIN_ADAPTIVE_BACKOFF
+            #This grid is the one to beat now - try its neighbours (other than the one it beat)
+            PictureHandler.__adaptive_best = (division,average)
+            PictureHandler.__adaptive_untried = [neighbour for neighbour in
+                                                 PictureHandler.__get_neighbouring_grids(division)
+                                                 if best==None or neighbour!=best[0]]
+        if PictureHandler.__adaptive_untried:
+            PictureHandler.__initialise_grid(*PictureHandler.__adaptive_untried.pop())
+            return
+        #No neighbour was better - settle on the best grid
+        if PictureHandler.__adaptive_best[0]!=division:
+            PictureHandler.__initialise_grid(*PictureHandler.__adaptive_best[0])
+        PictureHandler.__adaptive_settled = True
+        PictureHandler.__adaptive_settled_windows = 0
+    
     @staticmethod
-    def __fill_screen_tree():
+    def __get_neighbouring_grids(division):
         '''
-        Fill the rectangle tree for the screen (not the images)
+        @param division: a grid as (width_division,height_division)
+        @return: a list of the grids with the width and/or height division doubled or halved, which
+        keep the cells no smaller than the minimum cell size
         '''
-        for rect in PictureHandler.__screen_rectangles_to_add:
-            PictureHandler.__screen_rectangle_tree.insert_rectangle(rect)
-        #Really simple
-    
+        (width_div,height_div) = division
+        (screen_width,screen_height) = PictureHandler.__size
+        min_size = PictureHandler.__MIN_CELL_SIZE
+        neighbours = []
+        for (width_factor,height_factor) in [(2,2),(0.5,0.5),(2,1),(0.5,1),(1,2),(1,0.5)]:
+            new_width_div = int(width_div*width_factor)
+            new_height_div = int(height_div*height_factor)
+            if (new_width_div>=1 and new_height_div>=1 and
+                screen_width/new_width_div>=min_size and screen_height/new_height_div>=min_size):
+                neighbours.append((new_width_div,new_height_div))
+        #(popped from the back)
+        neighbours.reverse()
+        return neighbours
+        
     @staticmethod
     def __add_to_screen(drawer):
         '''
         Add a given drawer to the screen
         @param drawer: the drawer to add
         '''
-        rect = drawer.get_bounding_rectangle()
-        #Add the rectangle to the screen rectangle tree by colliding it first
-        #TODO REMOVE print("Adding rectangle " + str(rect))
+        (x_min,y_min,x_max,y_max) = drawer.get_bounding_rectangle()
+        #Clip it to the screen
+        (screen_width,screen_height) = PictureHandler.__size
+        clipped_x_min = max(x_min,0)
+        clipped_y_min = max(y_min,0)
+        clipped_x_max = min(x_max,screen_width)
+        clipped_y_max = min(y_max,screen_height)
+        if clipped_x_min>=clipped_x_max or clipped_y_min>=clipped_y_max:
+            return
+        #The range of cells it covers
+        cell_x_min = PictureHandler.__X_CELL_CONVERSION[clipped_x_min]
+        cell_y_min = PictureHandler.__Y_CELL_CONVERSION[clipped_y_min]
+        cell_x_max = PictureHandler.__X_CELL_CONVERSION[clipped_x_max-1]
+        cell_y_max = PictureHandler.__Y_CELL_CONVERSION[clipped_y_max-1]
         (rect_list,collider) = drawer.get_inner_shape()
-        collided_rects = PictureHandler.__screen_rectangle_tree.collide_rectangle(
-            rect,rect_list,collider)
-        #TODO REMOVE print("Got collided rectangles " + str(collided_rects))
-        #Now remove the collided rectangles
-        for rect in collided_rects:
-            was_removed = PictureHandler.__screen_rectangle_tree.remove_rectangle(rect)
-            if was_removed:
-                PictureHandler.__screen_rectangles_to_add.append(rect)
-        #Done!
-        #TODO REMOVE print("Got update list as " + str(PictureHandler.__screen_rectangles_to_add))
+        dirty_cells = PictureHandler.__dirty_cells
+        height = len(PictureHandler.__MIN_Y_COORD_SCREEN_CONVERSION)
+        if rect_list==[]:
+            #Mark the whole range
+            for x in range(cell_x_min,cell_x_max+1):
+                dirty_cells[x*height+cell_y_min:x*height+cell_y_max+1] = bytearray([1])*(cell_y_max-cell_y_min+1)
+            return
+        #The cells entirely inside one of the inner rectangles are covered, so mark those without checking
+        x_cell_conversion = PictureHandler.__X_CELL_CONVERSION
+        y_cell_conversion = PictureHandler.__Y_CELL_CONVERSION
+        min_x_coords = PictureHandler.__MIN_X_COORD_SCREEN_CONVERSION
+        min_y_coords = PictureHandler.__MIN_Y_COORD_SCREEN_CONVERSION
+        max_x_coords = PictureHandler.__MAX_X_COORD_SCREEN_CONVERSION
+        max_y_coords = PictureHandler.__MAX_Y_COORD_SCREEN_CONVERSION
+        for (inner_x_min,inner_y_min,inner_x_max,inner_y_max) in rect_list:
+            inner_x_min = max(x_min+inner_x_min,clipped_x_min)
+            inner_y_min = max(y_min+inner_y_min,clipped_y_min)
+            inner_x_max = min(x_min+inner_x_max,clipped_x_max)
+            inner_y_max = min(y_min+inner_y_max,clipped_y_max)
+            if inner_x_min>=inner_x_max or inner_y_min>=inner_y_max:
+                continue
+            inner_cell_x_min = x_cell_conversion[inner_x_min]
+            if min_x_coords[inner_cell_x_min]<inner_x_min:
+                inner_cell_x_min+=1
+            inner_cell_y_min = y_cell_conversion[inner_y_min]
+            if min_y_coords[inner_cell_y_min]<inner_y_min:
+                inner_cell_y_min+=1
+            inner_cell_x_max = x_cell_conversion[inner_x_max-1]
+            if max_x_coords[inner_cell_x_max]>inner_x_max:
+                inner_cell_x_max-=1
+            inner_cell_y_max = y_cell_conversion[inner_y_max-1]
+            if max_y_coords[inner_cell_y_max]>inner_y_max:
+                inner_cell_y_max-=1
+            if inner_cell_y_min<=inner_cell_y_max:
+                for x in range(inner_cell_x_min,inner_cell_x_max+1):
+                    dirty_cells[x*height+inner_cell_y_min:x*height+inner_cell_y_max+1] = \
+                        bytearray([1])*(inner_cell_y_max-inner_cell_y_min+1)
+        #Any other cell in the range might only be partly covered (or not at all, such as the middle of a hollow
+        #shape), so check those against the inner rectangles
+        for x in range(cell_x_min,cell_x_max+1):
+            for y in range(cell_y_min,cell_y_max+1):
+                if dirty_cells[x*height+y]:
+                    continue
+                if collider.is_colliding((min_x_coords[x]-x_min,
+                                          min_y_coords[y]-y_min,
+                                          max_x_coords[x]-x_min,
+                                          max_y_coords[y]-y_min)):
+                    dirty_cells[x*height+y] = 1
         
     @staticmethod
     def __calculate_screen_update_list():
@@ -283,19 +457,10 @@ class PictureHandler(object):
         @return: a list of rectangles to use to update the screen, in the form
         of (x_min, y_min, x_max, y_max, None) (key for the next tree)
         '''
-        #TODO REMOVE print("Calculating update list")
-        #Firstly, gather the coordinates and update the screen rectangle tree...
-        coords = []
-        for rect in PictureHandler.__screen_rectangles_to_add:
-            (_,_,_,_,(x,y)) = rect
-            coords.append((x,y))
-            #Now fill the rectangle tree again
-            PictureHandler.__screen_rectangle_tree.insert_rectangle(rect)
-        #Empty the update list
-        #TODO REMOVE print("Filling coords " + str(coords))
-        PictureHandler.__screen_rectangles_to_add = []
-        #Calculate the covering rectangles...
-        covering_rects = RectangleFiller.fill_grid(coords)
+        width = len(PictureHandler.__MIN_X_COORD_SCREEN_CONVERSION)
+        height = len(PictureHandler.__MIN_Y_COORD_SCREEN_CONVERSION)
+        #Calculate the covering rectangles... (which clears the dirty cells for the next frame)
+        covering_rects = RectangleFiller.fill_cell_array(PictureHandler.__dirty_cells, width, height)
         #TODO REMOVE print("Got covering rectangles " + str(covering_rects))
         #Recalculate from these rectangles the screen rectangles to update against...
         screen_rects = []
@@ -309,16 +474,15 @@ class PictureHandler(object):
         return screen_rects
     
     @staticmethod
-    def __update_surface_slab(surface,rect):
+    def __update_surface_slab(surface,rect,collided_rectangles):
         '''
         Update a slab of the surface according to whatever needs to be drawn!
         @param surface: the surface everything should be drawn on
         @param rect: the rectangle on the original screen that the surface will be blitted to.
         Should be of the form (x_min,y_min,x_max,y_max)
+        @param collided_rectangles: the rectangles in the picture rectangle tree colliding with rect
         '''
         (x_min,y_min,x_max,y_max) = rect
-        #Now work out everyone who needs to redraw...
-        collided_rectangles = PictureHandler.__picture_rectangle_tree.collide_rectangle((x_min,y_min,x_max,y_max))
         #Gather them up, and order them by depth
         collided_list = []
         #TODO REMOVE print("Got collided rectangles " + str(collided_rectangles))
@@ -327,9 +491,13 @@ class PictureHandler(object):
         #Sort by the first element only
         collided_list.sort(key=lambda tup: tup[0], reverse=True)
         #Now we call the redraw methods appropriately...
+        cost_tracker = Screen.get_cost_tracker()
         for (_,drawer) in collided_list:
             #Redraw!
-            drawer.redraw((x_min,y_min),surface)
+            if cost_tracker==None:
+                drawer.redraw((x_min,y_min),surface)
+            else:
+                cost_tracker.call("drawer", drawer, drawer.redraw, (x_min,y_min), surface)
         #That should be everything...
                        
     @staticmethod
@@ -337,29 +505,88 @@ class PictureHandler(object):
         '''
         Called by the screen when the picture needs to be drawn
         '''
-        PictureHandler.__picture_lock.acquire()
+        if PictureHandler.__picture_locked:
+            PictureHandler.__picture_locked = False
+        else:
+            PictureHandler.__picture_lock.acquire()
         #Now we calculate the updates... (refills tree automatically atm)
         update_rects = PictureHandler.__calculate_screen_update_list()
+        profiler = Screen.get_profiler()
+        if profiler:
+            profiler.mark("dirty_computation")
         converted_update_list = [] #other form of rectangle...
-        #Now collide the update rects to get the redrawing stuff...
-        for (x_min,y_min,x_max,y_max) in update_rects:
+        #Now collide the update rects (all in one go) to get the redrawing stuff...
+        (offsets,collided_rectangles) = PictureHandler.__picture_rectangle_tree.collide_many(update_rects)
+        picture = PictureHandler.__picture
+        #The cost of the frame for the adaptive grid
+        cost = 0
+        for index in range(0,len(update_rects)):
+            (x_min,y_min,x_max,y_max) = update_rects[index]
             #Calculate the size of the surface we need
             (width,height) = (x_max-x_min,y_max-y_min)
-            #Draw the background first...
-            picture_slab = pygame.Surface((width,height))
-            picture_slab = picture_slab.convert()
-            picture_slab.fill(PictureHandler.__background_colour)
-            #TODO REMOVE print("Made update slab with size " + str((width,height)))
-            #Ready to perform the updates!!
-            PictureHandler.__update_surface_slab(picture_slab,(x_min,y_min,x_max,y_max))
-            #Finally, blit it to the picture and register the update...
-            PictureHandler.__picture.blit(picture_slab,(x_min,y_min))
-            #Should have worked I think...
+            if PictureHandler.__compose_in_place:
+                #Draw the background and the updates straight onto the picture
+                picture.set_clip((x_min,y_min,width,height))
+                picture.fill(PictureHandler.__background_colour,(x_min,y_min,width,height))
+                PictureHandler.__update_surface_slab(picture,(0,0,x_max,y_max),
+                                                     collided_rectangles[offsets[index]:offsets[index+1]])
+                picture.set_clip(None)
+            else:
+                #Draw the background first...
+                picture_slab = PictureHandler.__get_slab(width,height)
+                picture_slab.fill(PictureHandler.__background_colour,(0,0,width,height))
+                #Ready to perform the updates!!
+                PictureHandler.__update_surface_slab(picture_slab,(x_min,y_min,x_max,y_max),
+                                                     collided_rectangles[offsets[index]:offsets[index+1]])
+                #Finally, blit it to the picture and register the update...
+                picture.blit(picture_slab,(x_min,y_min),(0,0,width,height))
             converted_update_list.append((x_min,y_min,width,height))
+            cost+=width*height+PictureHandler.__RECT_OVERHEAD
+        #Only frames which update something say anything about the grid
+        #(no cells are waiting now, so the grid can change)
+        if PictureHandler.__adaptive and update_rects:
+            PictureHandler.__adapt_grid(cost)
+        if profiler:
+            profiler.mark("composition")
         #Return the relevant stuff...
         #TODO REMOVE print("Requesting screen updates on " + str(converted_update_list))
         return (PictureHandler.__picture,converted_update_list)
     
+    @staticmethod
+    def _lock_picture():
+        '''
+        Called by the screen to stop the picture changing before it is asked for (on another thread)
+        '''
+        PictureHandler.__picture_lock.acquire()
+        PictureHandler.__picture_locked = True
+    
+    @staticmethod
+    def _has_updates():
+        '''
+        Called by the screen to check whether anything needs to be drawn
+        @return: true iff some cells are waiting to be updated
+        '''
+        PictureHandler.__picture_lock.acquire()
+        has_updates = 1 in PictureHandler.__dirty_cells
+        PictureHandler.__picture_lock.release()
+        return has_updates
+    
+    @staticmethod
+    def __get_slab(width,height):
+        '''
+        @param width: the width of the slab needed
+        @param height: the height of the slab needed
+        @return: a slab (from the pool) at least as large as needed, clipped to (0,0,width,height).
+        The slabs are grouped by their size rounded up to powers of two, so there are few of them.
+        '''
+        size = (1<<(width-1).bit_length(),1<<(height-1).bit_length())
+        picture_slab = PictureHandler.__slab_pool.get(size)
+        if picture_slab==None:
+            picture_slab = pygame.Surface(size).convert()
+            PictureHandler.__slab_pool[size] = picture_slab
+        picture_slab.set_clip((0,0,width,height))
+        return picture_slab
+    
     @staticmethod
     def _picture_drawn():
         '''
@@ -424,4 +651,6 @@ class PictureHandler(object):
         #We should call the auxiliary...
         PictureHandler.__deregister_drawer(drawer)
         PictureHandler.__picture_lock.release()
-    
\ No newline at end of file
+
+#Each world has its own picture handler
+World.register(PictureHandler)
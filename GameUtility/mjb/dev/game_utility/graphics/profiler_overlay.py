@@ -0,0 +1,112 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import pygame
+import mjb.dev.game_utility.graphics.screen as screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler, Drawer
+from mjb.dev.game_utility.graphics.frame_profiler import FrameProfiler
+
+class ProfilerOverlay(Drawer):
+    '''
+    Draws the statistics of a frame profiler on top of the picture, as a table of the 50th, 95th and
+    99th percentile times (in milliseconds) of the whole frame and each phase.
+    The table is redrawn every so many frames, rather than every frame, so that it can be read
+    (and so that it does not make up much of what it measures).
+    '''
+
+    def __init__(self, profiler=None, top_left=(0,0), depth=-1000, refresh_frames=30,
+                 font_size=16, colour=(255,255,0), background_colour=(0,0,0)):
+        '''
+        Construct a new overlay, which is drawn immediately
+        @param profiler: None by default for the screen's profiler, otherwise the profiler to show
+        @param top_left: (0,0) by default, the top left coordinate of the overlay on the screen
+        @param depth: -1000 by default, the depth to draw the overlay at (it should be in front of everything)
+        @param refresh_frames: 30 by default, the number of frames between redrawing the table
+        @param font_size: 16 by default, the size of the font
+        @param colour: the colour of the text
+        @param background_colour: the colour behind the text
+        @raise ValueError: if no profiler is given and the screen is not being profiled
+        '''
+        if profiler==None:
+            profiler = screen.Screen.get_profiler()
+            if profiler==None:
+                raise ValueError("The screen is not being profiled")
+        self.__profiler = profiler
+        self.__top_left = top_left
+        self.__depth = (depth,id(self))
+        self.__refresh_frames = refresh_frames
+        self.__frames = 0
+        self.__font = pygame.font.Font(None,font_size)
+        self.__colour = colour
+        self.__background_colour = background_colour
+        self.__picture = self.__render()
+        self.__registered = True
+        PictureHandler.register_drawer(self)
+        self.__frame_listener = screen._FrameListener(self.__frame_passed)
+        self.__frame_listener.register()
+
+    def dispose(self):
+        '''
+        Stop drawing the overlay. It should not be used again.
+        '''
+        if self.__registered:
+            self.__registered = False
+            self.__frame_listener.deregister()
+            PictureHandler.deregister_drawer(self)
+
+    def __frame_passed(self):
+        '''
+        Redraw the table when it is due
+        '''
+        self.__frames+=1
+        if self.__frames<self.__refresh_frames:
+            return
+        self.__frames = 0
+        PictureHandler.deregister_drawer(self)
+        self.__picture = self.__render()
+        PictureHandler.register_drawer(self)
+
+    def __render(self):
+        '''
+        @return: a new surface with the table of statistics
+        '''
+        statistics = self.__profiler.get_statistics((50,95,99))
+        rows = [["ms","p50","p95","p99"]]
+        for phase in (FrameProfiler.FRAME,)+FrameProfiler.PHASES:
+            rows.append([phase]+["-" if time==None else "%.2f" % (time*1000) for time in statistics[phase]])
+        #Render each cell separately, so the columns line up whatever the font
+        rendered = [[self.__font.render(cell,True,self.__colour,self.__background_colour) for cell in row]
+                    for row in rows]
+        spacing = self.__font.size(" ")[0]*2
+        column_widths = [max(row[column].get_width() for row in rendered) for column in range(0,4)]
+        line_height = self.__font.get_linesize()
+        picture = pygame.Surface((sum(column_widths)+spacing*4,line_height*len(rows))).convert()
+        picture.fill(self.__background_colour)
+        for row_index in range(0,len(rendered)):
+            x = spacing/2
+            for column in range(0,4):
+                cell = rendered[row_index][column]
+                if column==0:
+                    picture.blit(cell,(x,row_index*line_height))
+                else:
+                    #Numbers are right aligned
+                    picture.blit(cell,(x+column_widths[column]-cell.get_width(),row_index*line_height))
+                x+=column_widths[column]+spacing
+        return picture
+
+    def redraw(self, top_left, surface):
+        (x,y) = self.__top_left
+        surface.blit(self.__picture,(x-top_left[0],y-top_left[1]))
+
+    def get_bounding_rectangle(self):
+        (x,y) = self.__top_left
+        return (x,y,x+self.__picture.get_width(),y+self.__picture.get_height())
+
+    def get_inner_shape(self):
+        return ([],None)
+
+    def get_depth(self):
+        return self.__depth
@@ -5,9 +5,13 @@ Created on 4 Jul 2014
 '''
 
 import pygame.locals
+import os
 import collections
 import threading
+import heapq
 import sys, traceback
+from mjb.dev.game_utility.graphics.frame_profiler import FrameProfiler
+from mjb.dev.game_utility.world import World
 
 if not pygame.font: print 'Warning, fonts disabled'
 if not pygame.mixer: print 'Warning, sound disabled'
@@ -19,19 +23,33 @@ class _PictureHandler(object):
     
     def get_picture(self):
         '''
-        By default, this returns the background image.
+        By default, this returns the background image (which never needs updating).
         @return: (picture, update_list) - the picture to be displayed on screen
-        and a list of rectangles to update the screen.
+        and a list of rectangles to update the screen, in the form (x,y,width,height).
+        Only the parts of the picture in these rectangles are blit to the screen.
         Note that no explicit handling of the background
         is performed here, so it will appear exactly as is.
         '''
-        return Screen._background
+        return (Screen._background,[])
     
     def picture_drawn(self):
         '''
         Called once the picture has been blit to the screen, ensuring the handler can now make
         modifications again
         '''
+    
+    def has_updates(self):
+        '''
+        By default, the background never changes.
+        @return: true iff the next picture would update some part of the screen
+        '''
+        return False
+    
+    def lock_picture(self):
+        '''
+        Called before get_picture when the picture is drawn on another thread. Nothing drawn should change
+        from now until picture_drawn is called (and get_picture should not wait for this itself).
+        '''
 
 class Screen(object):
     '''
@@ -48,6 +66,13 @@ class Screen(object):
     __max_frame_rate = 60
     __game_caption = ""
     __mouse_visible=True
+    #Whether the screen is headless (not shown), and the size asked for (None for the full screen)
+    __headless = False
+    __requested_size = None
+    #Called with the screen and the update list instead of updating the display (when headless)
+    __capture_handler = None
+    #The size used for a headless screen when no size is given
+    __HEADLESS_SIZE = (1024,768)
     #Remember the screen object
     __screen = None
     #This the primary background on which everything is drawn! This is eventually blit to the screen itself.
@@ -55,23 +80,30 @@ class Screen(object):
     #This is the clock which controls the max frame rate
     __clock = None
     #The update list. This controls which parts of the screen are actually updated
+    #(None when the whole screen should be updated)
     __update_list = []
+    #Above this fraction of the screen needing updating, the whole picture is blit and the display is flipped
+    __FULL_UPDATE_FRACTION = 0.5
+    #Above this many rectangles needing updating, the same happens (each update has its own overhead)
+    __MAX_PARTIAL_UPDATES = 48
     
     #These are the input listeners attached to the screen
-    __keyboard_listeners = collections.defaultdict(lambda : None)
-    __mouse_motion_listeners = set()
-    __mouse_button_listeners = set()
-    __frame_listeners = set()
+    #(Ordered dictionaries - to the keys listened for, or None - so that the listeners are called in the order
+    #they were added, which is the same each run)
+    __keyboard_listeners = collections.OrderedDict()
+    __mouse_motion_listeners = collections.OrderedDict()
+    __mouse_button_listeners = collections.OrderedDict()
+    __frame_listeners = collections.OrderedDict()
     
     #These are the sets of listeners to be removed or added
     _keyboard_listeners_to_remove = set()
-    _keyboard_listeners_to_add = collections.defaultdict(lambda : None)
+    _keyboard_listeners_to_add = collections.OrderedDict()
     _mouse_motion_listeners_to_remove = set()
-    _mouse_motion_listeners_to_add = set()
+    _mouse_motion_listeners_to_add = collections.OrderedDict()
     _mouse_button_listeners_to_remove = set()
-    _mouse_button_listeners_to_add = set()
+    _mouse_button_listeners_to_add = collections.OrderedDict()
     _frame_listeners_to_remove = set()
-    _frame_listeners_to_add = set()
+    _frame_listeners_to_add = collections.OrderedDict()
     
     #A lock for synchronisation on all methods...
     _lock = threading.Lock()
@@ -82,6 +114,48 @@ class Screen(object):
     #The default picture handler
     __picture_handler = _PictureHandler()
     
+    #Whether or not the game loop sleeps when there is nothing to do
+    __idle = False
+    #Whether the game loop is sleeping (waiting for an event)
+    __sleeping = False
+    #Whether something asked for the next frame to happen (or something was drawn in the last frame)
+    __stay_awake = False
+    #The times (in milliseconds) at which the game loop has been asked to wake up, as a heap
+    __wakeups = []
+    #The event posted to wake the game loop up
+    __WAKE_EVENT = pygame.locals.USEREVENT
+    
+    #The time in seconds of each step of the frame listeners (None to step once per frame)
+    __fixed_timestep = None
+    #The most steps which can happen in one frame (beyond this, the game slows down)
+    __max_steps = 1
+    #The time not yet stepped through, and when it was last counted
+    __accumulated_time = 0.0
+    __last_step_time = None
+    #The fraction of a step the time not yet stepped through makes up
+    __interpolation_alpha = 0.0
+    #The number of steps so far
+    __step_count = 0
+    
+    #Whether the game loop runs on a virtual clock (as fast as possible)
+    __deterministic = False
+    #Where the events come from (None for pygame)
+    __event_source = None
+    #Draw the picture every this many frames
+    __render_every = 1
+    #Quit after this many frames (None to run until quit)
+    __max_frames = None
+    #Whether the picture is drawn on a separate thread, and the worker drawing it
+    __pipelined = False
+    __render_worker = None
+    #The number of frames which have passed
+    __frame_count = 0
+    
+    #The profiler timing the game loop (None when not profiling)
+    __profiler = None
+    #The tracker timing each listener and drawer (None when not tracking)
+    __cost_tracker = None
+    
     @staticmethod
     def get_game_caption():
         '''
@@ -109,6 +183,35 @@ class Screen(object):
         @return: whether or not the mouse is visible on this screen
         '''
     
+    @staticmethod
+    def get_profiler():
+        '''
+        @return: the frame profiler timing the game loop, or None if the game loop is not being profiled
+        '''
+        return Screen.__profiler
+    
+    @staticmethod
+    def get_cost_tracker():
+        '''
+        @return: the cost tracker timing each listener and drawer, or None if costs are not being tracked
+        '''
+        return Screen.__cost_tracker
+    
+    @staticmethod
+    def set_cost_tracker(cost_tracker):
+        '''
+        Start (or stop) timing each callback made to listeners, and each redraw by the picture handler.
+        @param cost_tracker: the cost tracker to put the times down with, or None to stop tracking
+        '''
+        Screen.__cost_tracker = cost_tracker
+    
+    @staticmethod
+    def is_headless():
+        '''
+        @return: whether or not the screen is headless (see initialise)
+        '''
+        return Screen.__headless
+    
     @staticmethod
     def get_screen_size():
         '''
@@ -119,13 +222,53 @@ class Screen(object):
     @staticmethod
     def initialise(game_caption="",
                    background_colour=(255,255,255), max_frame_rate=60,
-                   mouse_visible=True):
+                   mouse_visible=True, idle=False, profile_frames=0,
+                   headless=False, size=None, capture_handler=None,
+                   fixed_timestep=None, max_frame_skip=5,
+                   deterministic=False, event_source=None, render_every=1, max_frames=None,
+                   pipelined=False):
         '''
         Create a new screen. Note that you can only eve create a single screen in an application.
         @param game_caption: set the caption to appear for this game.
         @param background_colour: set the background colour of the screen.
         @param max_frame_rate: set the maximum frame rate that the game can run at.
         @param mouse_visible: whether or not the mouse should be visible on screen.
+        @param idle: false by default, set to true to let the game loop sleep when nothing is happening.
+        A frame then only happens when there is input, the picture needs updating or was updated in the
+        last frame, something called keep_awake during the last frame, or a wakeup scheduled with
+        schedule_wakeup is due.
+        Otherwise, frame listeners are not called and nothing is drawn.
+        @param profile_frames: 0 by default, otherwise the number of frames for which to keep the time
+        spent in each phase of the game loop (see get_profiler)
+        @param headless: false by default, set to true to run without showing anything (using SDL's dummy
+        video driver). Everything else runs as normal, but the display is never updated. If another world
+        already has the display, the screen is drawn off screen instead. Pygame is left running on quitting.
+        @param size: None by default for the full screen (or 1024 * 768 when headless), otherwise the
+        size of the screen as (width,height) - in a window unless headless.
+        @param capture_handler: None by default, otherwise a function called at the end of each frame
+        when headless, in place of updating the display. It is given the screen surface and the list of
+        rectangles updated as (x,y,width,height) (None if the whole screen was updated, the list is empty if
+        nothing changed). The surface should not be modified.
+        @param fixed_timestep: None by default to call the frame listeners once per frame, otherwise
+        the time in seconds that each call to the frame listeners (a step) stands for. The frame listeners
+        are then called as many times each frame as there are steps in the time passed, so the game runs
+        at the same speed however long the frames take to draw. Drawers can use get_interpolation_alpha
+        to draw between the last step and the next.
+        @param max_frame_skip: 5 by default, the most frames which can go undrawn (each step past the first in
+        a frame is a frame skipped) when the fixed time step is in use. Past this, the game slows down.
+        @param deterministic: false by default, set to true to run on a virtual clock, where each frame
+        takes exactly 1 / max_frame_rate seconds (as far as the game can tell - see get_ticks) and the game loop
+        never waits. Together with an event source, the game then runs as fast as possible and the same way
+        each time. The loop does not go idle.
+        @param event_source: None by default for the real events, otherwise the event source (see
+        event_source.py) to take the events for each frame from
+        @param render_every: 1 by default, the picture is only drawn every this many frames
+        (what changes in between is drawn together)
+        @param max_frames: None by default, otherwise the game quits after this many frames
+        @param pipelined: false by default, set to true to draw and show the picture on a separate thread,
+        while the game loop gets on with the input and frame listeners of the next frame. The picture is
+        locked at the end of each frame's listeners (see _PictureHandler.lock_picture), so anything which
+        changes what is drawn waits until the picture has been drawn. Only one picture is drawn at a time.
         @raise ValueError: if the screen was already initialised
         '''
         Screen._lock.acquire()
@@ -138,6 +281,21 @@ class Screen(object):
             Screen._background_colour = background_colour
             Screen.__max_frame_rate = max_frame_rate
             Screen.__mouse_visible = mouse_visible
+            Screen.__idle = idle
+            Screen.__fixed_timestep = fixed_timestep
+            Screen.__deterministic = deterministic
+            Screen.__event_source = event_source
+            Screen.__render_every = render_every
+            Screen.__max_frames = max_frames
+            Screen.__pipelined = pipelined
+            Screen.__max_steps = max_frame_skip+1
+            Screen.__headless = headless
+            Screen.__requested_size = size
+            if capture_handler!=None:
+                #(So that it is not bound to the class as a method)
+                Screen.__capture_handler = staticmethod(capture_handler)
+            if profile_frames>0:
+                Screen.__profiler = FrameProfiler(profile_frames)
             #Initialise pygame with the given parameters
             Screen.__initialise_pygame()
             #Successfully constructed the screen
@@ -153,9 +311,26 @@ class Screen(object):
         Initialise pygame with the various settings passed in.
         '''
         #Initialise pygame appropriately
+        if Screen.__headless:
+            #(Must be chosen before the display is initialised)
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
         pygame.init()
         #Determines the size of the screen
-        Screen.__screen = pygame.display.set_mode((0,0),pygame.FULLSCREEN)
+        size = Screen.__requested_size
+        if Screen.__headless and pygame.display.get_surface()!=None:
+            #Another world has the display, so draw off screen
+            Screen.__screen = pygame.Surface(size or Screen.__HEADLESS_SIZE).convert()
+            Screen.__clock = pygame.time.Clock()
+            Screen._background = Screen.__screen.copy()
+            Screen._background.fill(Screen._background_colour)
+            Screen.__screen.blit(Screen._background, (0, 0))
+            return
+        if Screen.__headless:
+            Screen.__screen = pygame.display.set_mode(size or Screen.__HEADLESS_SIZE)
+        elif size==None:
+            Screen.__screen = pygame.display.set_mode((0,0),pygame.FULLSCREEN)
+        else:
+            Screen.__screen = pygame.display.set_mode(size)
         #Set the caption for the game
         pygame.display.set_caption(Screen.__game_caption)
         #Make the mouse visible
@@ -187,20 +362,27 @@ class Screen(object):
             raise ValueError("The game loop cannot be started more than once")
         Screen.__started_game_loop = True
         Screen._lock.release()
+        if Screen.__pipelined:
+            Screen.__render_worker = _RenderWorker(Screen.__draw_picture)
+        profiler = Screen.__profiler
         try :
-            #TODO REMOVE
-            #total = 0
             #Main game while loop
             while True:
-                #TODO REMOVE For monitoring the frame rate
-                #total+=1
-                #if total==60:
-                #    total=0
-                #    print(Screen.__clock.get_fps())
+                if profiler:
+                    profiler.start_frame()
                 #Remember if we registered a mouse motion event already...
                 heard_mouse_motion = False
+                #Sleep if there is nothing to do
+                if Screen.__idle and not Screen.__deterministic and Screen.__can_sleep():
+                    events = Screen.__sleep()
+                elif Screen.__event_source!=None:
+                    events = Screen.__event_source.get_events(Screen.__frame_count)
+                else:
+                    events = pygame.event.get()
+                if profiler:
+                    profiler.mark("event_wait")
                 #Handle Input Events
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.locals.QUIT:
                         Screen.__quit_game()
                         return
@@ -209,41 +391,288 @@ class Screen(object):
                         for listener in Screen.__keyboard_listeners.keys():
                             #Is it listening for this key?
                             if event.key in Screen.__keyboard_listeners[listener]:
-                                listener.handle_event(event)
+                                Screen.__dispatch("keyboard_listener", listener, event)
+                        if profiler:
+                            profiler.mark("keyboard_events")
                     elif event.type == pygame.locals.MOUSEMOTION and not heard_mouse_motion:
                         heard_mouse_motion = True
                         #Mouse motion listeners
                         for listener in Screen.__mouse_motion_listeners:
-                            listener.handle_event(event)
+                            Screen.__dispatch("mouse_motion_listener", listener, event)
+                        if profiler:
+                            profiler.mark("mouse_motion_events")
                     elif event.type == pygame.locals.MOUSEBUTTONDOWN or event.type == pygame.locals.MOUSEBUTTONUP:
                         #Mouse button listeners
                         for listener in Screen.__mouse_button_listeners:
-                            listener.handle_event(event)
+                            Screen.__dispatch("mouse_button_listener", listener, event)
+                        if profiler:
+                            profiler.mark("mouse_button_events")
                 #Activate the step events...
-                for listener in Screen.__frame_listeners:
-                    listener.handle_event()
+                if Screen.__fixed_timestep==None:
+                    steps = 1
+                else:
+                    steps = Screen.__count_steps()
+                for _ in range(0,steps):
+                    Screen.__step_count+=1
+                    for listener in Screen.__frame_listeners:
+                        Screen.__dispatch("frame_listener", listener)
+                if profiler:
+                    profiler.mark("frame_listeners")
                 # Update the screen according to the update list
-                Screen._lock.acquire()
-                try:
-                    #Remember the updates...
-                    (picture, updates) = Screen.__picture_handler.get_picture()
-                    Screen.__update_list = updates
-                    Screen.__screen.blit(picture, (0,0))
-                    Screen.__picture_handler.picture_drawn()
-                except Exception, e:
+                if Screen.__frame_count%Screen.__render_every==0 and Screen.__pipelined:
+                    #Wait for the last picture, then hand over this one
+                    Screen.__render_worker.wait()
+                    if profiler:
+                        profiler.mark("render_wait")
+                    Screen.__picture_handler.lock_picture()
+                    Screen.__render_worker.submit()
+                elif Screen.__frame_count%Screen.__render_every==0:
+                    Screen._lock.acquire()
+                    try:
+                        #Remember the updates... (the picture handler marks its own phases)
+                        (picture, updates) = Screen.__picture_handler.get_picture()
+                        Screen.__update_list = Screen.__blit_updates(picture, updates)
+                        if profiler:
+                            profiler.mark("blit")
+                        #If something changed, it may well change again
+                        if updates:
+                            Screen.__stay_awake = True
+                        Screen.__picture_handler.picture_drawn()
+                    except Exception, e:
+                        Screen._lock.release()
+                        Screen.__quit_game(e)
+                        return
                     Screen._lock.release()
-                    Screen.__quit_game(e)
-                    return
-                Screen._lock.release()
                 #Now, lock onto the screen and perform all the various updates...
                 should_quit = Screen.__manage_updates()
                 if should_quit:
                     #Done
                     return
+                if profiler:
+                    profiler.end_frame()
         except Exception, e:
             Screen.__quit_game(e)
             return
     
+    @staticmethod
+    def __count_steps():
+        '''
+        Add the time passed since the last frame, and take out the steps in it
+        @return: the number of steps to take this frame
+        '''
+        now = Screen.get_ticks()/1000.0
+        timestep = Screen.__fixed_timestep
+        if Screen.__last_step_time==None:
+            #The first frame takes one step
+            Screen.__accumulated_time = timestep
+        else:
+            Screen.__accumulated_time += now-Screen.__last_step_time
+        Screen.__last_step_time = now
+        steps = int(Screen.__accumulated_time/timestep)
+        Screen.__accumulated_time -= steps*timestep
+        if steps>Screen.__max_steps:
+            #Too far behind - drop the time which can't be caught up
+            steps = Screen.__max_steps
+            Screen.__accumulated_time = 0.0
+        Screen.__interpolation_alpha = Screen.__accumulated_time/timestep
+        return steps
+    
+    @staticmethod
+    def get_ticks():
+        '''
+        @return: the time in milliseconds since the game started (on the virtual clock if deterministic - see
+        initialise)
+        '''
+        if Screen.__deterministic:
+            return Screen.__frame_count*1000.0/Screen.__max_frame_rate
+        return pygame.time.get_ticks()
+    
+    @staticmethod
+    def get_frame_count():
+        '''
+        @return: the number of frames which have passed
+        '''
+        return Screen.__frame_count
+    
+    @staticmethod
+    def get_timestep():
+        '''
+        @return: the time in seconds each call to the frame listeners stands for when the fixed time step
+        is in use (see initialise), otherwise None
+        '''
+        return Screen.__fixed_timestep
+    
+    @staticmethod
+    def get_step_count():
+        '''
+        @return: the number of times the frame listeners have been called so far
+        '''
+        return Screen.__step_count
+    
+    @staticmethod
+    def get_interpolation_alpha():
+        '''
+        @return: when the fixed time step is in use (see initialise), how far (from 0 up to 1) the time
+        drawn is between the last step and the next. Otherwise 0.
+        '''
+        return Screen.__interpolation_alpha
+    
+    @staticmethod
+    def __dispatch(kind, listener, *args):
+        '''
+        Pass an event to a listener (timing it if costs are being tracked)
+        @param kind: the kind of listener
+        @param listener: the listener
+        @param args: the arguments for the listener (the event, if any)
+        '''
+        cost_tracker = Screen.__cost_tracker
+        if cost_tracker==None:
+            listener.handle_event(*args)
+        else:
+            #Put the cost down to whatever is handling the event
+            handler = listener.event_handler
+            cost_tracker.call(kind, getattr(handler, "__self__", handler), listener.handle_event, *args)
+    
+    @staticmethod
+    def keep_awake():
+        '''
+        Make sure that the next frame happens, even if the game loop is idle (see initialise).
+        Frame listeners which change something without drawing should call this every frame.
+        '''
+        Screen._lock.acquire()
+        Screen.__stay_awake = True
+        Screen.__wake()
+        Screen._lock.release()
+    
+    @staticmethod
+    def schedule_wakeup(delay):
+        '''
+        Make sure that a frame happens after a delay, even if the game loop is idle (see initialise).
+        @param delay: the delay in milliseconds
+        '''
+        Screen._lock.acquire()
+        heapq.heappush(Screen.__wakeups, Screen.get_ticks()+delay)
+        Screen.__wake()
+        Screen._lock.release()
+    
+    @staticmethod
+    def __wake():
+        '''
+        Wake the game loop up if it is sleeping. The lock must be held.
+        '''
+        if Screen.__sleeping:
+            Screen.__sleeping = False
+            pygame.event.post(pygame.event.Event(Screen.__WAKE_EVENT))
+    
+    @staticmethod
+    def __pop_due_wakeups():
+        '''
+        Remove the wakeups which are due. The lock must be held.
+        @return: true iff there were any
+        '''
+        now = Screen.get_ticks()
+        wakeups = Screen.__wakeups
+        due = False
+        while wakeups and wakeups[0]<=now:
+            heapq.heappop(wakeups)
+            due = True
+        return due
+    
+    @staticmethod
+    def __can_sleep():
+        '''
+        Check whether the game loop has nothing to do. If so, it is marked as sleeping
+        (so that it can be woken up).
+        @return: true iff the game loop can sleep until the next event
+        '''
+        #The last picture must be finished first - if it drew anything, it may well change again
+        #(like the stay awake flag, but known on this thread)
+        drew = Screen.__render_worker!=None and Screen.__render_worker.wait()
+        Screen._lock.acquire()
+        try:
+            awake = (drew or Screen.__stay_awake or Screen.__pop_due_wakeups() or
+                     Screen.__picture_handler.has_updates() or Screen.__must_quit)
+            Screen.__stay_awake = False
+            Screen.__sleeping = not awake
+            return not awake
+        finally:
+            Screen._lock.release()
+    
+    @staticmethod
+    def __sleep():
+        '''
+        Sleep until there is an event, or until the next scheduled wakeup.
+        @return: the list of events to handle
+        '''
+        Screen._lock.acquire()
+        if Screen.__wakeups:
+            timeout = max(Screen.__wakeups[0]-Screen.get_ticks(),1)
+        else:
+            timeout = 0
+        Screen._lock.release()
+        #(A timeout of 0 waits forever)
+        event = pygame.event.wait(timeout)
+        Screen._lock.acquire()
+        Screen.__sleeping = False
+        Screen.__pop_due_wakeups()
+        #Nothing was happening, so there is no time to catch up on
+        Screen.__last_step_time = None
+        Screen._lock.release()
+        events = [event] + pygame.event.get()
+        return [event for event in events
+                if event.type!=pygame.locals.NOEVENT and event.type!=Screen.__WAKE_EVENT]
+    
+    @staticmethod
+    def __draw_picture():
+        '''
+        Draw the picture and show it (on the render worker's thread when pipelined)
+        @return: true iff anything was drawn
+        '''
+        (picture, updates) = Screen.__picture_handler.get_picture()
+        update_list = Screen.__blit_updates(picture, updates)
+        Screen.__picture_handler.picture_drawn()
+        Screen.__show_updates(update_list)
+        return bool(updates)
+    
+    @staticmethod
+    def __show_updates(update_list):
+        '''
+        Update the display (or capture the screen when headless)
+        @param update_list: the list of rectangles to update, or None to update everything
+        '''
+        if Screen.__headless:
+            if Screen.__capture_handler!=None:
+                Screen.__capture_handler(Screen.__screen, update_list)
+        elif update_list is None:
+            pygame.display.flip()
+        elif update_list:
+            pygame.display.update(update_list)
+    
+    @staticmethod
+    def __blit_updates(picture, updates):
+        '''
+        Blit the parts of the picture which need updating to the screen. Depending on how much
+        needs updating, this does nothing, blits just the rectangles, or blits the whole picture.
+        @param picture: the picture from the picture handler
+        @param updates: the list of rectangles to update, in the form (x,y,width,height)
+        @return: the list of rectangles to update the display with, or None if the whole display
+        should be updated
+        '''
+        if not updates:
+            return []
+        (screen_width,screen_height) = Screen.__screen.get_size()
+        dirty_area = 0
+        for (_,_,width,height) in updates:
+            dirty_area+=width*height
+        if (len(updates)>Screen.__MAX_PARTIAL_UPDATES or
+            dirty_area>Screen.__FULL_UPDATE_FRACTION*screen_width*screen_height):
+            Screen.__screen.blit(picture, (0,0))
+            return None
+        screen = Screen.__screen
+        for rect in updates:
+            screen.blit(picture, rect[0:2], rect)
+        return updates
+    
     @staticmethod
     def set_picture_handler(picture_handler):
         '''
@@ -266,29 +695,45 @@ class Screen(object):
         '''
         try:
             Screen._lock.acquire()
+            profiler = Screen.__profiler
+            if profiler:
+                profiler.mark("other")
             #TODO REMOVE
             #pygame.display.update()
-            #Tick by the update to uniform the time out
-            Screen.__clock.tick(Screen.__max_frame_rate)
-            pygame.display.update(Screen.__update_list)
-            Screen.__update_list = []
+            #Tick by the update to uniform the time out (the virtual clock never waits)
+            if not Screen.__deterministic:
+                Screen.__clock.tick(Screen.__max_frame_rate)
+            Screen.__frame_count+=1
+            if Screen.__max_frames!=None and Screen.__frame_count>=Screen.__max_frames:
+                Screen.__must_quit = True
+            if profiler:
+                profiler.mark("clock_wait")
+            #(The render worker shows its own pictures)
+            if not Screen.__pipelined:
+                Screen.__show_updates(Screen.__update_list)
+                Screen.__update_list = []
+                if profiler:
+                    profiler.mark("display_update")
             #Register and deregister listeners...
             for listener in Screen._keyboard_listeners_to_add.keys():
                 Screen.__keyboard_listeners[listener] = Screen._keyboard_listeners_to_add[listener]
             for listener in Screen._keyboard_listeners_to_remove:
                 Screen.__keyboard_listeners.pop(listener)
             for listener in Screen._mouse_button_listeners_to_add:
-                Screen.__mouse_button_listeners.add(listener)
+                Screen.__mouse_button_listeners[listener] = None
             for listener in Screen._mouse_button_listeners_to_remove:
-                Screen.__mouse_button_listeners.remove(listener)
+                del Screen.__mouse_button_listeners[listener]
             for listener in Screen._mouse_motion_listeners_to_add:
-                Screen.__mouse_motion_listeners.add(listener)
+                Screen.__mouse_motion_listeners[listener] = None
             for listener in Screen._mouse_motion_listeners_to_remove:
-                Screen.__mouse_motion_listeners.remove(listener)
+                del Screen.__mouse_motion_listeners[listener]
             for listener in Screen._frame_listeners_to_add:
-                Screen.__frame_listeners.add(listener)
+                Screen.__frame_listeners[listener] = None
+            #New frame listeners should hear at least one frame (even when idle)
+            if Screen._frame_listeners_to_add:
+                Screen.__stay_awake = True
             for listener in Screen._frame_listeners_to_remove:
-                Screen.__frame_listeners.remove(listener)
+                del Screen.__frame_listeners[listener]
             #Empty the lists...
             Screen._keyboard_listeners_to_add.clear()
             Screen._keyboard_listeners_to_remove.clear()
@@ -316,7 +761,13 @@ class Screen(object):
         Quit the game.
         @param exception: if this is not None, it will be raised after an appropriate termination
         '''
-        pygame.quit()
+        if Screen.__render_worker!=None:
+            #Let it finish drawing first
+            Screen.__render_worker.stop()
+            Screen.__render_worker = None
+        #(Headless screens leave pygame running for other worlds - see world.py)
+        if not Screen.__headless:
+            pygame.quit()
         #If there was no exception, quit calmly, but otherwise re-raise
         if not exception==None:
             # Print the error and quit
@@ -332,8 +783,81 @@ class Screen(object):
         '''
         Screen._lock.acquire()
         Screen.__must_quit = True
+        Screen.__wake()
         Screen._lock.release()
         
+#Each world has its own screen
+World.register(Screen)
+
+class _RenderWorker(object):
+    '''
+    Draws pictures on its own thread, one at a time, so that the game loop can get on with the next frame
+    '''
+    
+    def __init__(self, draw):
+        '''
+        Construct a new render worker, and start its thread
+        @param draw: the function to call to draw (and show) a picture, returning whether anything was drawn
+        '''
+        self.__draw = draw
+        self.__requested = threading.Event()
+        self.__finished = threading.Event()
+        self.__finished.set()
+        self.__stopping = False
+        #Whether the last picture drew anything
+        self.__drew = False
+        #The information about an exception raised drawing the last picture (see sys.exc_info), if any
+        self.__exception_info = None
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+    
+    def submit(self):
+        '''
+        Ask for a picture to be drawn. The last picture must be finished (see wait).
+        '''
+        self.__drew = False
+        self.__finished.clear()
+        self.__requested.set()
+    
+    def wait(self):
+        '''
+        Wait until the last picture asked for has been drawn
+        @return: true iff it drew anything
+        @raise Exception: whatever was raised drawing it
+        '''
+        self.__finished.wait()
+        exception_info = self.__exception_info
+        if exception_info!=None:
+            self.__exception_info = None
+            raise exception_info[0], exception_info[1], exception_info[2]
+        return self.__drew
+    
+    def stop(self):
+        '''
+        Wait for the last picture to be drawn (ignoring any exception), and stop the thread
+        '''
+        self.__finished.wait()
+        self.__stopping = True
+        self.__requested.set()
+        self.__thread.join()
+    
+    def __run(self):
+        '''
+        Run by the thread: draw each picture asked for
+        '''
+        while True:
+            self.__requested.wait()
+            self.__requested.clear()
+            if self.__stopping:
+                return
+            try:
+                self.__drew = self.__draw()
+            except Exception:
+                self.__exception_info = sys.exc_info()
+            finally:
+                self.__finished.set()
+
 '''
 Synchronisation between listeners and the screen is quite a serious problem.
 We need to ensure that listeners can register and de-register themselves roughly whenever they
@@ -360,6 +884,8 @@ class _KeyboardListener(object):
         @param keys: a list of keys to listen to. The keys should be specified as in pygame.locals
         @param event_handler: the method to be called when an event is received
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.world = World.get_active_world()
         self.event_handler = event_handler
         self.key_set = set()
         for key in keys:
@@ -369,6 +895,7 @@ class _KeyboardListener(object):
         '''
         Register this listener to the screen
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         if self in Screen._keyboard_listeners_to_remove:
             Screen._keyboard_listeners_to_remove.remove(self)
@@ -379,6 +906,7 @@ class _KeyboardListener(object):
         '''
         Deregister this listener from the screen (don't deregister twice)
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         Screen._keyboard_listeners_to_add.pop(self,None)
         Screen._keyboard_listeners_to_remove.add(self)
@@ -402,26 +930,30 @@ class _MouseMotionListener(object):
         Create a mouse motion listener
         @param event_handler: the method to be called when an event is received
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.world = World.get_active_world()
         self.event_handler = event_handler
         
     def register(self):
         '''
         Register this listener to the screen
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         if self in Screen._mouse_motion_listeners_to_remove:
             Screen._mouse_motion_listeners_to_remove.remove(self)
-        Screen._mouse_motion_listeners_to_add.add(self)
+        Screen._mouse_motion_listeners_to_add[self] = None
         Screen._lock.release()
         
     def deregister(self):
         '''
         Deregister this listener from the screen (don't deregister twice)
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         Screen._mouse_motion_listeners_to_remove.add(self)
         if self in Screen._mouse_motion_listeners_to_add:
-            Screen._mouse_motion_listeners_to_add.remove(self)
+            del Screen._mouse_motion_listeners_to_add[self]
         Screen._lock.release()
     
     def handle_event(self,event):
@@ -442,26 +974,30 @@ class _MouseButtonListener(object):
         Create a mouse button listener
         @param event_handler: the method to be called when an event is received
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.world = World.get_active_world()
         self.event_handler = event_handler
         
     def register(self):
         '''
         Register this listener to the screen
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         if self in Screen._mouse_button_listeners_to_remove:
             Screen._mouse_button_listeners_to_remove.remove(self)
-        Screen._mouse_button_listeners_to_add.add(self)
+        Screen._mouse_button_listeners_to_add[self] = None
         Screen._lock.release()
         
     def deregister(self):
         '''
         Deregister this listener from the screen (don't deregister twice)
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         Screen._mouse_button_listeners_to_remove.add(self)
         if self in Screen._mouse_button_listeners_to_add:
-            Screen._mouse_button_listeners_to_add.remove(self)
+            del Screen._mouse_button_listeners_to_add[self]
         Screen._lock.release()
     
     def handle_event(self,event):
@@ -482,26 +1018,30 @@ class _FrameListener(object):
         Create a frame listener
         @param event_handler: the method to be called when a frame occurs
         '''
+        #The world this belongs to, which must be active whenever it is used
+        self.world = World.get_active_world()
         self.event_handler = event_handler
         
     def register(self):
         '''
         Register this listener to the screen
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         if self in Screen._frame_listeners_to_remove:
             Screen._frame_listeners_to_remove.remove(self)
-        Screen._frame_listeners_to_add.add(self)
+        Screen._frame_listeners_to_add[self] = None
         Screen._lock.release()
         
     def deregister(self):
         '''
         Deregister this listener from the screen (don't deregister twice)
         '''
+        World.check_active(self.world)
         Screen._lock.acquire()
         Screen._frame_listeners_to_remove.add(self)
         if self in Screen._frame_listeners_to_add:
-            Screen._frame_listeners_to_add.remove(self)
+            del Screen._frame_listeners_to_add[self]
         Screen._lock.release()
     
     def handle_event(self):
@@ -40,6 +40,7 @@ class FrameListener(object):
         
     def frame_passed(self):
         '''
-        Called whenever a frame passes.
+        Called whenever a frame passes (or for each step, when the screen has a fixed time step - see
+        Screen.get_timestep).
         '''
         pass
\ No newline at end of file
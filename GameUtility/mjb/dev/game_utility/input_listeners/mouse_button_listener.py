@@ -68,9 +68,27 @@ class MouseButtonListener(object):
         @param event: the event to handle
         '''
         if (event.type == pygame.locals.MOUSEBUTTONDOWN):
-            self.button_down(event.button)
+            self.button_down_at(event.button, event.pos)
         elif (event.type == pygame.locals.MOUSEBUTTONUP):
-            self.button_up(event.button)
+            self.button_up_at(event.button, event.pos)
+    
+    def button_down_at(self, button, mouse_position):
+        '''
+        Triggered when a mouse button is pushed down, with the position of the mouse held in the event.
+        By default, this just calls button_down (override this instead if you need to know where the mouse was)
+        @param button: the button that was pushed down
+        @param mouse_position: the position of the mouse when the button was pushed down
+        '''
+        self.button_down(button)
+    
+    def button_up_at(self, button, mouse_position):
+        '''
+        Triggered when a mouse button is released, with the position of the mouse held in the event.
+        By default, this just calls button_up (override this instead if you need to know where the mouse was)
+        @param button: the button that was released
+        @param mouse_position: the position of the mouse when the button was released
+        '''
+        self.button_up(button)
     
     def button_down(self, button):
         '''
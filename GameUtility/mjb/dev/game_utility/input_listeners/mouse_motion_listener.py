@@ -20,7 +20,8 @@ class MouseMotionListener(object):
     
     Technical note:
     pygame.event.get(): can return multiple motion events if the code is running slowly, since it returns the entire queue!
-    Only the current mouse position is returned by this event, so only one motion event per call to this method will actually be considered.
+    Each is heard with the position held in that event (so scripted or replayed motion is heard where it happened,
+    rather than wherever the real mouse is).
     '''
     
     def __init__(self):
@@ -55,7 +56,7 @@ class MouseMotionListener(object):
         Private method to handle the mouse motion event from the screen
         @param event: the event to handle
         '''
-        self.mouse_moved(pygame.mouse.get_pos())
+        self.mouse_moved(event.pos)
             
     def mouse_moved(self,mouse_position):
         '''
@@ -4,6 +4,7 @@ Created on 6 Aug 2014
 @author: michael
 '''
 
+import pygame
 from mjb.dev.game_utility.shapes.shape import Shape
 from mjb.dev.game_utility.shapes.handlers.drawable_shape_handler import DrawableShapeHandler
 from mjb.dev.game_utility.capabilities.drawable import Drawable
@@ -72,8 +73,10 @@ class DrawableRectangleHandler(DrawableShapeHandler):
         (x_offset,y_offset) = top_left
         (x_min,y_min,x_max,y_max) = self.get_bounding_rectangle()
         #Redraw onto the surface...
-        target_rect = (x_min-x_offset,y_min-y_offset,x_max-x_min,y_max-y_min)
-        surface.fill(self.__colour,target_rect)
+        #(Clipped first, since filling from above or left of the surface fills the wrong area)
+        target_rect = pygame.Rect(x_min-x_offset,y_min-y_offset,x_max-x_min,y_max-y_min).clip(surface.get_clip())
+        if target_rect.width>0 and target_rect.height>0:
+            surface.fill(self.__colour,target_rect)
         #Done!
         
     def set_visible(self, visible=True):
@@ -4,18 +4,29 @@ Created on 7 Aug 2014
 @author: michael
 '''
 
+import binascii
 from mjb.dev.game_utility.shapes.shape import Shape
 from mjb.dev.game_utility.utility.rectangle_filler import RectangleFiller
 from mjb.dev.game_utility.collisions.rectangle_collider_picker import RectangleColliderPicker
+from mjb.dev.game_utility.utility.bitmask import Bitmask
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    #The pixels are read one at a time without numpy
+    numpy = None
 
 class ImageShape(Shape):
     '''
     This class will accept an image (which you should never modify) and construct
     a shape from that image. The image here is intended to be an image as defined in the graphics
     package.
+    
+    With numpy available, the pixels are read from the surface in one go (through the surfarray),
+    and which squares are occupied is worked out with array operations rather than pixel by pixel.
     '''
 
-    def __init__(self, image, cache_depth=2):
+    def __init__(self, image, cache_depth=2, minimal_rectangles=False):
         '''
         Construct a new shape from the given image. The image should never be modified
         directly (i.e.: it should be immutable). This is why operations on images always
@@ -24,12 +35,16 @@ class ImageShape(Shape):
         @param cache_depth: how many calculations to save for this image. The calculation
         for an image at high precision is quite expensive, so it is recommended that you make
         use of the cache. Default 2
+        @param minimal_rectangles: false by default, set to true to calculate the shape with as few rectangles
+        as possible (see RectangleFiller). This is slower to calculate, so is best used with the cache, but
+        every collision with the shape is cheaper.
         '''
         Shape.__init__(self, cache_depth)
         #Save the pygame surface (do not need the rest)
         self.__image = image
         self.__surface = image.get_surface()
         self.__size = self.__surface.get_size()
+        self.__minimal_rectangles = minimal_rectangles
     
     def _calculate_shape_to_override(self,precision,include_collider):
         '''
@@ -37,6 +52,66 @@ class ImageShape(Shape):
         is meant to be overridden.
         '''
         (width,height) = self.__size
+        #Now fill the rectangle...
+        if numpy is not None:
+            rects = RectangleFiller.fill_bool_grid(self.__calculate_occupancy_grid(precision),
+                                                   self.__minimal_rectangles)
+        else:
+            rects = RectangleFiller.fill_grid(self.__calculate_occupied_coords(precision),
+                                              self.__minimal_rectangles)
+        #Convert the rectangles back...
+        converted_coords = []
+        for (x_min,y_min,x_max,y_max) in rects:
+            converted_coords.append((x_min * precision,
+                                     y_min * precision,
+                                     min((x_max+1) * precision,width),
+                                     min((y_max+1) * precision,height)))
+        #Now create a collider if appropriate...
+        if include_collider:
+            collider = RectangleColliderPicker.get_recommended_collider(self.__size, len(converted_coords))
+            for (x_min,y_min,x_max,y_max) in converted_coords:
+                collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+        else:
+            collider = None
+        #Return the result!
+        print("Used this many rectangles: " + str(len(converted_coords)))
+        return (converted_coords,collider)
+    
+    def _calculate_bitmask_to_override(self,precision):
+        '''
+        This method's intended behaviour is identical to calculate bitmask's except this
+        is meant to be overridden. The bitmask is built straight from the occupied squares
+        (no rectangles are needed).
+        '''
+        (width,height) = self.__size
+        if numpy is not None:
+            #Spread each square over its pixels, and pack each row of pixels into an integer
+            pixel_grid = numpy.repeat(self.__calculate_occupancy_grid(precision), precision, axis=0)[0:width]
+            #(packbits pads the end, which is the low end once the bits are reversed)
+            padding = (-width)%8
+            square_rows = [int(binascii.hexlify(numpy.packbits(pixel_grid[::-1,y]).tostring()),16)>>padding
+                           for y in range(0,pixel_grid.shape[1])]
+            return Bitmask(self.__size, [square_rows[y/precision] for y in range(0,height)])
+        #The mask of each row of squares
+        square_rows = [0]*(((height-1)/precision)+1)
+        for (x,y) in self.__calculate_occupied_coords(precision):
+            x_min = x * precision
+            x_max = min((x+1) * precision,width)
+            square_rows[y] |= ((1<<(x_max-x_min))-1)<<x_min
+        #Each row of squares covers precision rows of pixels
+        rows = [square_rows[y/precision] for y in range(0,height)]
+        return Bitmask(self.__size, rows)
+    
+    def __calculate_occupied_coords(self,precision):
+        '''
+        @param precision: the precision (not None) to divide the image into squares with
+        @return: a list of the (x,y) coordinates of the precision by precision squares which contain
+        a pixel not of the colour key
+        '''
+        if numpy is not None:
+            (xs,ys) = numpy.nonzero(self.__calculate_occupancy_grid(precision))
+            return zip(xs.tolist(),ys.tolist())
+        (width,height) = self.__size
         colour_key = self.__image.get_colour_key()
         #For the non-trivial precision, calculate which rectangles
         #are occupied and which are not...
@@ -74,25 +149,26 @@ class ImageShape(Shape):
                 if not is_empty:
                     #Add to the coordinates...
                     occupied_coords.append((x,y))
-        #Now fill the rectangle...
-        rects = RectangleFiller.fill_grid(occupied_coords)
-        #Convert the rectangles back...
-        converted_coords = []
-        for (x_min,y_min,x_max,y_max) in rects:
-            converted_coords.append((x_min * precision,
-                                     y_min * precision,
-                                     min((x_max+1) * precision,width),
-                                     min((y_max+1) * precision,height)))
-        #Now create a collider if appropriate...
-        if include_collider:
-            collider = RectangleColliderPicker.get_recommended_collider(self.__size, len(converted_coords))
-            for (x_min,y_min,x_max,y_max) in converted_coords:
-                collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
-        else:
-            collider = None
-        #Return the result!
-        print("Used this many rectangles: " + str(len(converted_coords)))
-        return (converted_coords,collider)
+        return occupied_coords
+    
+    def __calculate_occupancy_grid(self,precision):
+        '''
+        (numpy only)
+        @param precision: the precision (not None) to divide the image into squares with
+        @return: a boolean array indexed by [x,y], true iff the precision by precision square (x,y)
+        contains a pixel not of the colour key
+        '''
+        (width,height) = self.__size
+        #Read all of the pixels at once as [x,y,(r,g,b)]
+        occupied = (pygame.surfarray.array3d(self.__surface)!=numpy.array(self.__image.get_colour_key())).any(axis=2)
+        if precision==1:
+            return occupied
+        #Pad to a whole number of squares, and reduce each square to whether any of it is occupied
+        columns = ((width-1)/precision)+1
+        rows = ((height-1)/precision)+1
+        padded = numpy.zeros((columns*precision,rows*precision), dtype=bool)
+        padded[0:width,0:height] = occupied
+        return padded.reshape(columns,precision,rows,precision).any(axis=3).any(axis=1)
     
     def get_size(self):
         '''
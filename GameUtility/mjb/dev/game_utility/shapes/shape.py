@@ -5,6 +5,7 @@ Created on 1 Aug 2014
 '''
 
 from mjb.dev.game_utility.collisions.rectangle_collider_picker import RectangleColliderPicker
+from mjb.dev.game_utility.utility.bitmask import Bitmask
 
 class Shape(object):
     '''
@@ -17,6 +18,9 @@ class Shape(object):
     
     The shape's calculations for any given precision should always remain the same (immutable).
     To change this (such as in a rotation), change the shape held by the shape handler.
+    
+    A shape can also calculate a bitmask of the pixels it occupies (see calculate_bitmask), which
+    is usually much cheaper to collide than many rectangles for detailed shapes.
     '''
 
     def __init__(self, cache_depth=2):
@@ -29,6 +33,8 @@ class Shape(object):
         self.__cache_depth = cache_depth
         #Implemented as a list for speed (no particular care taken with who is stored)
         self.__cache = []
+        #The bitmasks are cached separately (in the same way)
+        self.__bitmask_cache = []
         
     def forget_cache(self):
         '''
@@ -36,6 +42,7 @@ class Shape(object):
         (and rarely worth your time)
         '''
         self.__cache = []
+        self.__bitmask_cache = []
     
     def get_cache_depth(self):
         '''
@@ -53,6 +60,8 @@ class Shape(object):
             #Now pop elements to fit
             while len(self.__cache)>=cache_depth:
                 self.__cache.pop()
+            while len(self.__bitmask_cache)>cache_depth:
+                self.__bitmask_cache.pop()
         self.__cache_depth = cache_depth
     
     def calculate_shape(self,precision,include_collider=True):
@@ -95,6 +104,34 @@ class Shape(object):
         '''
         pass
     
+    def calculate_bitmask(self,precision):
+        '''
+        @param precision: the precision to which the shape should be calculated, as in calculate_shape
+        @return: a bitmask (see utility.bitmask) the size of the shape, with the pixels covered by the shape
+        at this precision set. None if the precision is None (use the bounding rectangle).
+        '''
+        if precision==None:
+            return None
+        if self.__cache_depth>0:
+            for (p,res) in self.__bitmask_cache:
+                if (p==precision):
+                    return res
+            if len(self.__bitmask_cache)==self.__cache_depth:
+                self.__bitmask_cache.pop()
+            res = self._calculate_bitmask_to_override(precision)
+            self.__bitmask_cache.append((precision,res))
+            return res
+        return self._calculate_bitmask_to_override(precision)
+    
+    def _calculate_bitmask_to_override(self,precision):
+        '''
+        This method's intended behaviour is identical to calculate bitmask's except this
+        may be overridden. The precision will not be none in this case. By default, the bitmask
+        is filled from the rectangles calculated by calculate_shape.
+        '''
+        (rect_list,_) = self.calculate_shape(precision, False)
+        return Bitmask.from_rectangles(self.get_size(), rect_list)
+    
     def get_size(self):
         '''
         (You should override this)
@@ -0,0 +1,147 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+class Bitmask(object):
+    '''
+    A bitmask records exactly which pixels of a shape are occupied, with the shape rooted at (0,0).
+
+    Each row of the bitmask is held as a single integer, where bit x is set iff the pixel (x,y)
+    is occupied. Python holds (long) integers as arrays of machine words, so shifting and and-ing two rows
+    works a word at a time (in C) rather than a pixel at a time. Checking whether two bitmasks overlap
+    therefore costs one shift and one and per row of the region where they intersect.
+
+    Like shapes, a bitmask should not be modified once it is in use.
+    '''
+
+    def __init__(self, size, rows=None):
+        '''
+        Construct a new bitmask
+        @param size: the size of the bitmask as (width,height)
+        @param rows: None by default (for an empty bitmask), otherwise a list of the integers for each row
+        (which should have no bits set at width or beyond)
+        @raise ValueError: if the number of rows does not match the height
+        '''
+        (width,height) = size
+        if rows is None:
+            rows = [0]*height
+        elif len(rows)!=height:
+            raise ValueError("The bitmask needs one row for each of the " + str(height) + " pixels of height")
+        self.__width = width
+        self.__height = height
+        self.__rows = rows
+
+    @staticmethod
+    def from_rectangles(size, rect_list):
+        '''
+        @param size: the size of the bitmask as (width,height)
+        @param rect_list: a list of rectangles of the form (x_min,y_min,x_max,y_max) (rooted at (0,0))
+        @return: a new bitmask with exactly the pixels in the rectangles set
+        '''
+        bitmask = Bitmask(size)
+        for rect in rect_list:
+            bitmask.fill_rectangle(rect)
+        return bitmask
+
+    def get_size(self):
+        '''
+        @return: the size of the bitmask as (width,height)
+        '''
+        return (self.__width,self.__height)
+
+    def get_rows(self):
+        '''
+        @return: the list of integers for each row. You should not modify this list.
+        '''
+        return self.__rows
+
+    def get_bit(self, x, y):
+        '''
+        @param x: the x coordinate of the pixel
+        @param y: the y coordinate of the pixel
+        @return: true iff the pixel is occupied (pixels outside the bitmask never are)
+        '''
+        if x<0 or y<0 or x>=self.__width or y>=self.__height:
+            return False
+        return (self.__rows[y]>>x)&1==1
+
+    def set_bit(self, x, y, value=True):
+        '''
+        @param x: the x coordinate of the pixel (must be inside the bitmask)
+        @param y: the y coordinate of the pixel (must be inside the bitmask)
+        @param value: true by default, whether or not the pixel should be occupied
+        '''
+        if value:
+            self.__rows[y] |= 1<<x
+        else:
+            self.__rows[y] &= ~(1<<x)
+
+    def fill_rectangle(self, rect):
+        '''
+        Set all of the pixels in a rectangle (the part of it outside the bitmask is ignored)
+        @param rect: the rectangle to fill in the form (x_min,y_min,x_max,y_max)
+        '''
+        (x_min,y_min,x_max,y_max) = self.__clip(rect)
+        if x_min>=x_max:
+            return
+        mask = ((1<<(x_max-x_min))-1)<<x_min
+        rows = self.__rows
+        for y in range(y_min,y_max):
+            rows[y] |= mask
+
+    def count(self):
+        '''
+        @return: the number of occupied pixels
+        '''
+        return sum(bin(row).count("1") for row in self.__rows)
+
+    def overlaps(self, other, x_offset, y_offset):
+        '''
+        Check whether another bitmask overlaps this one (shares an occupied pixel)
+        @param other: the other bitmask
+        @param x_offset: the x coordinate of the other bitmask's (0,0) relative to this one's
+        @param y_offset: the y coordinate of the other bitmask's (0,0) relative to this one's
+        @return: true iff some pixel is occupied in both
+        '''
+        (other_width,other_height) = other.get_size()
+        if x_offset>=self.__width or x_offset+other_width<=0:
+            return False
+        rows = self.__rows
+        other_rows = other.get_rows()
+        y_min = max(0,y_offset)
+        y_max = min(self.__height,y_offset+other_height)
+        if x_offset>=0:
+            for y in range(y_min,y_max):
+                if rows[y]&(other_rows[y-y_offset]<<x_offset):
+                    return True
+        else:
+            shift = -x_offset
+            for y in range(y_min,y_max):
+                if (rows[y]<<shift)&other_rows[y-y_offset]:
+                    return True
+        return False
+
+    def overlaps_rectangle(self, rect):
+        '''
+        @param rect: the rectangle to check in the form (x_min,y_min,x_max,y_max) relative to the bitmask
+        @return: true iff some pixel in the rectangle is occupied
+        '''
+        (x_min,y_min,x_max,y_max) = self.__clip(rect)
+        if x_min>=x_max:
+            return False
+        mask = ((1<<(x_max-x_min))-1)<<x_min
+        rows = self.__rows
+        for y in range(y_min,y_max):
+            if rows[y]&mask:
+                return True
+        return False
+
+    def __clip(self, rect):
+        '''
+        @param rect: a rectangle in the form (x_min,y_min,x_max,y_max)
+        @return: the rectangle clipped to the bitmask
+        '''
+        (x_min,y_min,x_max,y_max) = rect[0:4]
+        return (max(x_min,0),max(y_min,0),min(x_max,self.__width),min(y_max,self.__height))
@@ -5,6 +5,12 @@ Created on 14 Jul 2014
 '''
 
 import collections
+import re
+try:
+    import numpy
+except ImportError:
+    #Boolean grids are converted cell by cell without numpy
+    numpy = None
 
 class RectangleFiller(object):
     '''
@@ -23,8 +29,22 @@ class RectangleFiller(object):
     The algorithm does this via a (suboptimal at least in terms of the number of rectangles)
     heuristic. It will find the top and then left most rectangle not covered, and alternately
     try expanding the rectangle horizontally and then vertically until it can do neither.
+    
+    The grid can be given either as a list of coordinates (fill_grid), or as the whole grid
+    (fill_bool_grid and fill_cell_array), which avoids making an object for every cell.
+    
+    For offline (or cached) use, each method also has a minimal mode, which finds a partition into the
+    fewest rectangles possible (at the cost of them being less "large", and of more time).
+    A region of cells is a rectilinear polygon, and the fewest rectangles it can be cut into is
+    (reflex vertices) - (holes) + 1 - (most non-crossing chords between two reflex vertices). Those chords
+    are found as the largest independent set in the bipartite graph of horizontal and vertical chords which
+    cross, by a maximum matching (Konig's theorem). Having cut along them, every remaining reflex vertex is cut
+    vertically until the cut meets the boundary or another cut, which leaves only rectangles.
     '''
     
+    #Finds the next cell to fill in a cell array
+    __NEXT_CELL = re.compile(b'[^\x00]')
+    
     class _TraversableList():
         '''
         This class implements a list quickly traversable by the filling algorithm.
@@ -107,10 +127,12 @@ class RectangleFiller(object):
             return self.__head.coord
     
     @staticmethod
-    def fill_grid(grid):
+    def fill_grid(grid, minimal=False):
         '''
         @param grid: the "grid" should consist of a list of tuple pairs (x,y)
         representing the rectangles which should be filled.
+        @param minimal: false by default, set to true to use as few rectangles as possible (see the class
+        description). The coordinates must not be negative in this case.
         @return: a list of rectangles in the form (x_min,y_min,x_max,y_max)
         which cover all of the grid and no other coordinates, which are as large as possible.
         '''
@@ -120,6 +142,13 @@ class RectangleFiller(object):
         if grid==[]:
             #Nothing to do... (special case must be handled for correctness)
             return []
+        if minimal:
+            width = max(x for (x,_) in grid)+1
+            height = max(y for (_,y) in grid)+1
+            cells = bytearray(width*height)
+            for (x,y) in grid:
+                cells[x*height+y] = 1
+            return RectangleFiller.fill_cell_array(cells, width, height, True)
         #Construct the list for the specialised order of one traversal...
         traversable_list = RectangleFiller._TraversableList(grid)
         rect_list = []
@@ -132,6 +161,228 @@ class RectangleFiller(object):
         #Finished!
         return rect_list
         
+    @staticmethod
+    def fill_bool_grid(grid, minimal=False):
+        '''
+        @param grid: the grid as a 2d boolean array indexed by [x][y] (so a list of columns, or a numpy array)
+        where the true cells should be filled.
+        @param minimal: false by default, set to true to use as few rectangles as possible
+        @return: a list of rectangles in the form (x_min,y_min,x_max,y_max), exactly as fill_grid would
+        return for the coordinates of the true cells.
+        '''
+        width = len(grid)
+        if width==0:
+            return []
+        height = len(grid[0])
+        if numpy is not None and isinstance(grid, numpy.ndarray):
+            cells = bytearray(numpy.ascontiguousarray(grid, dtype=numpy.uint8).tostring())
+        else:
+            cells = bytearray(width*height)
+            for x in range(0,width):
+                cells[x*height:(x+1)*height] = bytearray(1 if cell else 0 for cell in grid[x])
+        return RectangleFiller.fill_cell_array(cells, width, height, minimal)
+    
+    @staticmethod
+    def fill_cell_array(cells, width, height, minimal=False):
+        '''
+        The grid native version of fill_grid. The grid is scanned once for the top left of each rectangle,
+        and the rectangles are expanded by checking (and clearing) whole columns and rows of cells at a time.
+        This runs in O(N) for N the size of the grid, with no objects made for the cells.
+        @param cells: the grid as a bytearray of width*height cells in column major order (the cell (x,y)
+        is cells[x*height+y]), where the non-zero cells should be filled. The cells are cleared as they are
+        filled, so pass a copy if you need it afterwards.
+        @param width: the width of the grid
+        @param height: the height of the grid
+        @param minimal: false by default, set to true to use as few rectangles as possible (the cells are not
+        cleared in this case)
+        @return: a list of rectangles in the form (x_min,y_min,x_max,y_max), exactly as fill_grid would
+        return for the coordinates of the non-zero cells.
+        '''
+        if minimal:
+            return RectangleFiller.__fill_minimal(cells, width, height)
+        rect_list = []
+        next_cell = RectangleFiller.__NEXT_CELL
+        match = next_cell.search(cells)
+        while match!=None:
+            index = match.start()
+            cells[index] = 0
+            (x_min,y_min) = divmod(index,height)
+            #The same expansion as __expand
+            alternater = True
+            current_width = 1
+            current_height = 1
+            failed_one_side = False
+            while True:
+                if alternater:
+                    #Expand along the x axis (the column of cells at x_min+current_width)
+                    start = (x_min+current_width)*height+y_min
+                    succeeded = (x_min+current_width<width and
+                                 cells.find(b'\x00', start, start+current_height)==-1)
+                    if succeeded:
+                        cells[start:start+current_height] = bytearray(current_height)
+                        current_width+=1
+                else:
+                    #Expand along the y axis (the row of cells at y_min+current_height)
+                    start = x_min*height+y_min+current_height
+                    stop = start+current_width*height
+                    succeeded = (y_min+current_height<height and
+                                 not 0 in cells[start:stop:height])
+                    if succeeded:
+                        cells[start:stop:height] = bytearray(current_width)
+                        current_height+=1
+                if not succeeded:
+                    #Expansion is only possible along the other axis now
+                    alternater = not alternater
+                    if failed_one_side:
+                        break
+                    failed_one_side = True
+                if not failed_one_side:
+                    alternater = not alternater
+            rect_list.append((x_min,y_min,x_min+current_width-1,y_min+current_height-1))
+            match = next_cell.search(cells, index+1)
+        return rect_list
+    
+    @staticmethod
+    def __fill_minimal(cells, width, height):
+        '''
+        Partition the cells into the fewest rectangles possible (see the class description)
+        @param cells: the grid as a column major bytearray, as in fill_cell_array
+        @param width: the width of the grid
+        @param height: the height of the grid
+        @return: a list of rectangles in the form (x_min,y_min,x_max,y_max)
+        '''
+        def filled(x,y):
+            return x>=0 and y>=0 and x<width and y<height and cells[x*height+y]!=0
+        def is_horizontal_inside(x,y):
+            #The edge from the grid point (x,y) to (x+1,y)
+            return filled(x,y-1) and filled(x,y)
+        def is_vertical_inside(x,y):
+            #The edge from the grid point (x,y) to (x,y+1)
+            return filled(x-1,y) and filled(x,y)
+        #Find the reflex vertices - the grid points with exactly three of the four cells around them filled.
+        #Cuts from them go away from the missing cell, in the direction (x_direction,y_direction)
+        reflex_vertices = {}
+        for x in range(0,width+1):
+            for y in range(0,height+1):
+                around = [filled(x-1,y-1),filled(x,y-1),filled(x-1,y),filled(x,y)]
+                if around.count(True)==3:
+                    missing = around.index(False)
+                    reflex_vertices[(x,y)] = ((1,-1,1,-1)[missing],(1,1,-1,-1)[missing])
+        #Find the chords between two reflex vertices, as (x_min,x_max,y) and (x,y_min,y_max)
+        horizontal_chords = []
+        vertical_chords = []
+        for ((x,y),(x_direction,y_direction)) in reflex_vertices.items():
+            if x_direction==1:
+                end = x
+                while is_horizontal_inside(end,y):
+                    end+=1
+                if reflex_vertices.get((end,y),(0,0))[0]==-1:
+                    horizontal_chords.append((x,end,y))
+            if y_direction==1:
+                end = y
+                while is_vertical_inside(x,end):
+                    end+=1
+                if reflex_vertices.get((x,end),(0,0))[1]==-1:
+                    vertical_chords.append((x,y,end))
+        #The vertical chords crossing each horizontal chord (touching counts)
+        crossing = [[index for (index,(x,y_min,y_max)) in enumerate(vertical_chords)
+                     if x_min<=x and x<=x_max and y_min<=y and y<=y_max]
+                    for (x_min,x_max,y) in horizontal_chords]
+        #Find a maximum matching by augmenting paths (found breadth first)
+        horizontal_match = [None]*len(horizontal_chords)
+        vertical_match = [None]*len(vertical_chords)
+        for horizontal in range(0,len(horizontal_chords)):
+            #The horizontal chord each vertical chord was reached from
+            reached_from = {}
+            found = None
+            layer = [horizontal]
+            while layer and found==None:
+                next_layer = []
+                for current in layer:
+                    for vertical in crossing[current]:
+                        if vertical in reached_from:
+                            continue
+                        reached_from[vertical] = current
+                        if vertical_match[vertical]==None:
+                            found = vertical
+                            break
+                        next_layer.append(vertical_match[vertical])
+                    if found!=None:
+                        break
+                layer = next_layer
+            #Flip the path
+            while found!=None:
+                current = reached_from[found]
+                previous = horizontal_match[current]
+                horizontal_match[current] = found
+                vertical_match[found] = current
+                found = previous
+        #Konig: the chords reachable from the unmatched horizontal chords by alternating paths give
+        #the minimum vertex cover (the unreached horizontal and reached vertical chords), and the rest
+        #is the maximum independent set
+        reached_horizontal = set(index for index in range(0,len(horizontal_chords)) if horizontal_match[index]==None)
+        reached_vertical = set()
+        layer = list(reached_horizontal)
+        while layer:
+            next_layer = []
+            for current in layer:
+                for vertical in crossing[current]:
+                    if vertical not in reached_vertical:
+                        reached_vertical.add(vertical)
+                        matched = vertical_match[vertical]
+                        if matched!=None and matched not in reached_horizontal:
+                            reached_horizontal.add(matched)
+                            next_layer.append(matched)
+            layer = next_layer
+        #Cut along the chords. The horizontal cuts are the edges (x,y) to (x+1,y) at x*(height+1)+y,
+        #and the vertical cuts are the edges (x,y) to (x,y+1) at x*height+y
+        horizontal_cuts = bytearray(width*(height+1))
+        vertical_cuts = bytearray((width+1)*height)
+        resolved = set()
+        for index in reached_horizontal:
+            (x_min,x_max,y) = horizontal_chords[index]
+            for x in range(x_min,x_max):
+                horizontal_cuts[x*(height+1)+y] = 1
+            resolved.add((x_min,y))
+            resolved.add((x_max,y))
+        for index in range(0,len(vertical_chords)):
+            if index not in reached_vertical:
+                (x,y_min,y_max) = vertical_chords[index]
+                vertical_cuts[x*height+y_min:x*height+y_max] = bytearray([1])*(y_max-y_min)
+                resolved.add((x,y_min))
+                resolved.add((x,y_max))
+        #Cut vertically from the remaining reflex vertices
+        for ((x,y),(_,y_direction)) in reflex_vertices.items():
+            if (x,y) in resolved:
+                continue
+            while True:
+                edge_y = y if y_direction==1 else y-1
+                if not is_vertical_inside(x,edge_y) or vertical_cuts[x*height+edge_y]:
+                    break
+                vertical_cuts[x*height+edge_y] = 1
+                y+=y_direction
+                #Stop at a horizontal cut
+                if ((x>0 and horizontal_cuts[(x-1)*(height+1)+y]) or
+                    (x<width and horizontal_cuts[x*(height+1)+y])):
+                    break
+        #Every region is now a rectangle - read them off from their top left cells
+        rect_list = []
+        done = bytearray(width*height)
+        for x in range(0,width):
+            for y in range(0,height):
+                if done[x*height+y] or not filled(x,y):
+                    continue
+                current_width = 1
+                while filled(x+current_width,y) and not vertical_cuts[(x+current_width)*height+y]:
+                    current_width+=1
+                current_height = 1
+                while filled(x,y+current_height) and not horizontal_cuts[x*(height+1)+y+current_height]:
+                    current_height+=1
+                for rect_x in range(x,x+current_width):
+                    done[rect_x*height+y:rect_x*height+y+current_height] = bytearray([1])*current_height
+                rect_list.append((x,y,x+current_width-1,y+current_height-1))
+        return rect_list
+    
     @staticmethod
     def __expand(top_left,traversable_list):
         '''
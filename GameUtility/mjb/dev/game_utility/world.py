@@ -0,0 +1,140 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import collections
+import copy
+import threading
+import types
+
+class World(object):
+    '''
+    A world holds everything the screen, the picture handler and the capability screens keep, so that
+    many independent games can be set up and run in one process (e.g. many headless simulations, one
+    after another or set up side by side).
+
+    The screen and the rest are used through their static methods as always - these act on whichever world
+    is active. There is always a default world, which is active until another world is activated, so code
+    which never creates a world is unaffected. Anything created (shape handlers, capabilities, listeners)
+    belongs to the world which was active at the time, and must only be used while that world is active
+(registering a listener or moving a capability in any other world raises a ValueError).
+
+    Activating a world swaps the state of every registered class for the state of the world, so worlds
+    should only be switched between on the thread running the game loop, and not while a game loop is
+    running (start_game_loop only returns when its game quits - see max_frames). Only one world can show
+    a display: screens initialised while another world has the display should be headless.
+
+    with World():
+        Screen.initialise(headless=True, max_frames=1000)
+        ...
+        Screen.start_game_loop()
+    '''
+
+    #The classes whose (class level) state each world has its own copy of, to the names and initial
+    #values of the state
+    __registered = collections.OrderedDict()
+    #The world whose state is held by the classes (None until the default world is first needed)
+    __active = None
+    #The type of the locks made by threading.Lock
+    __LOCK_TYPE = type(threading.Lock())
+
+    @staticmethod
+    def register(cls):
+        '''
+        Register a class whose class level state (anything other than methods and inner classes) each world
+        should have its own copy of. This should be called when the class has just been created, so that
+        the initial state can be recorded.
+        @param cls: the class to register
+        '''
+        state = {}
+        for (name,value) in cls.__dict__.items():
+            if World.__is_state(name,value):
+                #(Copied, since the original belongs to the default world)
+                state[name] = World.__copy_initial_value(value)
+        World.__registered[cls] = state
+
+    @staticmethod
+    def get_active_world():
+        '''
+        @return: the world which is active
+        '''
+        if World.__active==None:
+            #The default world, which already holds the state in the classes
+            World.__active = World()
+        return World.__active
+
+    @staticmethod
+    def check_active(world):
+        '''
+        Check that something is being used in the world it belongs to
+        @param world: the world it was created in
+        @raise ValueError: if that world is not the active world
+        '''
+        if not world is World.get_active_world():
+            raise ValueError("Something created in one world was used while another world was active")
+
+    def __init__(self):
+        '''
+        Construct a new world (which is not active yet)
+        '''
+        #From each class to its state in this world (missing until it is needed)
+        self.__states = {}
+        #The worlds to activate again on leaving a with statement
+        self.__previous = []
+
+    def activate(self):
+        '''
+        Make this the active world
+        '''
+        active = World.get_active_world()
+        if active is self:
+            return
+        #Save the state of the active world, and load this one's
+        for (cls,initial_state) in World.__registered.items():
+            #(From the dictionary, so that anything wrapped - like static methods - stays wrapped)
+            active.__states[cls] = dict((name,cls.__dict__[name]) for name in initial_state)
+            state = self.__states.get(cls)
+            if state==None:
+                state = dict((name,World.__copy_initial_value(value)) for (name,value) in initial_state.items())
+            for (name,value) in state.items():
+                setattr(cls,name,value)
+        #The state is held by the classes now
+        self.__states = {}
+        World.__active = self
+
+    def __enter__(self):
+        self.__previous.append(World.get_active_world())
+        self.activate()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.__previous.pop().activate()
+        return False
+
+    @staticmethod
+    def __is_state(name, value):
+        '''
+        @param name: the name of a class attribute
+        @param value: its value
+        @return: true iff the attribute is state (rather than a method, an inner class or a python attribute)
+        '''
+        if name.startswith("__") and name.endswith("__"):
+            return False
+        return not isinstance(value,(types.FunctionType,staticmethod,classmethod,property,type,types.ClassType))
+
+    @staticmethod
+    def __copy_initial_value(value):
+        '''
+        @param value: the initial value of some state
+        @return: the value for a new world (a new lock or container, or the same value if it can be shared)
+        '''
+        if isinstance(value,World.__LOCK_TYPE):
+            return threading.Lock()
+        elif isinstance(value,threading._Semaphore):
+            return threading.Semaphore()
+        elif isinstance(value,(dict,list,set,bytearray)):
+            #(Including ordered and default dictionaries)
+            return copy.copy(value)
+        return value
@@ -0,0 +1,24 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import mjb.test.game_utility.capabilities.test_collideable as test_collideable
+import mjb.test.game_utility.capabilities.test_clickable as test_clickable
+import mjb.test.game_utility.capabilities.test_touchable as test_touchable
+
+def suite():
+    '''
+    Returns a test suite for all of the modules in this package
+    '''
+    test_suite = unittest.TestSuite(
+        #Add all of the suites here:
+        [test_collideable.suite(),
+         test_clickable.suite(),
+         test_touchable.suite()
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,103 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.capabilities.clickable import ClickScreen, Clickable
+from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.shapes.custom_rectangles_shape import CustomRectanglesShape
+
+class TestClickable(unittest.TestCase):
+    '''
+    Test class for clickable.py (the click events, on a headless screen of a world of its own)
+    '''
+
+    def setUp(self):
+        self.world = World()
+        self.world.__enter__()
+        Screen.initialise(headless=True, size=(200,200))
+        ClickScreen.initialise()
+        self.events = []
+
+    def tearDown(self):
+        self.world.__exit__(None, None, None)
+
+    def make_clickable(self, name, depth, top_left, top_only=False, rect_list=((0,0,20,20),)):
+        '''
+        @return: a clickable for a new shape handler, recording its click events as (name,event,button,on top)
+        '''
+        shape_handler = ShapeHandler(CustomRectanglesShape(list(rect_list)), depth, top_left)
+        return Clickable(shape_handler, 1,
+                         lambda button,on_top: self.events.append((name,"down",button,on_top)),
+                         lambda button,on_top: self.events.append((name,"up",button,on_top)),
+                         top_only=top_only)
+
+    def click(self, location, button=1):
+        '''
+        @return: the events from pushing a button down at the location
+        '''
+        self.events = []
+        ClickScreen._mouse_button_down(button, location)
+        return self.events
+
+    def test_top_only(self):
+        top = self.make_clickable("top", 0, (10,10), top_only=True)
+        middle = self.make_clickable("middle", 1, (15,15))
+        bottom = self.make_clickable("bottom", 2, (20,20), top_only=True)
+        #The top one and the one underneath which isn't top only (the bottom one isn't told)
+        self.assertEqual(self.click((25,25)), [("top","down",1,True),("middle","down",1,False)])
+        self.assertEqual(self.click((12,12), 3), [("top","down",3,True)])
+        self.assertEqual(self.click((38,38)), [("bottom","down",1,True)])
+        self.assertEqual(self.click((100,100)), [])
+        #Changing the depth changes which is on top
+        bottom.get_shape_handler().set_depth(-1)
+        self.assertEqual(self.click((25,25)), [("bottom","down",1,True),("middle","down",1,False)])
+        middle.get_shape_handler().set_depth(-2)
+        self.assertEqual(self.click((25,25)), [("middle","down",1,True)])
+        #And so does moving
+        top.get_shape_handler().set_top_left((100,100))
+        self.assertEqual(self.click((105,105)), [("top","down",1,True)])
+        self.assertEqual(self.click((12,12)), [])
+        #The button up events go the same way
+        self.events = []
+        ClickScreen._mouse_button_up(1, (36,36))
+        self.assertEqual(self.events, [("bottom","up",1,True)])
+
+    def test_overlapping_depths(self):
+        #All the same depth and none top only, so all are told but only one is on top
+        clickables = [self.make_clickable(index, 5, (10+index,10+index)) for index in range(0,4)]
+        events = self.click((20,20))
+        self.assertEqual(sorted(name for (name,_,_,_) in events), range(0,4))
+        self.assertEqual([on_top for (_,_,_,on_top) in events], [True,False,False,False])
+        #The same clickable is on top each time
+        self.assertEqual(self.click((20,20)), events)
+        for clickable in clickables[1:]:
+            clickable.disable()
+        self.assertEqual(self.click((20,20)), [(0,"down",1,True)])
+        clickables[1].enable()
+        events = self.click((20,20))
+        self.assertEqual(sorted(name for (name,_,_,_) in events), [0,1])
+        self.assertEqual([on_top for (_,_,_,on_top) in events], [True,False])
+
+    def test_inner_shape(self):
+        #A c shape on top with a gap in the middle, so the clicks in the gap go through to the one underneath
+        self.make_clickable("c shape", 0, (0,0), True, [(0,0,30,10),(0,10,10,20),(0,20,30,30)])
+        self.make_clickable("under", 1, (0,0), True, [(0,0,30,30)])
+        self.assertEqual(self.click((5,15)), [("c shape","down",1,True)])
+        self.assertEqual(self.click((20,15)), [("under","down",1,True)])
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestClickable)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
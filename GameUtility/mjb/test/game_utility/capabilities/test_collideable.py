@@ -0,0 +1,170 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import random
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.capabilities.collideable import CollisionScreen, Collideable
+from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.shapes.custom_rectangles_shape import CustomRectanglesShape
+
+class TestCollideable(unittest.TestCase):
+    '''
+    Test class for collideable.py (the collision events, on a headless screen of a world of its own)
+    '''
+
+    def setUp(self):
+        self.world = World()
+        self.world.__enter__()
+        Screen.initialise(headless=True, size=(200,200))
+        CollisionScreen.initialise()
+        self.events = []
+
+    def tearDown(self):
+        self.world.__exit__(None, None, None)
+
+    def make_collideable(self, name, top_left, listening=True, rect_list=((0,0,10,10),), precision=1):
+        '''
+        @return: a collideable for a new shape handler, recording its collision events as (name,event,other name)
+        '''
+        shape_handler = ShapeHandler(CustomRectanglesShape(list(rect_list)), 0, top_left)
+        shape_handler.name = name
+        if listening:
+            return Collideable(shape_handler, precision,
+                               collision_enter_handler=lambda other: self.events.append((name,"enter",other.name)),
+                               collision_leave_handler=lambda other: self.events.append((name,"leave",other.name)))
+        return Collideable(shape_handler, precision)
+
+    def take_events(self):
+        '''
+        @return: the events since this was last called (processing the collision events first)
+        '''
+        CollisionScreen.process_collision_events()
+        events = self.events
+        self.events = []
+        return events
+
+    def test_enter_leave(self):
+        first = self.make_collideable("first", (0,0))
+        second = self.make_collideable("second", (50,50))
+        self.assertEqual(self.take_events(), [])
+        second.get_shape_handler().set_top_left((5,5))
+        self.assertEqual(self.take_events(), [("second","enter","first"),("first","enter","second")])
+        #Still colliding, so nothing new
+        second.get_shape_handler().move_top_left(1,1)
+        self.assertEqual(self.take_events(), [])
+        first.get_shape_handler().set_top_left((100,100))
+        self.assertEqual(self.take_events(), [("first","leave","second"),("second","leave","first")])
+
+    def test_disable_leaves(self):
+        first = self.make_collideable("first", (0,0))
+        second = self.make_collideable("second", (5,5))
+        self.assertEqual(self.take_events(), [("first","enter","second"),("second","enter","first")])
+        #The leave events come straight away
+        second.disable()
+        self.assertEqual(self.events, [("second","leave","first"),("first","leave","second")])
+        self.events = []
+        self.assertEqual(self.take_events(), [])
+        #And back again
+        second.enable()
+        self.assertEqual(self.take_events(), [("second","enter","first"),("first","enter","second")])
+        first.dispose()
+        self.assertEqual(self.events, [("first","leave","second"),("second","leave","first")])
+
+    def test_one_side_listening(self):
+        listening = self.make_collideable("listening", (0,0))
+        deaf = self.make_collideable("deaf", (50,50), listening=False)
+        #Moving the one which isn't listening still counts
+        deaf.get_shape_handler().set_top_left((5,5))
+        self.assertEqual(self.take_events(), [("listening","enter","deaf")])
+        deaf.get_shape_handler().set_top_left((50,50))
+        self.assertEqual(self.take_events(), [("listening","leave","deaf")])
+        #Pairs where neither is listening are not tracked
+        other_deaf = self.make_collideable("other deaf", (55,55), listening=False)
+        listening.dispose()
+        self.take_events()
+        other_deaf.get_shape_handler().move_top_left(1,1)
+        self.assertEqual(self.take_events(), [])
+        self.assertEqual(CollisionScreen._CollisionScreen__colliding, {})
+
+    def test_static_frames(self):
+        self.make_collideable("first", (0,0))
+        self.make_collideable("second", (5,5))
+        self.make_collideable("third", (100,100), listening=False)
+        self.take_events()
+        #Nothing has moved, so nothing is checked again
+        self.assertEqual(len(CollisionScreen._CollisionScreen__changed_collideables), 0)
+        self.assertEqual(self.take_events(), [])
+        self.assertEqual(len(CollisionScreen._CollisionScreen__changed_collideables), 0)
+
+    def test_set_precision(self):
+        #An L shape, whose bounding rectangle covers the other but whose rectangles do not
+        shape = self.make_collideable("shape", (0,0), rect_list=((0,0,30,10),(0,10,10,20)), precision=None)
+        self.make_collideable("square", (15,15))
+        self.assertEqual(self.take_events(), [("shape","enter","square"),("square","enter","shape")])
+        shape.set_precision(1)
+        self.assertEqual(self.take_events(), [("shape","leave","square"),("square","leave","shape")])
+        shape.set_precision(None)
+        self.assertEqual(self.take_events(), [("shape","enter","square"),("square","enter","shape")])
+
+    def test_all_collisions(self):
+        '''
+        The pairs found all at once are those found by colliding each collideable on its own, as the scene moves
+        '''
+        generator = random.Random(3)
+        shapes = [((0,0,10,10),),
+                  ((0,0,30,10),(0,10,10,20)),
+                  ((0,0,24,4),(0,20,24,4),(0,4,4,16),(20,4,4,16))]
+        collideables = []
+        for index in range(0,30):
+            shape_handler = ShapeHandler(CustomRectanglesShape(list(generator.choice(shapes))), 0,
+                                         (generator.randint(-20,200),generator.randint(-20,200)))
+            shape_handler.name = index
+            use_bitmask = generator.random()<0.5
+            collideables.append((Collideable(shape_handler, generator.choice([None,1,2]), use_bitmask=use_bitmask),
+                                 use_bitmask))
+        collided = 0
+        for _ in range(0,20):
+            expected = set()
+            for (collideable,use_bitmask) in collideables:
+                if not collideable.is_enabled():
+                    continue
+                shape_handler = collideable.get_shape_handler()
+                for other in CollisionScreen.get_collisions(shape_handler, collideable.get_precision(), use_bitmask):
+                    if other is not shape_handler:
+                        expected.add(frozenset([shape_handler.name,other.name]))
+            pairs = CollisionScreen.get_all_collisions()
+            found = [frozenset([first.name,second.name]) for (first,second) in pairs]
+            #Each pair appears once
+            self.assertEqual(len(found), len(set(found)))
+            self.assertEqual(set(found), expected)
+            collided+=len(found)
+            #Move some about, off the screen and back, and hide and show some
+            for (collideable,_) in generator.sample(collideables, 10):
+                action = generator.random()
+                if action<0.7:
+                    collideable.get_shape_handler().move_top_left(generator.randint(-30,30),generator.randint(-30,30))
+                elif action<0.85:
+                    collideable.set_precision(generator.choice([None,1,2]))
+                elif collideable.is_enabled():
+                    collideable.disable()
+                else:
+                    collideable.enable()
+        #Make sure there was something to compare
+        self.assertTrue(collided>=40, collided)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestCollideable)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
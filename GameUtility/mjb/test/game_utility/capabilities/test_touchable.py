@@ -0,0 +1,103 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.capabilities.touchable import TouchScreen, Touchable, get_entered_shape_handlers
+from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.shapes.custom_rectangles_shape import CustomRectanglesShape
+
+class TestTouchable(unittest.TestCase):
+    '''
+    Test class for touchable.py (the mouse enter and leave events, on a headless screen of a world of its own)
+    '''
+
+    def setUp(self):
+        self.world = World()
+        self.world.__enter__()
+        Screen.initialise(headless=True, size=(200,200))
+        TouchScreen.initialise()
+        self.events = []
+
+    def tearDown(self):
+        self.world.__exit__(None, None, None)
+
+    def make_touchable(self, name, depth, top_left, top_only=False, rect_list=((0,0,20,20),)):
+        '''
+        @return: a touchable for a new shape handler, recording its events as (name,event)
+        '''
+        shape_handler = ShapeHandler(CustomRectanglesShape(list(rect_list)), depth, top_left)
+        return Touchable(shape_handler, 1,
+                         lambda: self.events.append((name,"enter")),
+                         lambda: self.events.append((name,"leave")),
+                         top_only=top_only)
+
+    def move(self, location):
+        '''
+        @return: the events from moving the mouse to the location
+        '''
+        self.events = []
+        TouchScreen._mouse_moved(location)
+        return self.events
+
+    def test_enter_leave(self):
+        top = self.make_touchable("top", 0, (10,10), top_only=True)
+        middle = self.make_touchable("middle", 1, (15,15))
+        bottom = self.make_touchable("bottom", 2, (20,20), top_only=True)
+        self.assertEqual(self.move((100,100)), [])
+        #The top one and the one underneath which isn't top only (the bottom one isn't entered)
+        self.assertEqual(self.move((25,25)), [("top","enter"),("middle","enter")])
+        self.assertEqual(self.move((26,26)), [])
+        self.assertEqual(list(get_entered_shape_handlers()), [top,middle])
+        #Off the top one, so the middle one is on top
+        self.assertEqual(self.move((32,32)), [("top","leave")])
+        self.assertEqual(list(get_entered_shape_handlers()), [middle])
+        #Then off the middle one, so the bottom one is on top
+        self.assertEqual(self.move((38,38)), [("bottom","enter"),("middle","leave")])
+        self.assertEqual(list(get_entered_shape_handlers()), [bottom])
+        self.assertEqual(self.move((100,100)), [("bottom","leave")])
+        self.assertEqual(list(get_entered_shape_handlers()), [])
+
+    def test_overlapping_depths(self):
+        #The middle one moves on top, so the top only one under it is left
+        top = self.make_touchable("top", 0, (10,10), top_only=True)
+        middle = self.make_touchable("middle", 1, (10,10), top_only=True)
+        self.assertEqual(self.move((15,15)), [("top","enter")])
+        middle.get_shape_handler().set_depth(-1)
+        self.assertEqual(self.move((16,16)), [("middle","enter"),("top","leave")])
+        #Disabling the one underneath changes nothing
+        top.disable()
+        self.assertEqual(self.move((15,15)), [])
+        #Those underneath at the same depth as each other which aren't top only are all entered (in the same
+        #order each time)
+        self.make_touchable("other", 0, (10,10))
+        self.make_touchable("another", 0, (10,10))
+        self.assertEqual(self.move((100,100)), [("middle","leave")])
+        first = self.move((15,15))
+        self.assertEqual(first[0], ("middle","enter"))
+        self.assertEqual(sorted(first[1:]), [("another","enter"),("other","enter")])
+        self.move((100,100))
+        self.assertEqual(self.move((15,15)), first)
+
+    def test_inner_shape(self):
+        #A c shape with a gap in the middle
+        self.make_touchable("c shape", 0, (0,0), True, [(0,0,30,10),(0,10,10,20),(0,20,30,30)])
+        self.assertEqual(self.move((20,15)), [])
+        self.assertEqual(self.move((5,15)), [("c shape","enter")])
+        self.assertEqual(self.move((20,15)), [("c shape","leave")])
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestTouchable)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -7,7 +7,10 @@ import unittest
 import mjb.test.game_utility.collisions.test_simple_rectangle_collider as test_simple_rectangle_collider
 import mjb.test.game_utility.collisions.test_small_rectangle_tree as test_small_rectangle_tree
 import mjb.test.game_utility.collisions.test_large_rectangle_tree as test_large_rectangle_tree
+import mjb.test.game_utility.collisions.test_flat_rectangle_tree as test_flat_rectangle_tree
 import mjb.test.game_utility.collisions.test_screen_collider as test_screen_collider
+import mjb.test.game_utility.collisions.test_dynamic_collider as test_dynamic_collider
+import mjb.test.game_utility.collisions.test_sweep_and_prune as test_sweep_and_prune
 
 def suite():
     '''
@@ -18,7 +21,10 @@ def suite():
         [test_simple_rectangle_collider.suite(),
          test_small_rectangle_tree.suite(),
          test_large_rectangle_tree.suite(),
-         test_screen_collider.suite()
+         test_flat_rectangle_tree.suite(),
+         test_screen_collider.suite(),
+         test_dynamic_collider.suite(),
+         test_sweep_and_prune.suite()
         ])
     return test_suite
 
@@ -0,0 +1,138 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import math
+import random
+from mjb.dev.game_utility.collisions.dynamic_collider import DynamicCollider
+from mjb.dev.game_utility.utility.extra_maths import are_rotated_rectangles_colliding
+
+class TestDynamicCollider(unittest.TestCase):
+    '''
+    Test class for dynamic_collider.py
+    '''
+    
+    def test_add_remove(self):
+        collider = DynamicCollider()
+        collider.insert_rectangle(((50,50),(10,20),0,"key 1"))
+        collider.insert_rectangle(((50,50),(10,20),0,"key 1"))
+        collider.insert_rectangle(((-1000,3000),(200,5),math.radians(30),"key 2"))
+        #Check for some fake rectangles
+        self.assertFalse(collider.remove_rectangle(((50,50),(10,20),0,"key 2")))
+        self.assertFalse(collider.remove_rectangle(((50,51),(10,20),0,"key 1")))
+        #Now check that they were there (the first twice)
+        self.assertTrue(collider.remove_rectangle(((50,50),(10,20),0,"key 1")))
+        self.assertTrue(collider.remove_rectangle(((50,50),(10,20),0,"key 1")))
+        self.assertFalse(collider.remove_rectangle(((50,50),(10,20),0,"key 1")))
+        self.assertTrue(collider.remove_rectangle(((-1000,3000),(200,5),math.radians(30),"key 2")))
+        self.assertFalse(collider.is_colliding(((0,0),(100000,100000),0)))
+        
+    def test_clear(self):
+        collider = DynamicCollider()
+        for i in range(0,10):
+            collider.insert_rectangle(((i*300,-i*300),(10,10),0,i))
+        self.assertEqual(len(collider.collide_rectangle(((0,0),(100000,100000),0))),10)
+        collider.clear()
+        self.assertFalse(collider.is_colliding(((0,0),(100000,100000),0)))
+        self.assertEqual(collider.collide_rectangle(((0,0),(100000,100000),0)),[])
+    
+    def test_collision(self):
+        collider = DynamicCollider()
+        collider.insert_rectangle(((5,3),(2,2),0,"aligned"))
+        collider.insert_rectangle(((5,4),(1,1),math.radians(-5),"angled"))
+        collider.insert_rectangle(((4,2),(math.sqrt(2),12),math.radians(45),"long"))
+        #Strict and touching collisions (see the extra maths tests)
+        self.assertEqual(sorted(collider.collide_rectangle(((3,4),(1,1),math.radians(19)))),
+                         sorted([((5,3),(2,2),0,"aligned"),((5,4),(1,1),math.radians(-5),"angled"),
+                                 ((4,2),(math.sqrt(2),12),math.radians(45),"long")]))
+        self.assertFalse(collider.is_colliding(((30,30),(1,1),0)))
+        #Touching only (see the extra maths tests)
+        collider.clear()
+        collider.insert_rectangle(((3,4),(1,1),0,"touching"))
+        self.assertFalse(collider.is_colliding(((5,4),(1,1),0)))
+        self.assertTrue(collider.is_colliding(((5,4),(1,1),0),True))
+        self.assertEqual(collider.collide_rectangle(((5,4),(1,1),0),True),[((3,4),(1,1),0,"touching")])
+    
+    def test_random(self):
+        '''
+        Compare the collider against checking every rectangle, over a world much larger than
+        the cells (including rectangles much larger than the cells)
+        '''
+        generator = random.Random(11)
+        def random_rect(key):
+            size = generator.choice([5,50,500])
+            return ((generator.uniform(-3000,3000),generator.uniform(-3000,3000)),
+                    (generator.uniform(1,size),generator.uniform(1,size)),
+                    generator.uniform(-math.pi,math.pi),key)
+        collider = DynamicCollider()
+        rects = {}
+        handles = {}
+        for key in range(0,300):
+            rects[key] = random_rect(key)
+            handles[key] = collider.insert_rectangle(rects[key])
+        for _ in range(0,200):
+            #Move one (usually a little)...
+            key = generator.randrange(0,300)
+            ((x,y),half_size,angle,_) = rects[key]
+            if generator.random()<0.7:
+                rects[key] = ((x+generator.uniform(-5,5),y+generator.uniform(-5,5)),half_size,angle+0.1,key)
+            else:
+                rects[key] = random_rect(key)
+            handles[key] = collider.move_rectangle(handles[key], rects[key])
+            #...and collide something
+            query = random_rect(None)[0:3]
+            correct = [rect for rect in rects.values() if are_rotated_rectangles_colliding(query, rect)]
+            self.assertEqual(sorted(collider.collide_rectangle(query)),sorted(correct))
+            self.assertEqual(collider.is_colliding(query),correct!=[])
+        #Remove them all
+        for key in range(0,300):
+            self.assertTrue(collider.remove_by_handle(handles[key]))
+            self.assertFalse(collider.remove_by_handle(handles[key]))
+        self.assertFalse(collider.is_colliding(((0,0),(100000,100000),0)))
+    
+    def test_order(self):
+        '''
+        The same inserts and moves give the results in the same order (which doesn't depend on where
+        the handles happen to be in memory)
+        '''
+        def run(padding):
+            generator = random.Random(3)
+            collider = DynamicCollider()
+            handles = []
+            results = []
+            for key in range(0,100):
+                #(Spread the handles about in memory differently each time)
+                padding.append([object() for _ in range(0,generator.randint(0,5)+len(padding)%3)])
+                handles.append(collider.insert_rectangle(((generator.uniform(0,600),generator.uniform(0,600)),
+                                                          (generator.uniform(1,80),generator.uniform(1,80)),0,key)))
+            for _ in range(0,100):
+                key = generator.randrange(0,100)
+                handles[key] = collider.move_rectangle(handles[key],
+                                                       ((generator.uniform(0,600),generator.uniform(0,600)),
+                                                        (generator.uniform(1,80),generator.uniform(1,80)),0,key))
+                results.append(collider.collide_rectangle(((generator.uniform(0,600),generator.uniform(0,600)),
+                                                           (100,100),0)))
+            return results
+        first = run([])
+        self.assertEqual(first, run([None]))
+        self.assertEqual(first, run([None]*2))
+        #Within a cell, the rectangles come in the order they were added
+        collider = DynamicCollider()
+        for key in [5,3,9,1,7]:
+            collider.insert_rectangle(((50,50),(10,10),0,key))
+        self.assertEqual([rect[3] for rect in collider.collide_rectangle(((50,50),(1,1),0))],[5,3,9,1,7])
+    
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestDynamicCollider)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,106 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import random
+import mjb.test.game_utility.collisions.test_rectangle_collider as test_rectangle_collider
+from mjb.dev.game_utility.collisions.flat_rectangle_tree import FlatRectangleTree
+from mjb.dev.game_utility.collisions.simple_rectangle_collider import SimpleRectangleCollider
+
+class TestFlatRectangleTree(unittest.TestCase):
+    '''
+    Test class for flat_rectangle_tree.py
+    '''
+
+    #Test it with one level (like the small tree) and two (like the large tree)
+    make_list = [lambda size: FlatRectangleTree(size, 1),
+                 lambda size: FlatRectangleTree(size, 2)]
+
+    def test_add_remove(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_add_remove(self, make_rect_collider)
+    
+    def test_clear(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_clear(self, make_rect_collider)
+
+    def test_clear_handles(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_clear_handles(self, make_rect_collider)
+        
+    def test_clipping(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_clipping(self, make_rect_collider)
+    
+    def test_collision(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_collision(self, make_rect_collider)
+    
+    def test_collide_many(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_collide_many(self, make_rect_collider)
+    
+    def test_handles(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_handles(self, make_rect_collider)
+    
+    def test_collide_point(self):
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            test_rectangle_collider.test_collide_point(self, make_rect_collider)
+    
+    def test_reuse_storage(self):
+        '''
+        Insert and remove lots of random rectangles (clearing in between), checking the tree always
+        agrees with the simple collider as its storage is recycled
+        '''
+        generator = random.Random(5)
+        size = (300,200)
+        def random_rect(key):
+            x = generator.randint(-20,300)
+            y = generator.randint(-20,200)
+            return (x,y,x+generator.randint(1,80),y+generator.randint(1,80),key)
+        for make_rect_collider in TestFlatRectangleTree.make_list:
+            rect_collider = make_rect_collider(size)
+            for _ in range(0,3):
+                simple_collider = SimpleRectangleCollider(size)
+                rects = []
+                for i in range(0,300):
+                    rect = random_rect(i)
+                    rects.append(rect)
+                    rect_collider.insert_rectangle(rect)
+                    simple_collider.insert_rectangle(rect)
+                    if generator.random()<0.4:
+                        rect = rects.pop(generator.randrange(0,len(rects)))
+                        self.assertEqual(bool(simple_collider.remove_rectangle(rect)),
+                                         rect_collider.remove_rectangle(rect))
+                for _ in range(0,50):
+                    (x_min,y_min,x_max,y_max,_) = random_rect(None)
+                    query = (x_min,y_min,x_max,y_max)
+                    self.assertEqual(sorted(simple_collider.collide_rectangle(query)),
+                                     sorted(rect_collider.collide_rectangle(query)))
+                    self.assertEqual(simple_collider.is_colliding(query), rect_collider.is_colliding(query))
+                #Remove everything, then start again from a clear
+                for rect in rects:
+                    rect_collider.remove_rectangle(rect)
+                self.assertFalse(rect_collider.is_colliding((0,0,300,200)))
+                rect_collider.clear()
+    
+    def test_too_small(self):
+        self.assertRaises(ValueError, lambda: FlatRectangleTree((15,100), 2))
+        self.assertRaises(ValueError, lambda: FlatRectangleTree((100,3), 1))
+        FlatRectangleTree((4,4), 1)
+    
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestFlatRectangleTree)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
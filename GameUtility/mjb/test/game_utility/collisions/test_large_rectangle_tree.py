@@ -4,8 +4,13 @@ Created on 28 Jul 2014
 @author: michael
 '''
 import unittest
+import random
 import mjb.test.game_utility.collisions.test_rectangle_collider as test_rectangle_collider
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class TestLargeRectangleTree(unittest.TestCase):
     '''
@@ -17,6 +22,9 @@ class TestLargeRectangleTree(unittest.TestCase):
     
     def test_clear(self):
         test_rectangle_collider.test_clear(self, lambda size: LargeRectangleTree(size))
+
+    def test_clear_handles(self):
+        test_rectangle_collider.test_clear_handles(self, lambda size: LargeRectangleTree(size))
         
     def test_clipping(self):
         test_rectangle_collider.test_clipping(self, lambda size: LargeRectangleTree(size))
@@ -24,6 +32,43 @@ class TestLargeRectangleTree(unittest.TestCase):
     def test_collision(self):
         test_rectangle_collider.test_collision(self, lambda size: LargeRectangleTree(size))
     
+    def test_collide_many(self):
+        test_rectangle_collider.test_collide_many(self, lambda size: LargeRectangleTree(size))
+    
+    def test_handles(self):
+        test_rectangle_collider.test_handles(self, lambda size: LargeRectangleTree(size))
+    
+    def test_collide_point(self):
+        test_rectangle_collider.test_collide_point(self, lambda size: LargeRectangleTree(size))
+    
+    def test_collide_many_random(self):
+        '''
+        Compare the batched search against the one at a time search on lots of random rectangles
+        (given as an array when numpy is available)
+        '''
+        generator = random.Random(3)
+        size = (300,200)
+        tree = LargeRectangleTree(size)
+        for index in range(0,500):
+            x = generator.randint(-20,300)
+            y = generator.randint(-20,200)
+            tree.insert_rectangle((x,y,x+generator.randint(1,60),y+generator.randint(1,60),index))
+        queries = []
+        for _ in range(0,200):
+            x = generator.randint(-30,310)
+            y = generator.randint(-30,210)
+            queries.append((x,y,x+generator.randint(0,80),y+generator.randint(0,80)))
+        if numpy is not None:
+            batch = numpy.array(queries)
+        else:
+            batch = queries
+        (offsets,collided) = tree.collide_many(batch)
+        is_colliding = tree.is_colliding_many(batch)
+        for index in range(0,len(queries)):
+            correct = tree.collide_rectangle(queries[index])
+            self.assertEqual(sorted(collided[offsets[index]:offsets[index+1]]),sorted(correct))
+            self.assertEqual(is_colliding[index],correct!=[])
+    
     
 def suite():
     '''
@@ -10,11 +10,18 @@ The relevant methods are:
 
 def insert_rectangle(self, rect):
 def remove_rectangle(self, rect):
+def remove_by_handle(self, handle):
+def move_rectangle(self, handle, new_rect):
 def collide_rectangle(self, rect):
 def is_colliding(self,rect):
+def collide_point(self, x, y):
+def is_point_colliding(self, x, y):
+def collide_many(self, rects):
+def is_colliding_many(self, rects):
 def clear(self):
 def __init__(self, size):
 '''
+import random
 
 def test_add_remove(test_case, make_rect_collider):
     '''
@@ -64,6 +71,27 @@ def test_clear(test_case, make_rect_collider):
     test_case.assertFalse(rect_collider.remove_rectangle((25,5,80,30,"key 1")))
     test_case.assertFalse(rect_collider.remove_rectangle((25,5,40,30,"key 1")))
     #Good!
+
+def test_clear_handles(test_case, make_rect_collider):
+    '''
+    Test that handles from before a clear no longer refer to anything.
+    @param test_case: the test case that is being run.
+    @param make_rect_collider: a method to construct the rectangle collider. This should
+    expect a size parameter.
+    '''
+    rect_collider = make_rect_collider((100,200))
+    handle_a = rect_collider.insert_rectangle((5,25,80,30,"a"))
+    rect_collider.clear()
+    #The same place, so it may well reuse the storage of the old one
+    handle_b = rect_collider.insert_rectangle((5,25,80,30,"b"))
+    test_case.assertFalse(rect_collider.remove_by_handle(handle_a))
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(5,25,80,30,"b")])
+    #Moving by the old handle just inserts
+    rect_collider.move_rectangle(handle_a, (50,150,90,190,"a"))
+    test_case.assertEqual(sorted(rect_collider.collide_rectangle((0,0,100,200))),
+                          [(5,25,80,30,"b"),(50,150,90,190,"a")])
+    test_case.assertTrue(rect_collider.remove_by_handle(handle_b))
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(50,150,90,190,"a")])
     
 def test_clipping(test_case, make_rect_collider):
     '''
@@ -119,6 +147,130 @@ def test_collision(test_case, make_rect_collider):
     test_collision_check((2,4,2,9),test_case, size, rect_list, rect_collider)
     #Good!
 
+def test_collide_many(test_case, make_rect_collider):
+    '''
+    Test the batched collision methods of a rectangle collider against colliding the
+    rectangles one at a time.
+    @param test_case: the test case that is being run.
+    @param make_rect_collider: a method to construct the rectangle collider. This should
+    expect a size parameter.
+    '''
+    size = (50,50)
+    rect_collider = make_rect_collider(size)
+    #Overlapping rectangles of various sizes (some sticking out of the screen)
+    for x in range(0,10):
+        for y in range(0,10):
+            rect_collider.insert_rectangle((x*5-2,y*5-3,x*5+3+x,y*5+4,(x,y)))
+    rect_collider.insert_rectangle((-5,-5,55,55,"everything"))
+    queries = [(5,2,30,30),
+               (19,50,20,51), #outside
+               (18,5,30,45),
+               (0,0,50,50),
+               (2,4,2,9), #too thin
+               (-20,-20,-10,-10), #outside
+               (45,45,60,60),
+               (12,12,13,13)]
+    (offsets,collided) = rect_collider.collide_many(queries)
+    test_case.assertEqual(len(offsets),len(queries)+1)
+    test_case.assertEqual(offsets[-1],len(collided))
+    for index in range(0,len(queries)):
+        correct = rect_collider.collide_rectangle(queries[index])
+        test_case.assertEqual(set(collided[offsets[index]:offsets[index+1]]),set(correct))
+        test_case.assertEqual(offsets[index+1]-offsets[index],len(correct))
+    test_case.assertEqual(rect_collider.is_colliding_many(queries),
+                          [rect_collider.is_colliding(query) for query in queries])
+    #An empty batch is fine too
+    test_case.assertEqual(rect_collider.collide_many([]),([0],[]))
+    test_case.assertEqual(rect_collider.is_colliding_many([]),[])
+    #Good!
+
+def test_handles(test_case, make_rect_collider):
+    '''
+    Test the handle based methods of a rectangle collider (remove_by_handle and move_rectangle).
+    @param test_case: the test case that is being run.
+    @param make_rect_collider: a method to construct the rectangle collider. This should
+    expect a size parameter.
+    '''
+    rect_collider = make_rect_collider((100,200))
+    handle_1 = rect_collider.insert_rectangle((5,25,80,30,"key 1"))
+    handle_2 = rect_collider.insert_rectangle((5,25,80,30,"key 2"))
+    #Rectangles off the screen are ignored, and have no handle
+    test_case.assertEqual(rect_collider.insert_rectangle((-10,25,0,30,"key 3")),None)
+    test_case.assertFalse(rect_collider.remove_by_handle(None))
+    #Remove one...
+    test_case.assertTrue(rect_collider.remove_by_handle(handle_1))
+    test_case.assertFalse(rect_collider.remove_by_handle(handle_1))
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(5,25,80,30,"key 2")])
+    #Move the other a little, and then a lot
+    handle_2 = rect_collider.move_rectangle(handle_2, (6,25,81,30,"key 2"))
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(6,25,81,30,"key 2")])
+    handle_2 = rect_collider.move_rectangle(handle_2, (50,150,90,190,"key 2"))
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(50,150,90,190,"key 2")])
+    test_case.assertFalse(rect_collider.is_colliding((5,25,80,30)))
+    #Moving with no handle just inserts
+    handle_1 = rect_collider.move_rectangle(None, (5,25,80,30,"key 1"))
+    test_case.assertTrue(rect_collider.is_colliding((5,25,80,30)))
+    #Moving off the screen removes it
+    test_case.assertEqual(rect_collider.move_rectangle(handle_2, (150,150,190,190,"key 2")),None)
+    test_case.assertEqual(rect_collider.collide_rectangle((0,0,100,200)),[(5,25,80,30,"key 1")])
+    #Removing by rectangle still works after a move
+    handle_1 = rect_collider.move_rectangle(handle_1, (5,26,80,31,"key 1"))
+    test_case.assertTrue(rect_collider.remove_rectangle((5,26,80,31,"key 1")))
+    test_case.assertFalse(rect_collider.remove_by_handle(handle_1))
+    test_case.assertFalse(rect_collider.is_colliding((0,0,100,200)))
+    #Now lots of random moves, checking against the rectangles we expect to be there
+    generator = random.Random(7)
+    rects = {}
+    handles = {}
+    for key in range(0,40):
+        x = generator.randint(-10,100)
+        y = generator.randint(-10,200)
+        rects[key] = (x,y,x+generator.randint(1,30),y+generator.randint(1,30),key)
+        handles[key] = rect_collider.insert_rectangle(rects[key])
+    for _ in range(0,500):
+        key = generator.randrange(0,40)
+        (x_min,y_min,x_max,y_max,_) = rects[key]
+        if generator.random()<0.8:
+            #A small move (usually staying in the same part of the screen)...
+            (x_move,y_move) = (generator.randint(-2,2),generator.randint(-2,2))
+        else:
+            #...or a large one
+            (x_move,y_move) = (generator.randint(-60,60),generator.randint(-120,120))
+        rects[key] = (x_min+x_move,y_min+y_move,x_max+x_move,y_max+y_move,key)
+        handles[key] = rect_collider.move_rectangle(handles[key], rects[key])
+        query = (generator.randint(0,90),generator.randint(0,190),generator.randint(10,100),generator.randint(10,200))
+        if query[0]>=query[2] or query[1]>=query[3]:
+            continue
+        correct = collision_check(query, (100,200), rects.values())
+        test_case.assertEqual(sorted(rect_collider.collide_rectangle(query)),sorted(correct))
+    #Remove them all
+    for key in range(0,40):
+        rect_collider.remove_by_handle(handles[key])
+    test_case.assertFalse(rect_collider.is_colliding((0,0,100,200)))
+    #Good!
+
+def test_collide_point(test_case, make_rect_collider):
+    '''
+    Test the point collision methods of a rectangle collider against colliding the
+    1x1 rectangle at the point.
+    @param test_case: the test case that is being run.
+    @param make_rect_collider: a method to construct the rectangle collider. This should
+    expect a size parameter.
+    '''
+    size = (50,40)
+    rect_collider = make_rect_collider(size)
+    generator = random.Random(17)
+    for key in range(0,60):
+        x = generator.randint(-10,50)
+        y = generator.randint(-10,40)
+        rect_collider.insert_rectangle((x,y,x+generator.randint(1,25),y+generator.randint(1,25),key))
+    for x in range(-2,53):
+        for y in range(-2,43):
+            correct = rect_collider.collide_rectangle((x,y,x+1,y+1))
+            test_case.assertEqual(sorted(rect_collider.collide_point(x,y)),sorted(correct))
+            test_case.assertEqual(rect_collider.is_point_colliding(x,y),correct!=[])
+    #Good!
+
 def test_collision_check(rect, test_case, size, rect_list, rect_collider):
     '''
     Perform acollision check!
@@ -4,10 +4,13 @@ Created on 30 Jul 2014
 @author: michael
 '''
 import unittest
+import random
+from mjb.dev.game_utility.utility.bitmask import Bitmask
 from mjb.dev.game_utility.collisions.screen_collider import ScreenCollider
 from mjb.dev.game_utility.collisions.simple_rectangle_collider import SimpleRectangleCollider
 from mjb.dev.game_utility.collisions.small_rectangle_tree import SmallRectangleTree
 from mjb.dev.game_utility.collisions.large_rectangle_tree import LargeRectangleTree
+from mjb.dev.game_utility.collisions.flat_rectangle_tree import FlatRectangleTree
 
 
 class TestScreenCollider(unittest.TestCase):
@@ -15,7 +18,9 @@ class TestScreenCollider(unittest.TestCase):
     #Test all of the different kinds of rectangle tree inside the screen collider
     rect_make_list = [lambda size: SimpleRectangleCollider(size),
                       lambda size: SmallRectangleTree(size),
-                      lambda size: LargeRectangleTree(size)
+                      lambda size: LargeRectangleTree(size),
+                      lambda size: FlatRectangleTree(size, 1),
+                      lambda size: FlatRectangleTree(size, 2)
                       ]
     
     #The first tests are more or less the same as the rectangle collider tests:
@@ -229,6 +234,152 @@ class TestScreenCollider(unittest.TestCase):
         #Good enough
         
     
+    def test_collide_many(self):
+        '''
+        Check that colliding a batch gives the same results as colliding one at a time,
+        including the inner rectangles.
+        '''
+        for make_rect_collider in TestScreenCollider.rect_make_list:
+            rect_collider = ScreenCollider(make_rect_collider((100,100)),TestScreenCollider.default_get_shape)
+            #A c shape, and a plain rectangle (no inner rectangles)
+            inner_collider = SimpleRectangleCollider((30,30))
+            inner_rectangle_list = [(10,0,30,10),(20,10,30,20),(10,20,30,30)]
+            for (x_min,y_min,x_max,y_max) in inner_rectangle_list:
+                inner_collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+            rect_collider.insert_rectangle((50,50,80,80,(inner_rectangle_list,inner_collider)))
+            rect_collider.insert_rectangle((0,0,20,20,([],None)))
+            #A slot shape to collide with
+            slot_collider = SimpleRectangleCollider((30,30))
+            slot_list = [(0,0,10,10),(0,10,30,20),(0,20,10,30)]
+            for (x_min,y_min,x_max,y_max) in slot_list:
+                slot_collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+            queries = [(40,50,70,80),(41,50,71,80),(5,5,45,45),(90,90,95,95),(55,55,56,56)]
+            inner_shapes = [(slot_list,slot_collider),(slot_list,slot_collider),([],None),([],None),([],None)]
+            (offsets,collided) = rect_collider.collide_many(queries, inner_shapes)
+            for index in range(0,len(queries)):
+                (inner_rectangles,inner) = inner_shapes[index]
+                correct = rect_collider.collide_rectangle(queries[index], inner_rectangles, inner)
+                self.assertEqual(collided[offsets[index]:offsets[index+1]],correct)
+            self.assertEqual(offsets[1]-offsets[0],0)
+            self.assertEqual(offsets[2]-offsets[1],1)
+            #Without inner shapes at all
+            (offsets,collided) = rect_collider.collide_many(queries)
+            for index in range(0,len(queries)):
+                self.assertEqual(collided[offsets[index]:offsets[index+1]],
+                                 rect_collider.collide_rectangle(queries[index]))
+    
+    def test_collide_point(self):
+        '''
+        Check that colliding a point gives the same results as colliding the 1x1 rectangle at the point,
+        including the inner rectangles.
+        '''
+        for make_rect_collider in TestScreenCollider.rect_make_list:
+            rect_collider = ScreenCollider(make_rect_collider((100,100)),TestScreenCollider.default_get_shape)
+            #A c shape, and a plain rectangle (no inner rectangles) overlapping it
+            inner_collider = SimpleRectangleCollider((30,30))
+            inner_rectangle_list = [(10,0,30,10),(20,10,30,20),(10,20,30,30)]
+            for (x_min,y_min,x_max,y_max) in inner_rectangle_list:
+                inner_collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+            rect_collider.insert_rectangle((50,50,80,80,(inner_rectangle_list,inner_collider)))
+            rect_collider.insert_rectangle((40,40,65,65,([],None)))
+            for x in range(35,85):
+                for y in range(35,85):
+                    correct = rect_collider.collide_rectangle((x,y,x+1,y+1))
+                    self.assertEqual(sorted(rect_collider.collide_point(x,y)),sorted(correct))
+                    self.assertEqual(rect_collider.is_point_colliding(x,y),correct!=[])
+            #Inside the gap of the c shape, and in the c shape itself
+            self.assertEqual(rect_collider.collide_point(67,65),[])
+            self.assertEqual(len(rect_collider.collide_point(70,55)),1)
+    
+    def test_bitmask_collision(self):
+        '''
+        Check that colliding with bitmasks gives the same results as colliding with the inner rectangles
+        (which the bitmasks are made from), including against shapes without any inner rectangles.
+        '''
+        generator = random.Random(7)
+        def make_shape():
+            #The keys are (inner_rectangles,inner_collider,bitmask)
+            size = (generator.randint(1,40),generator.randint(1,40))
+            inner_rectangle_list = []
+            if generator.randint(0,3)>0:
+                for _ in range(0,generator.randint(1,4)):
+                    x_min = generator.randint(0,size[0]-1)
+                    y_min = generator.randint(0,size[1]-1)
+                    inner_rectangle_list.append((x_min,y_min,generator.randint(x_min+1,size[0]),
+                                                 generator.randint(y_min+1,size[1])))
+            if inner_rectangle_list==[]:
+                return (size,([],None,None))
+            inner_collider = SimpleRectangleCollider(size)
+            for (x_min,y_min,x_max,y_max) in inner_rectangle_list:
+                inner_collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+            return (size,(inner_rectangle_list,inner_collider,Bitmask.from_rectangles(size, inner_rectangle_list)))
+        for make_rect_collider in TestScreenCollider.rect_make_list:
+            rect_collider = ScreenCollider(make_rect_collider((100,100)),
+                                           lambda (a,b,c,d,(rects,collider,bitmask)): (rects,collider))
+            bitmask_collider = ScreenCollider(make_rect_collider((100,100)),
+                                              lambda (a,b,c,d,(rects,collider,bitmask)): (rects,collider),
+                                              get_inner_bitmask=lambda (a,b,c,d,(rects,collider,bitmask)): bitmask)
+            for _ in range(0,30):
+                ((width,height),key) = make_shape()
+                x = generator.randint(-10,90)
+                y = generator.randint(-10,90)
+                rect_collider.insert_rectangle((x,y,x+width,y+height,key))
+                bitmask_collider.insert_rectangle((x,y,x+width,y+height,key))
+            for _ in range(0,100):
+                ((width,height),(rects,collider,bitmask)) = make_shape()
+                x = generator.randint(-10,90)
+                y = generator.randint(-10,90)
+                outer_rectangle = (x,y,x+width,y+height)
+                correct = sorted(rect_collider.collide_rectangle(outer_rectangle, rects, collider))
+                self.assertEqual(sorted(bitmask_collider.collide_rectangle(outer_rectangle, rects, collider, bitmask)),
+                                 correct)
+                self.assertEqual(bitmask_collider.is_colliding(outer_rectangle, rects, collider, bitmask),correct!=[])
+                self.assertEqual(sorted(bitmask_collider.collide_point(x, y)),sorted(rect_collider.collide_point(x, y)))
+    
+    def test_collide_point_topmost(self):
+        '''
+        Check that the topmost search finds the k shapes containing a point with the smallest depths,
+        skipping those whose inner rectangles miss the point (and only checking the shapes it needs to).
+        '''
+        for make_rect_collider in TestScreenCollider.rect_make_list:
+            #The keys are (depth,(inner_rectangles,inner_collider)), and the depths of the shapes checked are kept
+            checked = []
+            rect_collider = ScreenCollider(make_rect_collider((100,100)),
+                                           lambda (a,b,c,d,(depth,shape)): checked.append(depth) or shape,
+                                           lambda (a,b,c,d,(depth,shape)): depth)
+            #A c shape on top of everything, with a gap at (67,65)
+            inner_collider = SimpleRectangleCollider((30,30))
+            inner_rectangle_list = [(10,0,30,10),(20,10,30,20),(10,20,30,30)]
+            for (x_min,y_min,x_max,y_max) in inner_rectangle_list:
+                inner_collider.insert_rectangle((x_min,y_min,x_max,y_max,None))
+            c_shape = (50,50,80,80,(-1,(inner_rectangle_list,inner_collider)))
+            rect_collider.insert_rectangle(c_shape)
+            #Plain rectangles underneath it, all containing (67,65)
+            plain = []
+            for depth in [5,2,7,3,9]:
+                rect = (40+depth,40+depth,70+depth,70+depth,(depth,([],None)))
+                plain.append(rect)
+                rect_collider.insert_rectangle(rect)
+            plain.sort(key=lambda (a,b,c,d,(depth,shape)): depth)
+            for k in range(0,7):
+                self.assertEqual(rect_collider.collide_point_topmost(67,65,k),plain[0:k])
+            self.assertEqual(rect_collider.collide_point_topmost(70,55,2),[c_shape,plain[0]])
+            self.assertEqual(rect_collider.collide_point_topmost(5,5,3),[])
+            #The shapes underneath the top one aren't checked
+            checked[:] = []
+            self.assertEqual(rect_collider.collide_point_topmost(67,65),plain[0:1])
+            self.assertEqual(checked,[-1,2])
+            #Unless they should be found below it too
+            checked[:] = []
+            self.assertEqual(rect_collider.collide_point_topmost(67,65,1,lambda (a,b,c,d,(depth,shape)): depth>5),
+                             [plain[0]]+plain[3:])
+            self.assertEqual(checked,[-1,2,7,9])
+            self.assertEqual(rect_collider.collide_point_topmost(70,55,1,lambda rect: True),[c_shape]+plain)
+            #The depth must be given to use the topmost search
+            self.assertRaises(ValueError,
+                              ScreenCollider(make_rect_collider((100,100)),lambda _:([],None)).collide_point_topmost,
+                              1,1)
+    
 def suite():
     '''
     Add all test methods in this module to the suite!
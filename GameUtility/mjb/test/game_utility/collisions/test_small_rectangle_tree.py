@@ -17,6 +17,9 @@ class TestSmallRectangleTree(unittest.TestCase):
     
     def test_clear(self):
         test_rectangle_collider.test_clear(self, lambda size: SmallRectangleTree(size))
+
+    def test_clear_handles(self):
+        test_rectangle_collider.test_clear_handles(self, lambda size: SmallRectangleTree(size))
         
     def test_clipping(self):
         test_rectangle_collider.test_clipping(self, lambda size: SmallRectangleTree(size))
@@ -24,6 +27,15 @@ class TestSmallRectangleTree(unittest.TestCase):
     def test_collision(self):
         test_rectangle_collider.test_collision(self, lambda size: SmallRectangleTree(size))
     
+    def test_collide_many(self):
+        test_rectangle_collider.test_collide_many(self, lambda size: SmallRectangleTree(size))
+    
+    def test_handles(self):
+        test_rectangle_collider.test_handles(self, lambda size: SmallRectangleTree(size))
+    
+    def test_collide_point(self):
+        test_rectangle_collider.test_collide_point(self, lambda size: SmallRectangleTree(size))
+    
     
 def suite():
     '''
@@ -0,0 +1,86 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import random
+import mjb.test.game_utility.collisions.test_rectangle_collider as test_rectangle_collider
+from mjb.dev.game_utility.collisions.sweep_and_prune import SweepAndPrune
+
+class TestSweepAndPrune(unittest.TestCase):
+    '''
+    Test class for sweep_and_prune.py
+    '''
+    
+    def test_add_remove(self):
+        sweep_and_prune = SweepAndPrune((100,200))
+        sweep_and_prune.insert_rectangle((5,25,80,30,"key 1"))
+        sweep_and_prune.insert_rectangle((5,25,80,30,"key 2"))
+        #Outside the screen
+        self.assertEqual(sweep_and_prune.insert_rectangle((-10,25,0,30,"key 3")),None)
+        self.assertFalse(sweep_and_prune.remove_rectangle((-10,25,0,30,"key 3")))
+        self.assertEqual(sweep_and_prune.collide_pairs(),[((5,25,80,30,"key 1"),(5,25,80,30,"key 2"))])
+        self.assertTrue(sweep_and_prune.remove_rectangle((5,25,80,30,"key 1")))
+        self.assertFalse(sweep_and_prune.remove_rectangle((5,25,80,30,"key 1")))
+        self.assertEqual(sweep_and_prune.collide_pairs(),[])
+        sweep_and_prune.insert_rectangle((5,25,80,30,"key 1"))
+        sweep_and_prune.clear()
+        self.assertEqual(sweep_and_prune.collide_pairs(),[])
+    
+    def test_collide_pairs(self):
+        '''
+        Compare the pairs found against checking every pair, as the rectangles move around
+        (and off the screen)
+        '''
+        size = (300,200)
+        generator = random.Random(13)
+        sweep_and_prune = SweepAndPrune(size)
+        rects = {}
+        handles = {}
+        for key in range(0,100):
+            x = generator.randint(-20,300)
+            y = generator.randint(-20,200)
+            rects[key] = (x,y,x+generator.randint(1,40),y+generator.randint(1,40),key)
+            handles[key] = sweep_and_prune.insert_rectangle(rects[key])
+        for _ in range(0,20):
+            #Move most of them a little, and a few of them a lot
+            for key in range(0,100):
+                (x_min,y_min,x_max,y_max,_) = rects[key]
+                if generator.random()<0.9:
+                    (x_move,y_move) = (generator.randint(-3,3),generator.randint(-3,3))
+                else:
+                    (x_move,y_move) = (generator.randint(-100,100),generator.randint(-100,100))
+                rects[key] = (x_min+x_move,y_min+y_move,x_max+x_move,y_max+y_move,key)
+                handles[key] = sweep_and_prune.move_rectangle(handles[key], rects[key])
+            #Remove and replace one
+            key = generator.randrange(0,100)
+            self.assertEqual(sweep_and_prune.remove_by_handle(handles[key]),handles[key] is not None)
+            handles[key] = sweep_and_prune.insert_rectangle(rects[key])
+            #Now check every pair (after clipping them, as the overlap must be on the screen)
+            clipped_rects = [(max(x_min,0),max(y_min,0),min(x_max,300),min(y_max,200),key)
+                             for (x_min,y_min,x_max,y_max,key) in rects.values()]
+            correct = set()
+            for (x_min,y_min,x_max,y_max,first) in clipped_rects:
+                colliding = test_rectangle_collider.collision_check((x_min,y_min,x_max,y_max), size, clipped_rects)
+                for (_,_,_,_,second) in colliding:
+                    if first<second:
+                        correct.add((first,second))
+            found = set()
+            for ((_,_,_,_,first),(_,_,_,_,second)) in sweep_and_prune.collide_pairs():
+                self.assertFalse((first,second) in found or (second,first) in found)
+                found.add((min(first,second),max(first,second)))
+            self.assertEqual(found,correct)
+    
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestSweepAndPrune)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -5,6 +5,12 @@ Created on 28 Jul 2014
 '''
 import unittest
 import mjb.test.game_utility.graphics.drawers.suite as drawers_suite
+import mjb.test.game_utility.graphics.test_cost_tracker as test_cost_tracker
+import mjb.test.game_utility.graphics.test_event_source as test_event_source
+import mjb.test.game_utility.graphics.test_frame_profiler as test_frame_profiler
+import mjb.test.game_utility.graphics.test_picture_handler as test_picture_handler
+import mjb.test.game_utility.graphics.test_profiler_overlay as test_profiler_overlay
+import mjb.test.game_utility.graphics.test_screen as test_screen
 
 def suite():
     '''
@@ -13,6 +19,12 @@ def suite():
     test_suite = unittest.TestSuite(
         #Add all of the suites here:
         [drawers_suite.suite(),
+         test_cost_tracker.suite(),
+         test_event_source.suite(),
+         test_frame_profiler.suite(),
+         test_picture_handler.suite(),
+         test_profiler_overlay.suite(),
+         test_screen.suite(),
         ])
     return test_suite
 
@@ -0,0 +1,154 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import time
+import mjb.dev.game_utility.graphics.cost_tracker as cost_tracker
+from mjb.dev.game_utility.graphics.cost_tracker import CostTracker
+
+class _Clock(object):
+    '''
+    A clock which only moves when told to, standing in for timeit in the tracker
+    '''
+
+    def __init__(self):
+        self.time = 0.0
+
+    def default_timer(self):
+        return self.time
+
+class _Shape(object):
+    pass
+
+class _Drawer(object):
+    '''
+    Passes its costs on to its shape
+    '''
+
+    def __init__(self, shape):
+        self._cost_owner = shape
+
+class _Listener(object):
+    pass
+
+class _OtherListener(object):
+    pass
+
+def name_of(owner):
+    '''
+    @return: the name the tracker gives the owner
+    '''
+    return "%s@%x" % (owner.__class__.__name__,id(owner))
+
+class TestCostTracker(unittest.TestCase):
+    '''
+    Test class for cost_tracker.py
+    '''
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.timeit = cost_tracker.timeit
+        cost_tracker.timeit = self.clock
+
+    def tearDown(self):
+        cost_tracker.timeit = self.timeit
+
+    def spend(self, time, result=None):
+        '''
+        A callback which takes the given time (on the fake clock)
+        '''
+        self.clock.time += time
+        return result
+
+    def test_cost_owner(self):
+        tracker = CostTracker()
+        shape = _Shape()
+        drawer = _Drawer(shape)
+        self.assertEqual(tracker.call("drawer", drawer, self.spend, 2.0, "drawn"), "drawn")
+        tracker.call("drawer", drawer, self.spend, 1.0)
+        tracker.call("drawer", shape, self.spend, 0.5)
+        #All of the time goes to the shape, not the drawer
+        self.assertEqual(tracker.get_costs(), [("drawer",name_of(shape),3,3.5,2.0)])
+        #Errors are still timed
+        def fail():
+            self.clock.time += 1.0
+            raise ValueError()
+        self.assertRaises(ValueError, tracker.call, "drawer", drawer, fail)
+        self.assertEqual(tracker.get_costs(), [("drawer",name_of(shape),4,4.5,2.0)])
+        #Functions are named by the function
+        tracker.reset()
+        tracker.call("handler", fail.__call__, self.spend, 0.25)
+        tracker.call("handler", self.spend, self.spend, 0.25)
+        self.assertEqual(sorted(cost[1].split("@")[0] for cost in tracker.get_costs()), ["__call__","spend"])
+
+    def test_by_class(self):
+        tracker = CostTracker()
+        (first,second,other) = (_Listener(),_Listener(),_OtherListener())
+        tracker.call("frame_listener", first, self.spend, 1.0)
+        tracker.call("frame_listener", second, self.spend, 3.0)
+        tracker.call("frame_listener", second, self.spend, 0.5)
+        tracker.call("frame_listener", other, self.spend, 2.5)
+        #The same object with another kind of callback is counted apart
+        tracker.call("keyboard", first, self.spend, 8.0)
+        self.assertEqual(tracker.get_costs(by_class=True),
+                         [("keyboard","_Listener",1,8.0,8.0),
+                          ("frame_listener","_Listener",3,4.5,3.0),
+                          ("frame_listener","_OtherListener",1,2.5,2.5)])
+        self.assertEqual(tracker.get_costs(),
+                         [("keyboard",name_of(first),1,8.0,8.0),
+                          ("frame_listener",name_of(second),2,3.5,3.0),
+                          ("frame_listener",name_of(other),1,2.5,2.5),
+                          ("frame_listener",name_of(first),1,1.0,1.0)])
+
+    def test_top_offenders(self):
+        tracker = CostTracker()
+        listeners = [_Listener() for _ in range(0,5)]
+        for (listener,cost) in zip(listeners,[5.0,1.0,4.0,2.0,3.0]):
+            tracker.call("frame_listener", listener, self.spend, cost)
+        self.assertEqual([cost[3] for cost in tracker.get_top_offenders(3)], [5.0,4.0,3.0])
+        self.assertEqual([cost[1] for cost in tracker.get_top_offenders(3)],
+                         [name_of(listeners[0]),name_of(listeners[2]),name_of(listeners[4])])
+        self.assertEqual(len(tracker.get_top_offenders()), 5)
+        self.assertEqual(tracker.get_top_offenders(1, by_class=True), [("frame_listener","_Listener",5,15.0,5.0)])
+        #A heading and a line per offender
+        report = tracker.format_report(2).split("\n")
+        self.assertEqual(len(report), 3)
+        self.assertTrue(name_of(listeners[0]) in report[1])
+        tracker.reset()
+        self.assertEqual(tracker.get_top_offenders(), [])
+
+    def test_watchdog(self):
+        #The watchdog runs in real time
+        cost_tracker.timeit = self.timeit
+        messages = []
+        tracker = CostTracker(budget=0.02, log_handler=messages.append)
+        try:
+            def slow_callback():
+                time.sleep(0.15)
+            for _ in range(0,3):
+                tracker.call("frame_listener", _Listener(), slow_callback)
+            tracker.call("frame_listener", _Listener(), lambda: None)
+        finally:
+            tracker.dispose()
+        #Logged once for each callback over budget (whether the watchdog caught it, or it was logged as it ended)
+        self.assertEqual(len(messages), 3)
+        for message in messages:
+            self.assertTrue(message.startswith("frame_listener _Listener@"))
+            #The sample of the stack shows where the time went
+            if "has been running for" in message:
+                self.assertTrue("slow_callback" in message)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestCostTracker)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
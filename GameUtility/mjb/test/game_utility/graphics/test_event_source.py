@@ -0,0 +1,141 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import os
+import random
+import shutil
+import tempfile
+import pygame.locals
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.graphics.event_source import ScriptedEventSource, EventRecorder
+from mjb.dev.game_utility.capabilities.collideable import CollisionScreen, Collideable
+from mjb.dev.game_utility.capabilities.clickable import ClickScreen, Clickable
+from mjb.dev.game_utility.shapes.handlers.drawable_rectangle_handler import DrawableRectangleHandler
+from mjb.dev.game_utility.input_listeners.frame_listener import FrameListener
+from mjb.dev.game_utility.input_listeners.keyboard_listener import KeyboardListener
+from mjb.dev.game_utility.input_listeners.mouse_button_listener import MouseButtonListener
+from mjb.test.game_utility.graphics.test_picture_handler import run_in_world
+
+#The number of frames each game runs for
+FRAMES = 120
+#Clicks and key presses through the game
+SCRIPT = ([(frame,pygame.locals.MOUSEBUTTONDOWN,{"button":1,"pos":(frame,frame)}) for frame in range(0,FRAMES,7)] +
+          [(frame,pygame.locals.KEYDOWN,{"key":pygame.locals.K_a,"mod":0}) for frame in range(3,FRAMES,11)] +
+          [(frame,pygame.locals.KEYUP,{"key":pygame.locals.K_a,"mod":0}) for frame in range(5,FRAMES,11)])
+
+class _LoggingListener(KeyboardListener, MouseButtonListener, FrameListener):
+    '''
+    Logs the input, and moves the rectangles around each frame
+    '''
+
+    def __init__(self, log, rectangles, generator):
+        KeyboardListener.__init__(self, [pygame.locals.K_a])
+        MouseButtonListener.__init__(self)
+        FrameListener.__init__(self)
+        self.__log = log
+        self.__rectangles = rectangles
+        self.__generator = generator
+
+    def key_down(self, key, key_modifiers):
+        self.__log.append(("key down",key,Screen.get_frame_count(),Screen.get_ticks()))
+
+    def key_up(self, key, key_modifiers):
+        self.__log.append(("key up",key,Screen.get_frame_count(),Screen.get_ticks()))
+
+    def button_down(self, button):
+        self.__log.append(("button down",button,Screen.get_frame_count()))
+
+    def frame_passed(self):
+        for rectangle in self.__rectangles:
+            rectangle.move_rectangle(self.__generator.randint(-3,3),self.__generator.randint(-3,3))
+
+def play(event_source):
+    '''
+    Play a deterministic game (in a world of its own)
+    @param event_source: the source of the input
+    @return: the log of the input, click and collision events
+    '''
+    log = []
+    Screen.initialise(headless=True, size=(160,120), deterministic=True, event_source=event_source,
+                      max_frames=FRAMES)
+    PictureHandler.initialise()
+    CollisionScreen.initialise()
+    ClickScreen.initialise()
+    generator = random.Random(5)
+    rectangles = []
+    for index in range(0,12):
+        rectangle = DrawableRectangleHandler((generator.randint(0,140),generator.randint(0,100),16,16),
+                                             (index*20,0,0),index)
+        Collideable(rectangle, 1,
+                    collision_enter_handler=lambda other,index=index:
+                        log.append(("enter",index,other.get_depth()[0],Screen.get_frame_count())),
+                    collision_leave_handler=lambda other,index=index:
+                        log.append(("leave",index,other.get_depth()[0],Screen.get_frame_count())))
+        rectangles.append(rectangle)
+    #Clicked wherever the script says the mouse was, not where the real mouse is
+    button = DrawableRectangleHandler((50,50,20,20),(0,0,255),12)
+    Clickable(button, 1,
+              lambda button,on_top: log.append(("click",button,on_top,Screen.get_frame_count())),
+              lambda button,on_top: None)
+    _LoggingListener(log, rectangles, generator)
+    Screen.start_game_loop()
+    return log
+
+def record(file_name):
+    '''
+    Play a deterministic game from the script, recording the input and saving it (in a world of its own)
+    @param file_name: the file to save the recorded script to
+    @return: (the log of the input, click and collision events, the recorded script)
+    '''
+    recorder = EventRecorder(ScriptedEventSource(SCRIPT))
+    log = play(recorder)
+    recorder.save(file_name)
+    return (log,recorder.get_script())
+
+class TestEventSource(unittest.TestCase):
+    '''
+    Test class for event_source.py (and the deterministic screen)
+    '''
+
+    def test_deterministic(self):
+        first = run_in_world(play, ScriptedEventSource(SCRIPT))
+        second = run_in_world(play, ScriptedEventSource(SCRIPT))
+        self.assertEqual(first, second)
+        #Make sure there was something to compare
+        kinds = set(entry[0] for entry in first)
+        self.assertEqual(kinds, set(["key down","key up","button down","click","enter","leave"]))
+        #Only the clicks scripted inside the clickable rectangle hit it
+        self.assertEqual([entry for entry in first if entry[0]=="click"], [("click",1,True,56),("click",1,True,63)])
+        #The keys come on the frames they were scripted for, at the times of the virtual clock
+        key_downs = [entry for entry in first if entry[0]=="key down"]
+        self.assertEqual([entry[2] for entry in key_downs], range(3,FRAMES,11))
+        self.assertEqual([entry[3] for entry in key_downs], [frame*1000.0/60 for frame in range(3,FRAMES,11)])
+
+    def test_record_replay(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, "script")
+            (recorded,script) = run_in_world(record, file_name)
+            replay = ScriptedEventSource.load(file_name)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(sorted(script), sorted(SCRIPT))
+        self.assertEqual(replay.get_script(), script)
+        self.assertEqual(run_in_world(play, replay), recorded)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestEventSource)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,138 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import threading
+import mjb.dev.game_utility.graphics.frame_profiler as frame_profiler
+from mjb.dev.game_utility.graphics.frame_profiler import FrameProfiler
+
+class _Clock(object):
+    '''
+    A clock which only moves when told to, standing in for timeit in the profiler
+    '''
+
+    def __init__(self):
+        self.time = 0.0
+
+    def default_timer(self):
+        return self.time
+
+class TestFrameProfiler(unittest.TestCase):
+    '''
+    Test class for frame_profiler.py
+    '''
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.timeit = frame_profiler.timeit
+        frame_profiler.timeit = self.clock
+
+    def tearDown(self):
+        frame_profiler.timeit = self.timeit
+
+    def play_frame(self, profiler, times):
+        '''
+        Record a frame
+        @param times: a list of (phase, time) to mark in order
+        '''
+        profiler.start_frame()
+        for (phase,time) in times:
+            self.clock.time += time
+            profiler.mark(phase)
+        profiler.end_frame()
+
+    def test_phases(self):
+        profiler = FrameProfiler(10)
+        self.play_frame(profiler, [("event_wait",1.0),("keyboard_events",0.5),("event_wait",2.0),
+                                   ("other",0.25),("composition",0.125)])
+        self.assertEqual(profiler.get_frame_count(), 1)
+        self.assertEqual(profiler.get_samples(), [3.875])
+        self.assertEqual(profiler.get_samples("event_wait"), [3.0])
+        self.assertEqual(profiler.get_samples("keyboard_events"), [0.5])
+        self.assertEqual(profiler.get_samples("other"), [0.25])
+        self.assertEqual(profiler.get_samples("composition"), [0.125])
+        self.assertEqual(profiler.get_samples("blit"), [0.0])
+        #The time after the last mark is put down to other
+        profiler.start_frame()
+        self.clock.time += 2.0
+        profiler.end_frame()
+        self.assertEqual(profiler.get_samples("other"), [0.25,2.0])
+        #Marks outside a frame are ignored
+        self.clock.time += 1.0
+        profiler.mark("blit")
+        profiler.end_frame()
+        self.assertEqual(profiler.get_frame_count(), 2)
+        self.assertEqual(profiler.get_samples("blit"), [0.0,0.0])
+
+    def test_wraparound(self):
+        profiler = FrameProfiler(4)
+        for frame in range(1,11):
+            self.play_frame(profiler, [("blit",float(frame)),("clock_wait",frame*10.0)])
+            self.assertEqual(profiler.get_frame_count(), min(frame,4))
+            #The oldest frames are overwritten, and the samples come oldest first
+            self.assertEqual(profiler.get_samples("blit"), [float(old) for old in range(max(frame-3,1),frame+1)])
+            self.assertEqual(profiler.get_samples(), [old*11.0 for old in range(max(frame-3,1),frame+1)])
+        self.assertRaises(ValueError, FrameProfiler, 0)
+
+    def test_percentiles(self):
+        profiler = FrameProfiler(100)
+        for time in [3.0,1.0,4.0,1.0,5.0,9.0,2.0,6.0,5.0,3.0]:
+            self.play_frame(profiler, [("display_update",time)])
+        #Sorted: 1,1,2,3,3,4,5,5,6,9 (the nearest rank is the smallest with at least that percentage at or below)
+        self.assertEqual(profiler.get_percentile(0), 1.0)
+        self.assertEqual(profiler.get_percentile(10), 1.0)
+        self.assertEqual(profiler.get_percentile(11), 1.0)
+        self.assertEqual(profiler.get_percentile(21), 2.0)
+        self.assertEqual(profiler.get_percentile(50), 3.0)
+        self.assertEqual(profiler.get_percentile(51), 4.0)
+        self.assertEqual(profiler.get_percentile(95), 9.0)
+        self.assertEqual(profiler.get_percentile(100), 9.0)
+        self.assertEqual(profiler.get_percentile(90, "display_update"), 6.0)
+        statistics = profiler.get_statistics((50,90,100))
+        self.assertEqual(set(statistics), set((FrameProfiler.FRAME,)+FrameProfiler.PHASES))
+        self.assertEqual(statistics["display_update"], (3.0,6.0,9.0))
+        self.assertEqual(statistics["blit"], (0.0,0.0,0.0))
+
+    def test_no_frames(self):
+        profiler = FrameProfiler()
+        self.assertEqual(profiler.get_frame_count(), 0)
+        self.assertEqual(profiler.get_samples(), [])
+        self.assertEqual(profiler.get_percentile(50), None)
+        statistics = profiler.get_statistics()
+        for phase in (FrameProfiler.FRAME,)+FrameProfiler.PHASES:
+            self.assertEqual(statistics[phase], (None,None,None))
+        #A frame in progress doesn't count until it is ended
+        profiler.start_frame()
+        self.clock.time += 1.0
+        profiler.mark("blit")
+        self.assertEqual(profiler.get_percentile(50), None)
+
+    def test_other_threads(self):
+        profiler = FrameProfiler()
+        profiler.start_frame()
+        self.clock.time += 1.0
+        #A mark from another thread (e.g. the render worker) is ignored, and doesn't move the last mark
+        other = threading.Thread(target=profiler.mark, args=("composition",))
+        other.start()
+        other.join()
+        self.clock.time += 2.0
+        profiler.mark("blit")
+        profiler.end_frame()
+        self.assertEqual(profiler.get_samples("composition"), [0.0])
+        self.assertEqual(profiler.get_samples("blit"), [3.0])
+        self.assertEqual(profiler.get_samples(), [3.0])
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestFrameProfiler)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,240 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import math
+import random
+import pygame
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.shapes.handlers.drawable_rectangle_handler import DrawableRectangleHandler
+from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.shapes.custom_rectangles_shape import CustomRectanglesShape
+from mjb.dev.game_utility.capabilities.drawable import Drawable
+from mjb.dev.game_utility.input_listeners.frame_listener import FrameListener
+
+#The frames in each window measured by the adaptive grid
+ADAPTIVE_WINDOW = PictureHandler._PictureHandler__ADAPTIVE_WINDOW
+
+class CallbackFrameListener(FrameListener):
+    '''
+    A frame listener calling a function each frame
+    '''
+
+    def __init__(self, callback):
+        self.__callback = callback
+        FrameListener.__init__(self)
+
+    def frame_passed(self):
+        self.__callback()
+
+def run_in_world(function, *args, **kwargs):
+    '''
+    Run a function in a world of its own, so that it can initialise the screen and start the game loop
+    @param function: the function to run
+    @param args: the arguments to call the function with
+    @param kwargs: the keyword arguments to call the function with
+    @return: whatever the function returned
+    '''
+    with World():
+        return function(*args, **kwargs)
+
+def run_adaptive_windows(phases):
+    '''
+    Drive the adaptive grid of the picture handler (on a 640 * 480 screen, starting from 32 * 16)
+    with a synthetic cost. This must be done in a world of its own.
+    @param phases: a list of (cost_function, windows) to run one after the other. Each cost function
+    goes from the grid division to the cost of a frame, and is used for that many windows.
+    @return: the list of the grid division during each window
+    '''
+    PictureHandler._PictureHandler__size = (640,480)
+    PictureHandler._PictureHandler__initialise_grid(32,16)
+    divisions = []
+    for (cost_function,windows) in phases:
+        for _ in range(0,windows):
+            division = PictureHandler.get_grid_division()
+            divisions.append(division)
+            for _ in range(0,ADAPTIVE_WINDOW):
+                PictureHandler._PictureHandler__adapt_grid(cost_function(division))
+    return divisions
+
+def make_cost_function(best, scale=1):
+    '''
+    @param best: the grid division with the lowest cost
+    @param scale: 1 by default, otherwise a factor to multiply the costs by
+    @return: a cost function rising the further a grid is from the best one
+    '''
+    return lambda (width_div,height_div): scale*(5000+1000*(abs(math.log(width_div/float(best[0]),2))+
+                                                             abs(math.log(height_div/float(best[1]),2))))
+
+def take_dirty_cells():
+    '''
+    @return: the set of cells marked for updating as (x,y), which are then forgotten
+    '''
+    (_,height_division) = PictureHandler.get_grid_division()
+    dirty_cells = PictureHandler._PictureHandler__dirty_cells
+    marked = set((index/height_division,index%height_division) for index in range(0,len(dirty_cells))
+                 if dirty_cells[index])
+    #(Taking the picture clears the cells)
+    PictureHandler._get_picture()
+    PictureHandler._picture_drawn()
+    return marked
+
+def mark_dirty_cells():
+    '''
+    Move drawers about a headless screen (1024 * 768, so the cells are 32 * 48 pixels), taking the cells marked
+    after each move (in a world of its own)
+    @return: the list of the sets of cells marked
+    '''
+    Screen.initialise(headless=True)
+    PictureHandler.initialise()
+    marked = []
+    rectangle = DrawableRectangleHandler((40,56,16,16),(255,0,0))
+    marked.append(take_dirty_cells())
+    marked.append(take_dirty_cells())
+    #Both where it was and where it is now
+    rectangle.move_rectangle(16,32)
+    marked.append(take_dirty_cells())
+    #Clipped to the screen
+    rectangle.set_rectangle((1000,-8,48,64))
+    marked.append(take_dirty_cells())
+    rectangle.set_rectangle((1100,1100,16,16))
+    marked.append(take_dirty_cells())
+    rectangle.set_rectangle((1116,1100,16,16))
+    marked.append(take_dirty_cells())
+    #An L shape
+    shape_handler = ShapeHandler(CustomRectanglesShape([(0,0,16,80),(0,64,80,16)]), 0, (88,40))
+    Drawable(shape_handler, 1, lambda top_left,surface: None)
+    marked.append(take_dirty_cells())
+    #A hollow square (a frame 8 pixels thick)
+    shape_handler = ShapeHandler(CustomRectanglesShape([(0,0,160,8),(0,184,160,8),(0,8,8,176),(152,8,8,176)]), 0,
+                                 (300,96))
+    Drawable(shape_handler, 1, lambda top_left,surface: None)
+    marked.append(take_dirty_cells())
+    return marked
+
+def play_random_scene(seed, compose_in_place):
+    '''
+    Play a headless game of overlapping rectangles moving about, changing colour and hiding
+    (in a world of its own)
+    @param seed: the seed for the scene
+    @param compose_in_place: whether the picture handler composes in place (otherwise it uses slabs)
+    @return: (the screen at the end as a string of RGB pixels, the same drawn from scratch in painter's order)
+    '''
+    generator = random.Random(seed)
+    captured = []
+    Screen.initialise(headless=True, size=(160,120), max_frames=40, deterministic=True,
+                      capture_handler=lambda surface,updates: captured.append(pygame.image.tostring(surface,"RGB")))
+    PictureHandler.initialise(compose_in_place=compose_in_place)
+    depths = range(0,20)
+    generator.shuffle(depths)
+    rectangles = []
+    for depth in depths:
+        rectangles.append(DrawableRectangleHandler((generator.randint(-20,160),generator.randint(-20,120),
+                                                    generator.randint(1,60),generator.randint(1,60)),
+                                                   (generator.randrange(0,256),generator.randrange(0,256),0),
+                                                   depth))
+    def frame_passed():
+        for rectangle in generator.sample(rectangles, 5):
+            action = generator.random()
+            if action<0.6:
+                rectangle.move_rectangle(generator.randint(-15,15),generator.randint(-15,15))
+            elif action<0.8:
+                rectangle.set_colour((0,generator.randrange(0,256),generator.randrange(0,256)))
+            else:
+                rectangle.set_visible(not rectangle.get_visible())
+    CallbackFrameListener(frame_passed)
+    Screen.start_game_loop()
+    #Draw what should be on the screen from scratch, from the back to the front
+    reference = pygame.Surface((160,120))
+    reference.fill(Screen.get_background_colour())
+    for rectangle in sorted(rectangles, key=lambda rectangle: rectangle.get_depth(), reverse=True):
+        if rectangle.get_visible():
+            #(Clipped, since pygame fills the wrong area from above or left of the surface)
+            reference.fill(rectangle.get_colour(), pygame.Rect(rectangle.get_rectangle()).clip(reference.get_rect()))
+    return (captured[-1],pygame.image.tostring(reference,"RGB"))
+
+class TestPictureHandler(unittest.TestCase):
+    '''
+    Test class for picture_handler.py
+    '''
+
+    def test_adaptive_grid_settles(self):
+        '''
+        When the starting grid is the best, the grid tries each neighbour once and then stays put
+        (other than the occasional retry, which backs off)
+        '''
+        divisions = run_in_world(run_adaptive_windows, [(make_cost_function((32,16)),400)])
+        neighbours = 6
+        #The neighbours are each tried, then the grid settles
+        self.assertEqual(len(set(divisions[0:neighbours+1])), neighbours+1)
+        self.assertEqual(divisions[neighbours+1:neighbours+1+8], [(32,16)]*8)
+        on_best = len([division for division in divisions if division==(32,16)])
+        self.assertTrue(on_best>=0.9*len(divisions))
+        #Each retry waits twice as long as the last (8, 16, 32, 64, 128, ...), so there are only a few
+        changes = len([index for index in range(1,len(divisions)) if divisions[index]!=divisions[index-1]])
+        self.assertTrue(changes<=2*neighbours*6)
+        self.assertEqual(divisions[-1], (32,16))
+
+    def test_adaptive_grid_converges(self):
+        '''
+        The grid climbs to the best grid and stays there
+        '''
+        divisions = run_in_world(run_adaptive_windows, [(make_cost_function((64,32)),200)])
+        self.assertEqual(divisions[-1], (64,32))
+        first = divisions.index((64,32))
+        on_best = len([division for division in divisions[first:] if division==(64,32)])
+        self.assertTrue(on_best>=0.9*len(divisions[first:]))
+
+    def test_adaptive_grid_drift(self):
+        '''
+        When the cost of the settled grid drifts, the grid moves to the new best grid
+        '''
+        divisions = run_in_world(run_adaptive_windows, [(make_cost_function((32,16)),12),
+                                                          (make_cost_function((16,16), 2),18)])
+        self.assertEqual(divisions[11], (32,16))
+        #(The neighbours of the new best are tried before it settles)
+        self.assertEqual(divisions[-8:], [(16,16)]*8)
+
+    def test_dirty_cells(self):
+        '''
+        Only the cells a drawer covers (on the screen) are marked for updating
+        '''
+        marked = run_in_world(mark_dirty_cells)
+        self.assertEqual(marked[0], set([(1,1)]))
+        self.assertEqual(marked[1], set())
+        self.assertEqual(marked[2], set([(1,1),(1,2),(2,1),(2,2)]))
+        self.assertEqual(marked[3], set([(1,1),(1,2),(2,1),(2,2),(31,0),(31,1)]))
+        self.assertEqual(marked[4], set([(31,0),(31,1)]))
+        self.assertEqual(marked[5], set())
+        #The cells are checked against the inner rectangles of the L shape, so the empty ones at the top right
+        #are left alone
+        self.assertEqual(marked[6], set([(2,0),(3,0),(2,1),(3,1),(2,2),(3,2),(4,2),(5,2)]))
+        #And so are the cells in the middle of the hollow square
+        self.assertEqual(marked[7], set([(x,y) for x in range(9,15) for y in [2,5]] +
+                                        [(x,y) for x in [9,14] for y in range(2,6)]))
+
+    def test_composition(self):
+        '''
+        Whether composed on slabs or in place, the picture matches the scene drawn from scratch in painter's order
+        '''
+        for seed in range(0,5):
+            for compose_in_place in [False,True]:
+                (screen,reference) = run_in_world(play_random_scene, seed, compose_in_place)
+                self.assertTrue(screen==reference, "seed " + str(seed) + ", compose in place " + str(compose_in_place))
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestPictureHandler)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,88 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.graphics.profiler_overlay import ProfilerOverlay
+from mjb.test.game_utility.graphics.test_picture_handler import CallbackFrameListener, run_in_world
+
+#The colour behind the text of the overlay
+OVERLAY_COLOUR = (0,0,255)
+
+def show_overlay():
+    '''
+    Play a profiled headless game for 30 frames with an overlay redrawn every 5 frames, disposing of it
+    in the 19th (in a world of its own)
+    @return: (the picture of the overlay during each frame from the second, a list of (the colour at (1,1),
+    the rectangles updated) at the end of each frame)
+    '''
+    captures = []
+    def capture_handler(surface, updates):
+        captures.append((tuple(surface.get_at((1,1)))[0:3],updates))
+    Screen.initialise(headless=True, size=(320,240), deterministic=True, max_frames=30, profile_frames=10,
+                      capture_handler=capture_handler)
+    PictureHandler.initialise()
+    overlay = ProfilerOverlay(refresh_frames=5, background_colour=OVERLAY_COLOUR)
+    pictures = []
+    def frame_passed():
+        pictures.append(overlay._ProfilerOverlay__picture)
+        if len(pictures)==18:
+            overlay.dispose()
+    CallbackFrameListener(frame_passed)
+    Screen.start_game_loop()
+    return (pictures,captures)
+
+def make_unprofiled_overlay():
+    '''
+    Try to show an overlay on a headless screen which isn't profiled (in a world of its own)
+    @return: true iff it raised a ValueError
+    '''
+    Screen.initialise(headless=True, size=(320,240))
+    PictureHandler.initialise()
+    try:
+        ProfilerOverlay()
+    except ValueError:
+        return True
+    return False
+
+class TestProfilerOverlay(unittest.TestCase):
+    '''
+    Test class for profiler_overlay.py
+    '''
+
+    def test_refresh(self):
+        '''
+        The overlay is drawn from the start, redrawn every so many frames, and stops being drawn once disposed of
+        '''
+        (pictures,captures) = run_in_world(show_overlay)
+        #(The frame listener is added during the first frame, so pictures[index] is from the same frame as
+        #captures[index+1])
+        changes = [index for index in range(1,len(pictures)) if pictures[index] is not pictures[index-1]]
+        self.assertEqual(changes, [4,9,14])
+        #Each redraw shows the area of the overlay again, and nothing is shown in between
+        self.assertEqual([index for index in range(0,18) if captures[index][1]!=[]], [0,5,10,15])
+        #Nothing changes once it is disposed of, and the background is shown where it was
+        self.assertEqual(len(set(id(picture) for picture in pictures[14:])), 1)
+        self.assertEqual(set(pixel for (pixel,_) in captures[0:18]), set([OVERLAY_COLOUR]))
+        self.assertEqual(set(pixel for (pixel,_) in captures[18:]), set([Screen.get_background_colour()]))
+        self.assertTrue(captures[18][1])
+        self.assertEqual([updates for (_,updates) in captures[19:]], [[]]*11)
+
+    def test_not_profiled(self):
+        self.assertTrue(run_in_world(make_unprofiled_overlay))
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestProfilerOverlay)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
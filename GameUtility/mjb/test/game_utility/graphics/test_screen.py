@@ -0,0 +1,238 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import threading
+import timeit
+import pygame
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.shapes.handlers.drawable_rectangle_handler import DrawableRectangleHandler
+from mjb.test.game_utility.graphics.test_picture_handler import CallbackFrameListener, run_in_world
+
+def run_fixed_timestep(**options):
+    '''
+    Run a deterministic game for 30 frames (in a world of its own)
+    @param options: the parameters to initialise the screen with
+    @return: a list of (steps so far,interpolation alpha) at the end of each frame
+    '''
+    frames = []
+    def capture_handler(surface, updates):
+        frames.append((Screen.get_step_count(),Screen.get_interpolation_alpha()))
+    Screen.initialise(headless=True, size=(160,120), deterministic=True, max_frames=30,
+                      capture_handler=capture_handler, **options)
+    PictureHandler.initialise()
+    Screen.start_game_loop()
+    return frames
+
+def show_headless_game():
+    '''
+    Play a headless game for a few frames with a capture handler (in a world of its own)
+    @return: (the screen size, a list of (the size of the surface captured, the colour at (15,15)) for each frame)
+    '''
+    captures = []
+    def capture_handler(surface, updates):
+        captures.append((surface.get_size(),tuple(surface.get_at((15,15)))[0:3]))
+    Screen.initialise(headless=True, size=(160,120), max_frame_rate=1000, capture_handler=capture_handler)
+    PictureHandler.initialise()
+    DrawableRectangleHandler((10,10,20,20),(255,0,0))
+    frames = []
+    def frame_passed():
+        frames.append(True)
+        if len(frames)==4:
+            Screen.quit_game()
+    CallbackFrameListener(frame_passed)
+    size = Screen.get_screen_size()
+    Screen.start_game_loop()
+    return (size,captures)
+
+def initialise_default_headless():
+    '''
+    Initialise a headless screen without a size, then try again (in a world of its own)
+    @return: (the screen size, whether the second try raised a ValueError)
+    '''
+    Screen.initialise(headless=True)
+    try:
+        Screen.initialise(headless=True)
+    except ValueError:
+        return (Screen.get_screen_size(),True)
+    return (Screen.get_screen_size(),False)
+
+def record_updates():
+    '''
+    Play a headless game which changes the screen in different ways, capturing how the display would be updated
+    (in a world of its own, on a 1024 * 768 screen)
+    @return: a list of (the list of rectangles updated or None for the whole screen, the pixel at (1,1))
+    for each frame
+    '''
+    captures = []
+    def capture_handler(surface, updates):
+        captures.append((updates,tuple(surface.get_at((1,1)))[0:3]))
+    Screen.initialise(headless=True, max_frame_rate=1000, capture_handler=capture_handler)
+    PictureHandler.initialise()
+    frames = []
+    rectangles = []
+    def frame_passed():
+        frames.append(True)
+        frame = len(frames)
+        if frame==1:
+            rectangles.append(DrawableRectangleHandler((10,10,20,20),(255,0,0)))
+        elif frame==3:
+            #Most of the screen
+            rectangles.append(DrawableRectangleHandler((0,0,960,720),(0,255,0),1))
+        elif frame==5:
+            #Too many areas (which aren't next to each other)
+            for index in range(0,60):
+                rectangles.append(DrawableRectangleHandler((64*(index%16)+1,96*(index/16)+1,1,1),(0,0,255)))
+        elif frame==7:
+            rectangles[0].move_rectangle(1,0)
+        elif frame==9:
+            Screen.quit_game()
+    CallbackFrameListener(frame_passed)
+    Screen.start_game_loop()
+    return captures
+
+def record_idle_frames():
+    '''
+    Play an idle game with wakeups scheduled after 100ms and 200ms, which another thread quits after 400ms
+    (in a world of its own)
+    @return: (the time each frame passed in milliseconds since the start, the seconds the game ran for)
+    '''
+    Screen.initialise(headless=True, idle=True)
+    PictureHandler.initialise()
+    frames = []
+    start = pygame.time.get_ticks()
+    def frame_passed():
+        frames.append(pygame.time.get_ticks()-start)
+    CallbackFrameListener(frame_passed)
+    Screen.schedule_wakeup(100)
+    Screen.schedule_wakeup(200)
+    quitter = threading.Timer(0.4, Screen.quit_game)
+    quitter.daemon = True
+    quitter.start()
+    start_time = timeit.default_timer()
+    Screen.start_game_loop()
+    return (frames,timeit.default_timer()-start_time)
+
+def count_idle_frames(pipelined):
+    '''
+    Play an idle game which draws in its first frame, then waits for a wakeup to quit (in a world of its own)
+    @param pipelined: whether the picture is drawn on a render worker thread
+    @return: the number of frames which ran
+    '''
+    Screen.initialise(headless=True, size=(160,120), idle=True, pipelined=pipelined)
+    PictureHandler.initialise()
+    frames = []
+    rectangle = DrawableRectangleHandler((10,10,20,20),(255,0,0))
+    start = Screen.get_ticks()
+    def frame_passed():
+        frames.append(Screen.get_ticks())
+        if len(frames)==1:
+            rectangle.move_rectangle(5,5)
+        elif Screen.get_ticks()>=start+100:
+            Screen.quit_game()
+    CallbackFrameListener(frame_passed)
+    Screen.schedule_wakeup(100)
+    Screen.start_game_loop()
+    return len(frames)
+
+class TestScreen(unittest.TestCase):
+    '''
+    Test class for screen.py
+    '''
+
+    def test_headless(self):
+        '''
+        A headless game runs in full, showing each frame to the capture handler instead of a display
+        '''
+        (size,captures) = run_in_world(show_headless_game)
+        self.assertEqual(size, (160,120))
+        #(The frame listener is added during the first frame, and the game quits at the end of the fifth)
+        self.assertEqual(captures, [((160,120),(255,0,0))]*5)
+        #Pygame is left running for anything else
+        self.assertTrue(pygame.get_init())
+        self.assertEqual(run_in_world(initialise_default_headless), ((1024,768),True))
+
+    def test_update_choice(self):
+        '''
+        Each frame shows nothing, the areas which changed, or the whole screen (when that is cheaper)
+        '''
+        captures = run_in_world(record_updates)
+        updates = [updates for (updates,_) in captures]
+        #(The frame listener is added during the first frame. Cells are 32 * 48 pixels)
+        self.assertEqual(updates[0], [])
+        self.assertEqual(updates[1], [(0,0,32,48)])
+        self.assertEqual(updates[2], [])
+        self.assertEqual(updates[3], None)
+        self.assertEqual(updates[4], [])
+        self.assertEqual(updates[5], None)
+        self.assertEqual(updates[6], [])
+        self.assertTrue(updates[7] and len(updates[7])<=2)
+        self.assertEqual(updates[8:], [[],[]])
+        #The whole screen is shown when it is all updated
+        self.assertEqual([pixel for (_,pixel) in captures[2:7]],
+                         [(255,255,255),(0,255,0),(0,255,0),(0,0,255),(0,0,255)])
+
+    def test_fixed_timestep(self):
+        '''
+        On the virtual clock, the frame listeners are called once for each step in the time each frame stands for
+        '''
+        #A step each frame without a fixed time step
+        frames = run_in_world(run_fixed_timestep)
+        self.assertEqual(len(frames), 30)
+        self.assertEqual([steps for (steps,_) in frames], range(1,31))
+        #A step every three frames (the first frame always takes one)
+        frames = run_in_world(run_fixed_timestep, fixed_timestep=0.05)
+        steps = [steps for (steps,_) in frames]
+        self.assertEqual(steps[0], 1)
+        self.assertTrue(steps[-1] in (10,11), steps)
+        self.assertTrue(all(steps[index]-steps[index-1] in (0,1) for index in range(1,30)), steps)
+        #The alpha is how far through the next step the time is
+        for index in range(1,30):
+            (_,alpha) = frames[index]
+            self.assertTrue(alpha>=0 and alpha<1)
+            if steps[index]==steps[index-1]:
+                self.assertTrue(alpha>frames[index-1][1])
+        #Ten steps each frame, but only four can be taken (three frames skipped) - the rest of the time is dropped
+        frames = run_in_world(run_fixed_timestep, fixed_timestep=0.01, max_frame_rate=10, max_frame_skip=3)
+        self.assertEqual([steps for (steps,_) in frames], [1]+range(5,30*4,4))
+        self.assertEqual(set(alpha for (_,alpha) in frames[1:]), set([0.0]))
+
+    def test_idle_wakeups(self):
+        '''
+        An idle game sleeps until a wakeup is due, and quitting from another thread wakes it up
+        '''
+        (frames,elapsed) = run_in_world(record_idle_frames)
+        #The game didn't wait for anything other than the quit
+        self.assertTrue(elapsed>=0.39 and elapsed<1.0)
+        #Running all the time would take about 24 frames. Instead there is a frame for each wakeup and one for
+        #quitting (and one at the start if there were events waiting, with a spare frame for a slow machine)
+        self.assertTrue(len(frames)>=3 and len(frames)<=6, frames)
+        self.assertTrue(len([ticks for ticks in frames if ticks<100])<=2, frames)
+        self.assertTrue(len([ticks for ticks in frames if ticks>=100 and ticks<200])>=1, frames)
+        self.assertTrue(len([ticks for ticks in frames if ticks>=200 and ticks<390])>=1, frames)
+        self.assertTrue(frames[-1]>=390, frames)
+
+    def test_idle_pipelined(self):
+        '''
+        The frame after one which drew stays awake, whether or not the picture is drawn on another thread
+        '''
+        #The first frame draws, the second doesn't, then the third waits for the wakeup
+        for _ in range(0,5):
+            self.assertEqual(run_in_world(count_idle_frames, False), 3)
+            self.assertEqual(run_in_world(count_idle_frames, True), 3)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestScreen)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
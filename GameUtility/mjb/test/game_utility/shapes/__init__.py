@@ -0,0 +1,3 @@
+'''
+This package contains all tests for the shapes package of game utility
+'''
@@ -0,0 +1,20 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import mjb.test.game_utility.shapes.test_image_shape as test_image_shape
+
+def suite():
+    '''
+    Returns a test suite for all of the modules in this package
+    '''
+    test_suite = unittest.TestSuite(
+        #Add all of the suites here:
+        [test_image_shape.suite()
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,86 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import random
+import pygame
+import mjb.dev.game_utility.shapes.image_shape as image_shape
+from mjb.dev.game_utility.shapes.image_shape import ImageShape
+from mjb.dev.game_utility.graphics.image import Image
+from mjb.dev.game_utility.utility.bitmask import Bitmask
+
+#The colour key of the test images
+COLOUR_KEY = (255,0,255)
+
+def make_image(size, seed):
+    '''
+    @param size: the size of the image as (width,height)
+    @param seed: the seed for the random pixels
+    @return: an image of random blobs on the colour key (including colours only just off the colour key)
+    '''
+    generator = random.Random(seed)
+    surface = pygame.Surface(size)
+    surface.fill(COLOUR_KEY)
+    surface.set_colorkey(COLOUR_KEY)
+    (width,height) = size
+    colours = [(0,0,0),(254,0,255),(255,1,255),(255,0,254),(10,200,30)]
+    for _ in range(0,generator.randint(1,6)):
+        (x,y) = (generator.randrange(0,width),generator.randrange(0,height))
+        surface.fill(generator.choice(colours), (x,y,generator.randint(1,6),generator.randint(1,6)))
+    #And a few single pixels (including the corners at the far edges)
+    for _ in range(0,generator.randint(0,4)):
+        surface.set_at((generator.randrange(0,width),generator.randrange(0,height)),generator.choice(colours))
+    if generator.random()<0.5:
+        surface.set_at((width-1,height-1),(0,0,0))
+    return Image(surface)
+
+class TestImageShape(unittest.TestCase):
+    '''
+    Test class for image_shape.py
+    '''
+
+    def calculate(self, image, precision):
+        '''
+        @return: (occupied squares, shape covered as a bitmask, bitmask) for the image at the precision
+        '''
+        shape = ImageShape(image, cache_depth=0)
+        occupied = sorted(shape._ImageShape__calculate_occupied_coords(precision))
+        (rect_list,_) = shape.calculate_shape(precision, False)
+        return (occupied,Bitmask.from_rectangles(image.get_size(), rect_list).get_rows(),
+                shape.calculate_bitmask(precision).get_rows())
+
+    def test_numpy_matches_fallback(self):
+        '''
+        Reading the pixels through the surfarray gives the same shape and bitmask as reading them one at a time
+        '''
+        if image_shape.numpy is None:
+            self.skipTest("numpy is not available")
+        numpy = image_shape.numpy
+        for seed in range(0,40):
+            size = random.Random(seed).choice([(1,1),(8,8),(13,7),(16,24),(37,23)])
+            image = make_image(size, seed)
+            for precision in [1,2,3,5,8,40]:
+                with_numpy = self.calculate(image, precision)
+                image_shape.numpy = None
+                try:
+                    without_numpy = self.calculate(image, precision)
+                finally:
+                    image_shape.numpy = numpy
+                self.assertEqual(with_numpy, without_numpy, "seed " + str(seed) + ", precision " + str(precision))
+                #The bitmask covers just what the rectangles of the shape do
+                self.assertEqual(with_numpy[1], with_numpy[2])
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestImageShape)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
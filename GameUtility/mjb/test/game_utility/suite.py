@@ -7,7 +7,11 @@ import unittest
 import mjb.test.game_utility.graphics.suite as graphics_suite
 import mjb.test.game_utility.input_listeners.suite as input_listeners_suite
 import mjb.test.game_utility.collisions.suite as collisions_suite
+import mjb.test.game_utility.capabilities.suite as capabilities_suite
+import mjb.test.game_utility.shapes.suite as shapes_suite
 import mjb.test.game_utility.utility.suite as utility_suite
+import mjb.test.game_utility.test_batch_runner as test_batch_runner
+import mjb.test.game_utility.test_world as test_world
 
 def suite():
     '''
@@ -18,7 +22,11 @@ def suite():
         [graphics_suite.suite(),
          input_listeners_suite.suite(),
          collisions_suite.suite(),
-         utility_suite.suite()
+         capabilities_suite.suite(),
+         shapes_suite.suite(),
+         utility_suite.suite(),
+         test_batch_runner.suite(),
+         test_world.suite()
         ])
     return test_suite
 
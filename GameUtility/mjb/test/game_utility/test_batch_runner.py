@@ -0,0 +1,104 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+import multiprocessing
+import random
+from mjb.dev.game_utility.batch_runner import BatchRunner
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.shapes.handlers.drawable_rectangle_handler import DrawableRectangleHandler
+from mjb.dev.game_utility.input_listeners.frame_listener import FrameListener
+
+class _RecordingFrameListener(FrameListener):
+    '''
+    Records each step, and moves a rectangle a random amount
+    '''
+
+    def __init__(self, steps):
+        self.__steps = steps
+        self.__rectangle = DrawableRectangleHandler((10,10,20,20),(255,0,0))
+        FrameListener.__init__(self)
+
+    def frame_passed(self):
+        self.__steps.append(Screen.get_frame_count())
+        self.__rectangle.move_rectangle(random.randint(-2,2),random.randint(-2,2))
+
+def play_game(run):
+    '''
+    The entry point of a game for the batch runner (at the top level, so that it can be sent to the workers)
+    @return: (a random number, the frame of each step), which the game fills in as it runs
+    '''
+    steps = []
+    _RecordingFrameListener(steps)
+    return (random.random(),steps)
+
+def fail_game(run):
+    '''
+    An entry point which fails
+    '''
+    raise ValueError("No game for run " + str(run))
+
+class TestBatchRunner(unittest.TestCase):
+    '''
+    Test class for batch_runner.py
+    '''
+
+    def test_runs(self):
+        runner = BatchRunner(play_game, max_frames=30, processes=1)
+        results = sorted(runner.run([3,3,4]), key=lambda result: result.get_index())
+        self.assertEqual([result.get_index() for result in results], [0,1,2])
+        self.assertEqual([result.get_run() for result in results], [3,3,4])
+        for result in results:
+            self.assertEqual(result.get_error(), None)
+            self.assertEqual(result.get_frame_count(), 30)
+            #A step each frame (the frame listener is only added during the first frame, so hears the rest)
+            self.assertEqual(result.get_step_count(), 30)
+            self.assertEqual(result.get_result()[1], range(1,30))
+            self.assertEqual(result.get_statistics()["frame"][0]>=0, True)
+            self.assertTrue(result.get_time()>0)
+        #Each run is seeded by its run
+        self.assertEqual(results[0].get_result(), results[1].get_result())
+        self.assertNotEqual(results[0].get_result()[0], results[2].get_result()[0])
+
+    def test_fixed_timestep(self):
+        runner = BatchRunner(play_game, max_frames=30, processes=1, screen_options={"fixed_timestep" : 1/120.0})
+        [result] = list(runner.run([1]))
+        self.assertEqual(result.get_error(), None)
+        self.assertEqual(result.get_frame_count(), 30)
+        #The first frame takes one step, then there are two each frame on the virtual clock (at 60 frames per second)
+        self.assertEqual(result.get_step_count(), 1+29*2)
+        self.assertEqual(len(result.get_result()[1]), 29*2)
+
+    def test_error(self):
+        runner = BatchRunner(fail_game, processes=1)
+        results = sorted(runner.run([7,8]), key=lambda result: result.get_index())
+        self.assertEqual(len(results), 2)
+        for (result,run) in zip(results,[7,8]):
+            self.assertEqual(result.get_result(), None)
+            self.assertEqual(result.get_frame_count(), 0)
+            self.assertEqual(result.get_statistics(), None)
+            self.assertTrue(result.get_error().strip().endswith("ValueError: No game for run " + str(run)))
+
+    def test_close_early(self):
+        runner = BatchRunner(play_game, max_frames=30, processes=1, max_pending=2)
+        results = runner.run(xrange(0,10**9))
+        self.assertEqual(results.next().get_frame_count(), 30)
+        self.assertTrue(len(multiprocessing.active_children())>0)
+        results.close()
+        #The workers are stopped
+        self.assertEqual(multiprocessing.active_children(), [])
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestBatchRunner)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
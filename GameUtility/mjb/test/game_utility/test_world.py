@@ -0,0 +1,154 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+import unittest
+from mjb.dev.game_utility.world import World
+from mjb.dev.game_utility.graphics.screen import Screen
+from mjb.dev.game_utility.graphics.picture_handler import PictureHandler
+from mjb.dev.game_utility.capabilities.collideable import CollisionScreen, Collideable
+from mjb.dev.game_utility.capabilities.drawable import Drawable
+from mjb.dev.game_utility.shapes.handlers.shape_handler import ShapeHandler
+from mjb.dev.game_utility.shapes.custom_rectangles_shape import CustomRectanglesShape
+from mjb.dev.game_utility.input_listeners.frame_listener import FrameListener
+
+class _CountingFrameListener(FrameListener):
+    '''
+    Counts the frames it hears, moving a shape handler each frame
+    '''
+
+    def __init__(self, shape_handler):
+        self.frames = 0
+        self.__shape_handler = shape_handler
+        FrameListener.__init__(self)
+
+    def frame_passed(self):
+        self.frames+=1
+        self.__shape_handler.move_top_left(1,0)
+
+def set_up_game(frames):
+    '''
+    Set up a headless game in the active world, with a frame listener and a drawable shape
+    @param frames: the number of frames the game should run for
+    @return: (frame_listener, redraws) - the frame listener, and the list of the frames the shape was drawn in
+    '''
+    Screen.initialise(headless=True, size=(160,120), max_frames=frames)
+    PictureHandler.initialise()
+    shape_handler = ShapeHandler(CustomRectanglesShape([(0,0,10,10)]), 0, (10,10))
+    redraws = []
+    Drawable(shape_handler, 1, lambda top_left,surface: redraws.append(Screen.get_frame_count()))
+    return (_CountingFrameListener(shape_handler),redraws)
+
+class TestWorld(unittest.TestCase):
+    '''
+    Test class for world.py
+    '''
+
+    def test_games_one_after_another(self):
+        with World():
+            (first_listener,first_redraws) = set_up_game(10)
+            Screen.start_game_loop()
+            self.assertEqual(Screen.get_frame_count(), 10)
+        #(The listener is added during the first frame)
+        self.assertEqual(first_listener.frames, 9)
+        with World():
+            #Nothing is left over from the first game
+            self.assertEqual(Screen._Screen__frame_listeners, {})
+            self.assertEqual(Screen._frame_listeners_to_add, {})
+            self.assertEqual(Screen.get_frame_count(), 0)
+            (second_listener,second_redraws) = set_up_game(20)
+            Screen.start_game_loop()
+            self.assertEqual(Screen.get_frame_count(), 20)
+        self.assertEqual(first_listener.frames, 9)
+        self.assertEqual(second_listener.frames, 19)
+        #Each shape is only drawn by its own game
+        self.assertTrue(len(first_redraws)>0 and max(first_redraws)<10)
+        self.assertTrue(len(second_redraws)>len(first_redraws))
+
+    def test_default_world_restored(self):
+        default = World.get_active_world()
+        default_frame_listeners = Screen._Screen__frame_listeners
+        default_initialised = CollisionScreen._CollisionScreen__is_initialised
+        world = World()
+        with world as entered:
+            self.assertTrue(entered is world)
+            self.assertTrue(World.get_active_world() is world)
+            set_up_game(5)
+            CollisionScreen.initialise()
+            self.assertTrue(CollisionScreen._CollisionScreen__is_initialised)
+            #Worlds can be nested
+            with World() as inner:
+                self.assertTrue(World.get_active_world() is inner)
+                self.assertFalse(CollisionScreen._CollisionScreen__is_initialised)
+            self.assertTrue(World.get_active_world() is world)
+            self.assertTrue(CollisionScreen._CollisionScreen__is_initialised)
+        self.assertTrue(World.get_active_world() is default)
+        self.assertTrue(Screen._Screen__frame_listeners is default_frame_listeners)
+        self.assertEqual(CollisionScreen._CollisionScreen__is_initialised, default_initialised)
+        #Even when leaving with an error
+        try:
+            with World():
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertTrue(World.get_active_world() is default)
+        #Re-entering a world brings its state back
+        with world:
+            self.assertTrue(CollisionScreen._CollisionScreen__is_initialised)
+
+    def test_fresh_locks(self):
+        default_locks = (Screen._lock,PictureHandler._PictureHandler__picture_lock)
+        with World():
+            first_locks = (Screen._lock,PictureHandler._PictureHandler__picture_lock)
+            #Take them, so that a shared lock would show
+            for lock in first_locks:
+                self.assertTrue(lock.acquire(False))
+            with World():
+                second_locks = (Screen._lock,PictureHandler._PictureHandler__picture_lock)
+                for lock in second_locks:
+                    self.assertTrue(lock.acquire(False))
+                    lock.release()
+            for lock in first_locks:
+                lock.release()
+        for (locks,other_locks) in [(default_locks,first_locks),(default_locks,second_locks),
+                                    (first_locks,second_locks)]:
+            for (lock,other_lock) in zip(locks,other_locks):
+                self.assertFalse(lock is other_lock)
+        self.assertEqual(type(first_locks[0]), type(default_locks[0]))
+        self.assertEqual(type(first_locks[1]), type(default_locks[1]))
+
+    def test_used_in_another_world(self):
+        first = World()
+        with first:
+            Screen.initialise(headless=True, size=(160,120))
+            CollisionScreen.initialise()
+            collideable = Collideable(ShapeHandler(CustomRectanglesShape([(0,0,10,10)]), 0, (10,10)), 1)
+            listener = FrameListener()
+        with World():
+            Screen.initialise(headless=True, size=(160,120))
+            CollisionScreen.initialise()
+            #Fails fast, rather than changing this world
+            self.assertRaises(ValueError, collideable.get_shape_handler().move_top_left, 1, 1)
+            self.assertRaises(ValueError, collideable.disable)
+            self.assertRaises(ValueError, collideable.set_precision, 2)
+            self.assertRaises(ValueError, listener.deregister)
+            self.assertEqual(Screen._frame_listeners_to_remove, set())
+        with first:
+            collideable.get_shape_handler().move_top_left(1,1)
+            collideable.disable()
+            listener.deregister()
+            self.assertTrue(listener.handler in Screen._frame_listeners_to_remove)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestWorld)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
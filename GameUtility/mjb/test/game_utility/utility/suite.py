@@ -5,6 +5,8 @@ Created on 28 Jul 2014
 '''
 import unittest
 import mjb.test.game_utility.utility.test_extra_maths as test_extra_maths
+import mjb.test.game_utility.utility.test_bitmask as test_bitmask
+import mjb.test.game_utility.utility.test_rectangle_filler as test_rectangle_filler
 
 def suite():
     '''
@@ -12,7 +14,9 @@ def suite():
     '''
     test_suite = unittest.TestSuite(
         #Add all of the suites here:
-        [test_extra_maths.suite()
+        [test_extra_maths.suite(),
+         test_bitmask.suite(),
+         test_rectangle_filler.suite()
         ])
     return test_suite
 
@@ -0,0 +1,79 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import unittest
+import random
+from mjb.dev.game_utility.utility.bitmask import Bitmask
+
+class TestBitmask(unittest.TestCase):
+    '''
+    Test class for bitmask.py
+    '''
+
+    def test_bits(self):
+        bitmask = Bitmask.from_rectangles((10,5), [(1,1,3,2),(8,3,12,7)])
+        self.assertEqual(bitmask.get_size(),(10,5))
+        self.assertEqual(bitmask.count(),2+4)
+        self.assertTrue(bitmask.get_bit(1,1))
+        self.assertTrue(bitmask.get_bit(2,1))
+        self.assertFalse(bitmask.get_bit(3,1))
+        self.assertTrue(bitmask.get_bit(9,4))
+        #Outside the bitmask
+        self.assertFalse(bitmask.get_bit(10,4))
+        self.assertFalse(bitmask.get_bit(-1,1))
+        bitmask.set_bit(0,0)
+        self.assertTrue(bitmask.get_bit(0,0))
+        bitmask.set_bit(0,0,False)
+        self.assertFalse(bitmask.get_bit(0,0))
+        self.assertRaises(ValueError, Bitmask, (3,3), [0,0])
+
+    def test_overlaps_rectangle(self):
+        bitmask = Bitmask.from_rectangles((10,10), [(2,2,4,4)])
+        self.assertTrue(bitmask.overlaps_rectangle((3,3,10,10)))
+        self.assertTrue(bitmask.overlaps_rectangle((-5,-5,3,3)))
+        self.assertFalse(bitmask.overlaps_rectangle((4,0,10,10)))
+        self.assertFalse(bitmask.overlaps_rectangle((0,4,10,10)))
+        self.assertFalse(bitmask.overlaps_rectangle((20,20,30,30)))
+
+    def test_overlaps(self):
+        '''
+        Compare the overlaps against checking every pixel, for random bitmasks at random offsets
+        '''
+        generator = random.Random(5)
+        for _ in range(0,50):
+            bitmasks = []
+            for _ in range(0,2):
+                size = (generator.randint(1,70),generator.randint(1,20))
+                bitmask = Bitmask(size)
+                for _ in range(0,generator.randint(0,15)):
+                    bitmask.set_bit(generator.randint(0,size[0]-1),generator.randint(0,size[1]-1))
+                bitmasks.append(bitmask)
+            (first,second) = bitmasks
+            (width,height) = first.get_size()
+            (second_width,second_height) = second.get_size()
+            for _ in range(0,20):
+                x_offset = generator.randint(-second_width,width)
+                y_offset = generator.randint(-second_height,height)
+                correct = False
+                for x in range(0,width):
+                    for y in range(0,height):
+                        if first.get_bit(x,y) and second.get_bit(x-x_offset,y-y_offset):
+                            correct = True
+                self.assertEqual(first.overlaps(second,x_offset,y_offset),correct)
+                self.assertEqual(second.overlaps(first,-x_offset,-y_offset),correct)
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestBitmask)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()
@@ -0,0 +1,152 @@
+'''
+Created on 18 Oct 2026
+
+@author: michael
+'''
+
+import unittest
+import random
+from mjb.dev.game_utility.utility.rectangle_filler import RectangleFiller
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestRectangleFiller(unittest.TestCase):
+    '''
+    Test class for rectangle_filler.py
+    '''
+    
+    def check_cover(self, rects, coords):
+        '''
+        Check that the rectangles cover exactly the coordinates, without overlapping
+        '''
+        covered = []
+        for (x_min,y_min,x_max,y_max) in rects:
+            for x in range(x_min,x_max+1):
+                for y in range(y_min,y_max+1):
+                    covered.append((x,y))
+        self.assertEqual(sorted(covered),sorted(coords))
+    
+    def test_fill_grid(self):
+        coords = [(0,0),(1,0),(0,1),(1,1),(3,1)]
+        rects = RectangleFiller.fill_grid(list(coords))
+        self.assertEqual(sorted(rects),[(0,0,1,1),(3,1,3,1)])
+        self.check_cover(rects, coords)
+        self.assertEqual(RectangleFiller.fill_grid([]),[])
+    
+    def test_fill_bool_grid(self):
+        '''
+        Check that the grid native filling gives the same rectangles as filling the coordinates,
+        for random grids given as lists and as numpy arrays
+        '''
+        generator = random.Random(11)
+        self.assertEqual(RectangleFiller.fill_bool_grid([]),[])
+        for _ in range(0,200):
+            width = generator.randint(1,20)
+            height = generator.randint(1,20)
+            density = generator.random()
+            grid = [[generator.random()<density for _ in range(0,height)] for _ in range(0,width)]
+            coords = [(x,y) for x in range(0,width) for y in range(0,height) if grid[x][y]]
+            correct = RectangleFiller.fill_grid(list(coords))
+            self.check_cover(correct, coords)
+            self.assertEqual(RectangleFiller.fill_bool_grid(grid),correct)
+            if numpy is not None:
+                self.assertEqual(RectangleFiller.fill_bool_grid(numpy.array(grid,dtype=bool)),correct)
+            cells = bytearray(width*height)
+            for (x,y) in coords:
+                cells[x*height+y] = 1
+            self.assertEqual(RectangleFiller.fill_cell_array(cells, width, height),correct)
+            #The cells are cleared as they are filled
+            self.assertEqual(cells,bytearray(width*height))
+
+    def fewest_rectangles(self, cells, known):
+        '''
+        @param cells: a frozen set of coordinates
+        @param known: a dictionary of the answers already found
+        @return: the fewest rectangles the coordinates can be partitioned into (by trying everything)
+        '''
+        if not cells:
+            return 0
+        if cells in known:
+            return known[cells]
+        #The first cell must be the top left of its rectangle
+        (x_min,y_min) = min(cells)
+        best = None
+        x_max = x_min
+        while (x_max,y_min) in cells:
+            y_max = y_min
+            while all((x,y_max) in cells for x in range(x_min,x_max+1)):
+                rect_cells = set((x,y) for x in range(x_min,x_max+1) for y in range(y_min,y_max+1))
+                count = 1+self.fewest_rectangles(cells-rect_cells, known)
+                if best==None or count<best:
+                    best = count
+                y_max+=1
+            x_max+=1
+        known[cells] = best
+        return best
+    
+    def test_minimal(self):
+        '''
+        Check the minimal mode on some known shapes, and against trying every partition on small random grids
+        '''
+        #A plus shape, and a ring
+        plus = [(1,0),(0,1),(1,1),(2,1),(1,2)]
+        self.assertEqual(len(RectangleFiller.fill_grid(list(plus), True)),3)
+        self.check_cover(RectangleFiller.fill_grid(list(plus), True), plus)
+        ring = [(x,y) for x in range(0,3) for y in range(0,3) if (x,y)!=(1,1)]
+        self.assertEqual(len(RectangleFiller.fill_grid(list(ring), True)),4)
+        self.check_cover(RectangleFiller.fill_grid(list(ring), True), ring)
+        self.assertEqual(RectangleFiller.fill_grid([], True),[])
+        generator = random.Random(13)
+        for _ in range(0,150):
+            width = generator.randint(1,5)
+            height = generator.randint(1,5)
+            density = generator.random()
+            coords = [(x,y) for x in range(0,width) for y in range(0,height) if generator.random()<density]
+            rects = RectangleFiller.fill_grid(list(coords), True)
+            self.check_cover(rects, coords)
+            self.assertEqual(len(rects),self.fewest_rectangles(frozenset(coords), {}))
+    
+    def test_minimal_reduction(self):
+        '''
+        Compare the number of rectangles in the minimal mode with the heuristic on larger random grids
+        (blobs, like the shapes of images)
+        '''
+        generator = random.Random(17)
+        heuristic_count = 0
+        minimal_count = 0
+        for _ in range(0,30):
+            (width,height) = (30,30)
+            grid = [[False]*height for _ in range(0,width)]
+            for _ in range(0,generator.randint(1,12)):
+                x = generator.randint(0,width-1)
+                y = generator.randint(0,height-1)
+                radius = generator.randint(2,8)
+                for i in range(max(0,x-radius),min(width,x+radius+1)):
+                    for j in range(max(0,y-radius),min(height,y+radius+1)):
+                        if (i-x)**2+(j-y)**2<=radius**2:
+                            grid[i][j] = True
+            coords = [(x,y) for x in range(0,width) for y in range(0,height) if grid[x][y]]
+            heuristic = RectangleFiller.fill_bool_grid(grid)
+            minimal = RectangleFiller.fill_bool_grid(grid, True)
+            self.check_cover(minimal, coords)
+            self.assertTrue(len(minimal)<=len(heuristic))
+            heuristic_count+=len(heuristic)
+            minimal_count+=len(minimal)
+        #The reduction over the heuristic
+        self.assertTrue(minimal_count<heuristic_count,
+                        "Minimal used " + str(minimal_count) + " rectangles against " + str(heuristic_count))
+
+def suite():
+    '''
+    Add all test methods in this module to the suite!
+    '''
+    test_suite = unittest.TestSuite(
+        [#Add all classes here
+         unittest.TestLoader().loadTestsFromTestCase(TestRectangleFiller)
+        ])
+    return test_suite
+
+def load_tests(loader, tests, pattern):
+    return suite()